@@ -0,0 +1,136 @@
+import threading
+from array import array
+
+import numpy as np
+import pandas as pd
+
+
+class PaymentMethodRegistry:
+    """Intern payment method names as small integer ids shared by every batch."""
+
+    def __init__(self):
+        self.names = []
+        self._ids = {}
+        self._lock = threading.Lock()
+
+    def intern(self, name):
+        """Return the id for name, adding it on first sight."""
+        method_id = self._ids.get(name)
+        if method_id is None:
+            with self._lock:
+                method_id = self._ids.get(name)
+                if method_id is None:
+                    method_id = len(self.names)
+                    self.names.append(name)
+                    self._ids[name] = method_id
+        return method_id
+
+    def id_of(self, name):
+        """Return the id for name, or None if it has never been seen."""
+        return self._ids.get(name)
+
+
+# One registry for the whole process so ids mean the same thing across exchanges and batches
+PAYMENT_METHODS = PaymentMethodRegistry()
+
+
+class AdBatch:
+    """Columnar batch of scraped ads.
+
+    Prices and amounts are packed float64 arrays, and each ad's payment methods
+    are registry ids laid out CSR-style: the methods of ad i are
+    method_ids[method_offsets[i]:method_offsets[i + 1]]. to_frame() wraps the
+    number columns without copying them, so the batch must not be appended to
+    while a frame built from it is still alive.
+    """
+
+    __slots__ = ("advertisers", "prices", "amounts", "method_ids", "method_offsets", "registry")
+
+    def __init__(self, registry=PAYMENT_METHODS):
+        self.advertisers = []
+        self.prices = array("d")
+        self.amounts = array("d")
+        self.method_ids = array("i")
+        self.method_offsets = array("i", [0])
+        self.registry = registry
+
+    @classmethod
+    def from_rows(cls, rows, registry=PAYMENT_METHODS):
+        """Build a batch from (advertiser, price, amount, payment_methods) tuples."""
+        batch = cls(registry)
+        for advertiser, price, amount, payment_methods in rows:
+            batch.append(advertiser, price, amount, payment_methods)
+        return batch
+
+    def __len__(self):
+        return len(self.advertisers)
+
+    def rows(self):
+        """(advertiser, price, amount, payment_methods) tuples, the inverse of from_rows()."""
+        return [(self.advertisers[i], self.prices[i], self.amounts[i], self.payment_methods(i))
+                for i in range(len(self.advertisers))]
+
+    def append(self, advertiser, price, amount, payment_methods):
+        """Add one ad; payment_methods is a list of method names."""
+        self.advertisers.append(advertiser)
+        self.prices.append(price)
+        self.amounts.append(amount)
+        self.method_ids.extend(self.registry.intern(name) for name in payment_methods)
+        self.method_offsets.append(len(self.method_ids))
+
+    def extend(self, other):
+        """Append every ad of another batch that uses the same registry."""
+        base = len(self.method_ids)
+        self.advertisers.extend(other.advertisers)
+        self.prices.extend(other.prices)
+        self.amounts.extend(other.amounts)
+        self.method_ids.extend(other.method_ids)
+        self.method_offsets.extend(base + offset for offset in other.method_offsets[1:])
+
+    def append_from(self, other, index):
+        """Append ad `index` of another batch that uses the same registry."""
+        start, end = other.method_offsets[index], other.method_offsets[index + 1]
+        self.advertisers.append(other.advertisers[index])
+        self.prices.append(other.prices[index])
+        self.amounts.append(other.amounts[index])
+        self.method_ids.extend(other.method_ids[start:end])
+        self.method_offsets.append(len(self.method_ids))
+
+    def row_key(self, index):
+        """Hashable identity of one ad: advertiser, price, amount and payment method ids."""
+        start, end = self.method_offsets[index], self.method_offsets[index + 1]
+        return (self.advertisers[index], self.prices[index], self.amounts[index],
+                tuple(self.method_ids[start:end]))
+
+    def payment_methods(self, index):
+        """Payment method names of one ad."""
+        names = self.registry.names
+        start, end = self.method_offsets[index], self.method_offsets[index + 1]
+        return [names[method_id] for method_id in self.method_ids[start:end]]
+
+    def joined_payment_methods(self, empty=""):
+        """Payment methods as the ', '-joined strings written to the sheets."""
+        names = self.registry.names
+        ids = self.method_ids
+        offsets = self.method_offsets
+        return [
+            ", ".join([names[method_id] for method_id in ids[offsets[i]:offsets[i + 1]]]) or empty
+            for i in range(len(self.advertisers))
+        ]
+
+    def price_array(self):
+        """Prices as a float64 NumPy view of the batch (no copy)."""
+        return np.frombuffer(self.prices, dtype=np.float64) if self.prices else np.empty(0)
+
+    def amount_array(self):
+        """Available amounts as a float64 NumPy view of the batch (no copy)."""
+        return np.frombuffer(self.amounts, dtype=np.float64) if self.amounts else np.empty(0)
+
+    def to_frame(self, empty_payment_methods=""):
+        """DataFrame with the worksheet columns; Price and Available Amount share the batch's memory."""
+        return pd.DataFrame({
+            "Advertiser Name": self.advertisers,
+            "Price": self.price_array(),
+            "Available Amount": self.amount_array(),
+            "Payment Methods": self.joined_payment_methods(empty_payment_methods),
+        }, copy=False)
@@ -0,0 +1,211 @@
+"""Fetch a whole-market snapshot of every exchange, fiat and page concurrently.
+
+Usage: python async_engine.py [--exchanges binance bybit okx] [--output snapshot.json] [--store DIR]
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+import aiohttp
+
+from fiat_currencies import FIAT_CURRENCIES
+from ad_batch import AdBatch
+from p2p_api import EXCHANGE_APIS, HEADERS, BybitAPI, page_count
+from snapshot_store import append_batch
+
+# Per-exchange limits: concurrent requests in flight, and sustained requests per second
+HOST_LIMITS = {
+    "binance": {"concurrency": 8, "rate": 10.0, "burst": 10},
+    "bybit": {"concurrency": 6, "rate": 8.0, "burst": 8},
+    "okx": {"concurrency": 6, "rate": 8.0, "burst": 8},
+}
+
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 1.0  # Seconds, doubled on every retry
+BACKOFF_MAX = 30.0
+REQUEST_TIMEOUT = 15
+
+
+class TokenBucket:
+    """Allow `rate` requests per second on average with bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds):
+        """Drain the bucket so nobody on this host sends for `seconds` (used after a 429)."""
+        self.tokens = -seconds * self.rate
+        self.updated = time.monotonic()
+
+
+class HostLimiter:
+    """Concurrency cap plus token bucket for one exchange host."""
+
+    def __init__(self, concurrency, rate, burst):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.bucket = TokenBucket(rate, burst)
+        self.requests = 0
+        self.throttled = 0
+
+
+class EngineStats:
+    def __init__(self):
+        self.markets = 0
+        self.failed = 0
+        self.rows = 0
+        self.seconds = 0.0
+        # Per exchange: requests sent, and how many of them were answered with 429
+        self.requests = {}
+        self.throttled = {}
+
+
+def _retry_delay(attempt, retry_after=None):
+    if retry_after:
+        try:
+            return min(float(retry_after), BACKOFF_MAX)
+        except ValueError:
+            pass
+    return min(BACKOFF_BASE * 2 ** attempt, BACKOFF_MAX) * random.uniform(0.5, 1.0)
+
+
+async def fetch_json(session, limiter, request):
+    """Send one API request under the host limits, backing off on 429 and 5xx responses."""
+    request = dict(request)
+    method, url = request.pop("method"), request.pop("url")
+    for attempt in range(MAX_ATTEMPTS):
+        await limiter.bucket.acquire()
+        async with limiter.semaphore:
+            limiter.requests += 1
+            try:
+                async with session.request(method, url, **request) as response:
+                    if response.status == 429 or response.status >= 500:
+                        limiter.throttled += response.status == 429
+                        delay = _retry_delay(attempt, response.headers.get("Retry-After"))
+                        if response.status == 429:
+                            limiter.bucket.pause(delay)
+                    else:
+                        response.raise_for_status()
+                        return await response.json(content_type=None)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt == MAX_ATTEMPTS - 1:
+                    raise
+                delay = _retry_delay(attempt)
+        await asyncio.sleep(delay)
+    raise RuntimeError(f"{method} {urlparse(url).path} still failing after {MAX_ATTEMPTS} attempts")
+
+
+async def fetch_market(session, limiter, api, fiat):
+    """Fetch page 1 to learn the page count, then every remaining page at once."""
+    rows, total_ads = api.parse(await fetch_json(session, limiter, api.request(fiat, 1)))
+    pages = page_count(total_ads, api.page_size)
+    if rows and pages > 1:
+        payloads = await asyncio.gather(*(
+            fetch_json(session, limiter, api.request(fiat, page)) for page in range(2, pages + 1)
+        ))
+        for payload in payloads:
+            rows.extend(api.parse(payload)[0])
+    return AdBatch.from_rows(rows)
+
+
+async def snapshot(exchanges=None, base_urls=None, host_limits=None, fiat_lists=None):
+    """Fetch every (exchange, fiat) market and return ({(exchange, fiat): result or exception}, stats).
+
+    fiat_lists maps an exchange to the fiats to fetch (default: all of FIAT_CURRENCIES).
+    """
+    exchanges = exchanges or list(EXCHANGE_APIS)
+    base_urls = base_urls or {}
+    host_limits = host_limits or HOST_LIMITS
+    fiat_lists = fiat_lists or FIAT_CURRENCIES
+    stats = EngineStats()
+    start = time.perf_counter()
+
+    apis = {name: EXCHANGE_APIS[name](base_urls[name]) if name in base_urls else EXCHANGE_APIS[name]()
+            for name in exchanges}
+    limiters = {name: HostLimiter(**host_limits[name]) for name in exchanges}
+
+    connector = aiohttp.TCPConnector(limit=sum(host_limits[name]["concurrency"] for name in exchanges))
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    async with aiohttp.ClientSession(headers=HEADERS, connector=connector, timeout=timeout) as session:
+        for name, api in apis.items():
+            if isinstance(api, BybitAPI):
+                try:
+                    api.load_payment_names(await fetch_json(session, limiters[name], api.payment_list_request()))
+                except Exception as e:
+                    print(f"Could not load Bybit payment names, using payment ids: {e}")
+
+        markets = [(name, fiat) for name in exchanges for fiat in fiat_lists[name]]
+        results = await asyncio.gather(
+            *(fetch_market(session, limiters[name], apis[name], fiat) for name, fiat in markets),
+            return_exceptions=True,
+        )
+
+    snapshot_results = dict(zip(markets, results))
+    for result in results:
+        if isinstance(result, BaseException):
+            stats.failed += 1
+        else:
+            stats.markets += 1
+            stats.rows += len(result)
+    stats.seconds = time.perf_counter() - start
+
+    for name, limiter in limiters.items():
+        stats.requests[name] = limiter.requests
+        stats.throttled[name] = limiter.throttled
+        print(f"{name}: {limiter.requests} requests, {limiter.throttled} throttled (429)")
+    print(f"Snapshot: {stats.markets} markets, {stats.failed} failed, {stats.rows} ads in {stats.seconds:.1f}s")
+    return snapshot_results, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--exchanges", nargs="+", choices=list(EXCHANGE_APIS), default=list(EXCHANGE_APIS))
+    parser.add_argument("--output", help="Write the snapshot to this JSON file")
+    parser.add_argument("--store", help="Append every market to the Parquet dataset in this directory")
+    args = parser.parse_args()
+
+    results, _ = asyncio.run(snapshot(args.exchanges))
+    scraped_at = datetime.now(timezone.utc)
+
+    for (exchange, fiat), result in results.items():
+        if isinstance(result, BaseException):
+            print(f"An error occurred while fetching {exchange} {fiat}: {result}")
+        elif args.store:
+            append_batch(args.store, exchange, fiat, result, scraped_at=scraped_at)
+
+    if args.output:
+        data = {
+            f"{exchange}:{fiat}": {
+                "advertisers": ads.advertisers,
+                "prices": ads.prices.tolist(),
+                "amounts": ads.amounts.tolist(),
+                "payment_methods": [ads.payment_methods(i) for i in range(len(ads))],
+            }
+            for (exchange, fiat), ads in results.items()
+            if not isinstance(ads, BaseException)
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        print(f"Snapshot written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""Match payment methods against a user-defined list of banks.
+
+A bank list maps each bank's canonical name to its aliases, e.g.
+{"Banco Santander": ["Santander", "Santander Rio"], "Tinkoff": ["T-Bank"]}.
+Names are normalized (accents dropped, case folded, punctuation to spaces)
+and a payment method matches a bank when its normalized name
+
+1. equals one of the bank's aliases, else
+2. contains an alias as whole words ("Santander Rio Transfer"), longest alias
+   first, else
+3. is a close spelling of an alias ("Santandr"), found through a trigram
+   index so only aliases sharing a trigram with the name are compared.
+
+Each distinct payment method name is looked up once. Filtering an AdBatch or
+a snapshot_store table then maps every method id to its bank id through one
+array and reduces the hits per ad, so there is no per-ad Python code.
+"""
+import difflib
+import json
+import threading
+import unicodedata
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Similarity (difflib ratio) a name needs to count as a misspelling of an alias
+FUZZY_CUTOFF = 0.85
+NO_BANK = -1
+
+
+def normalize_name(name):
+    """Accent-free, case-folded words of a payment method or bank name, joined by single spaces."""
+    decomposed = unicodedata.normalize("NFKD", name)
+    letters = "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+    return " ".join("".join(char if char.isalnum() else " " for char in letters).split())
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class BankFilter:
+    """A compiled bank list: canonical bank ids and the lookups from payment method names to them.
+
+    Shared by every worker in the process, like PAYMENT_METHODS.
+    """
+
+    def __init__(self, banks, fuzzy_cutoff=FUZZY_CUTOFF):
+        self.names = []
+        # canonical bank name -> bank id
+        self.ids = {}
+        self.fuzzy_cutoff = fuzzy_cutoff
+        # normalized alias -> bank id
+        self._aliases = {}
+        # first word -> [(alias words, bank id)], longest alias first
+        self._by_first_word = {}
+        # trigram -> normalized aliases containing it
+        self._trigram_index = {}
+        for bank, aliases in banks.items():
+            bank_id = len(self.names)
+            self.names.append(bank)
+            self.ids[bank] = bank_id
+            for alias in [bank, *aliases]:
+                key = normalize_name(alias)
+                if key and key not in self._aliases:
+                    self._aliases[key] = bank_id
+        for key, bank_id in self._aliases.items():
+            words = tuple(key.split())
+            self._by_first_word.setdefault(words[0], []).append((words, bank_id))
+            for trigram in _trigrams(key):
+                self._trigram_index.setdefault(trigram, []).append(key)
+        for entries in self._by_first_word.values():
+            entries.sort(key=lambda entry: -len(entry[0]))
+
+        self._cache = {}
+        # id(registry) -> (registry, bank id per registry method id)
+        self._registry_lookups = {}
+        # Bank names asked for that are not in the list, each warned about once
+        self._unknown_banks = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        """Load a JSON bank list ({canonical name: [aliases]})."""
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f), **kwargs)
+
+    def __len__(self):
+        return len(self.names)
+
+    def bank_id(self, name):
+        """The bank id a payment method name matches, or NO_BANK."""
+        bank_id = self._cache.get(name)
+        if bank_id is None:
+            bank_id = self._match(normalize_name(name))
+            self._cache[name] = bank_id
+        return bank_id
+
+    def bank_name(self, name):
+        """The canonical name of the bank a payment method matches, or None."""
+        bank_id = self.bank_id(name)
+        return None if bank_id == NO_BANK else self.names[bank_id]
+
+    def bank_ids(self, names):
+        """int32 array of the bank id of every name."""
+        return np.fromiter((self.bank_id(name) for name in names), dtype=np.int32, count=len(names))
+
+    def _match(self, key):
+        if not key:
+            return NO_BANK
+        bank_id = self._aliases.get(key)
+        if bank_id is not None:
+            return bank_id
+
+        words = key.split()
+        best = None
+        for start, word in enumerate(words):
+            for alias_words, bank_id in self._by_first_word.get(word, ()):
+                if best is not None and len(alias_words) <= len(best[0]):
+                    break
+                if tuple(words[start:start + len(alias_words)]) == alias_words:
+                    best = (alias_words, bank_id)
+                    break
+        if best is not None:
+            return best[1]
+        return self._fuzzy_match(key)
+
+    def _fuzzy_match(self, key):
+        """The bank of the closest alias sharing trigrams with key, if it is close enough."""
+        shared = {}
+        for trigram in _trigrams(key):
+            for alias in self._trigram_index.get(trigram, ()):
+                shared[alias] = shared.get(alias, 0) + 1
+        if not shared:
+            return NO_BANK
+        # Only the aliases sharing the most trigrams can reach the cutoff; compare the top few
+        candidates = sorted(shared, key=shared.get, reverse=True)[:20]
+        matcher = difflib.SequenceMatcher(b=key, autojunk=False)
+        best_ratio, best_alias = 0.0, None
+        for alias in candidates:
+            matcher.set_seq1(alias)
+            if matcher.real_quick_ratio() < self.fuzzy_cutoff or matcher.quick_ratio() < self.fuzzy_cutoff:
+                continue
+            ratio = matcher.ratio()
+            if ratio > best_ratio:
+                best_ratio, best_alias = ratio, alias
+        if best_alias is None or best_ratio < self.fuzzy_cutoff:
+            return NO_BANK
+        return self._aliases[best_alias]
+
+    def _wanted(self, bank_ids, banks):
+        """Boolean hits of bank_ids, restricted to the given canonical bank names if any."""
+        if banks is None:
+            return bank_ids != NO_BANK
+        wanted = []
+        for bank in banks:
+            bank_id = self.ids.get(bank)
+            if bank_id is not None:
+                wanted.append(bank_id)
+            elif bank not in self._unknown_banks:
+                self._unknown_banks.add(bank)
+                print(f"Warning: {bank!r} is not in the bank list; skipping it.")
+        return np.isin(bank_ids, wanted)
+
+    # ---- Batches ----
+    def registry_lookup(self, registry):
+        """Bank id of every method id interned so far in a PaymentMethodRegistry."""
+        with self._lock:
+            known = self._registry_lookups.get(id(registry))
+            lookup = known[1] if known is not None and known[0] is registry else np.empty(0, dtype=np.int32)
+            names = registry.names
+            if len(lookup) < len(names):
+                # The registry only grows, so only the new names are looked up
+                lookup = np.concatenate([lookup, self.bank_ids(names[len(lookup):])])
+                self._registry_lookups[id(registry)] = (registry, lookup)
+        return lookup
+
+    def ad_mask(self, ads, banks=None):
+        """Boolean array: which ads of an AdBatch accept at least one (of the given) bank."""
+        if not len(ads):
+            return np.zeros(0, dtype=bool)
+        offsets = np.frombuffer(ads.method_offsets, dtype=np.int32)
+        if not len(ads.method_ids):
+            return np.zeros(len(ads), dtype=bool)
+        method_ids = np.frombuffer(ads.method_ids, dtype=np.int32)
+        hits = self._wanted(self.registry_lookup(ads.registry)[method_ids], banks)
+        # Hits per ad from the running total at each ad's method boundaries
+        running = np.concatenate(([0], np.cumsum(hits)))
+        return running[offsets[1:]] > running[offsets[:-1]]
+
+    def filter_batch(self, ads, banks=None):
+        """A new AdBatch with only the ads that accept at least one (of the given) bank."""
+        filtered = type(ads)(ads.registry)
+        for index in np.flatnonzero(self.ad_mask(ads, banks)):
+            filtered.append_from(ads, index)
+        return filtered
+
+    def method_names(self, names):
+        """The payment method names that match a bank, in their original order."""
+        return [name for name in names if self.bank_id(name) != NO_BANK]
+
+    # ---- Snapshot tables ----
+    def table_mask(self, table, banks=None, column="payment_methods"):
+        """Boolean array over the rows of a snapshot_store table: which ads accept a (given) bank."""
+        masks = [self._list_mask(chunk, banks) for chunk in table.column(column).chunks]
+        return np.concatenate(masks) if masks else np.zeros(0, dtype=bool)
+
+    def filter_table(self, table, banks=None, column="payment_methods"):
+        """The rows of a snapshot_store table whose ads accept at least one (of the given) bank."""
+        return table.filter(pa.array(self.table_mask(table, banks, column)))
+
+    def _list_mask(self, lists, banks):
+        methods = lists.flatten()
+        if not pa.types.is_dictionary(methods.type):
+            methods = pc.dictionary_encode(methods)
+        if not len(methods):
+            return np.zeros(len(lists), dtype=bool)
+        # Each distinct name of the chunk's dictionary is looked up once
+        bank_ids = self.bank_ids(methods.dictionary.to_pylist())
+        indices = methods.indices.to_numpy(zero_copy_only=False)
+        hits = self._wanted(bank_ids[indices], banks)
+        parents = pc.list_parent_indices(lists).to_numpy(zero_copy_only=False)
+        return np.bincount(parents[hits], minlength=len(lists)) > 0
@@ -0,0 +1,48 @@
+"""Time async_engine.snapshot over every market against the local replay server.
+
+Serves --ads generated ads per fiat for every exchange and fiat in
+FIAT_CURRENCIES, with --latency seconds per response and a 429 every
+--throttle-every requests, then runs a full snapshot under HOST_LIMITS.
+Alongside the wall time it prints each exchange's floor: the requests it
+sent divided by its sustained rate, which no concurrency setting can beat.
+
+Usage: python benchmarks/bench_async_snapshot.py [--ads 50] [--latency 0.05] [--throttle-every 25]
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from async_engine import HOST_LIMITS, snapshot  # noqa: E402
+from fiat_currencies import FIAT_CURRENCIES  # noqa: E402
+from replay_server import ReplayServer, build_recording  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ads", type=int, default=50, help="Ads per fiat")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--throttle-every", type=int, default=25)
+    parser.add_argument("--exchanges", nargs="+", default=list(HOST_LIMITS))
+    args = parser.parse_args()
+
+    fiats = sorted({fiat for name in args.exchanges for fiat in FIAT_CURRENCIES[name]})
+    recording = build_recording(fiats, args.ads)
+    with ReplayServer(recording, latency=args.latency, throttle_every=args.throttle_every) as server:
+        results, stats = asyncio.run(snapshot(args.exchanges, base_urls={name: server.url for name in args.exchanges}))
+
+    expected = sum(len(FIAT_CURRENCIES[name]) for name in args.exchanges) * args.ads
+    print(f"\n{'exchange':<10}{'rows':>8}{'requests':>10}{'429s':>6}{'floor s':>9}")
+    for name in args.exchanges:
+        rows = sum(len(ads) for (exchange, _), ads in results.items()
+                   if exchange == name and not isinstance(ads, BaseException))
+        requests = stats.requests[name]
+        print(f"{name:<10}{rows:>8}{requests:>10}{stats.throttled[name]:>6}"
+              f"{requests / HOST_LIMITS[name]['rate']:>9.1f}")
+    print(f"{stats.markets} markets, {stats.rows}/{expected} rows in {stats.seconds:.1f}s "
+          f"({server.requests} requests served)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Compare naive substring bank matching with bank_filter.BankFilter on a multi-exchange snapshot.
+
+The bank list has --banks banks with a few aliases each. The snapshot is
+--ads ads spread over the three exchanges, written with snapshot_store and
+read back as one table. Their payment methods mix wallets and bank names
+spelled the way the pages show them: different case, accents dropped, extra
+words ("Santander Rio Transfer") and the odd typo. The naive filter checks
+every alias as a lowercase substring of each ad's ', '-joined methods, the
+way the worksheets store them; the compiled one is a single table_mask().
+
+Usage: python benchmarks/bench_bank_filter.py [--banks 3000] [--ads 200000] [--repeat 3]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ad_batch import AdBatch, PaymentMethodRegistry  # noqa: E402
+from bank_filter import BankFilter  # noqa: E402
+from snapshot_store import append_batch, query  # noqa: E402
+
+WALLETS = ["PayPal", "Wise", "Revolut", "Skrill", "Payeer", "Advcash", "Zelle", "SEPA", "Cash Deposit",
+           "Mobile Money", "Airtel Money", "Cash in Person"]
+PREFIXES = ["Banco", "Bank", "Banca", "Caixa", "Credit", "First", "National", "United", "Royal", "Central"]
+ROOTS = ["Santa", "Nord", "Alfa", "Sber", "Itau", "Galic", "Pichin", "Maca", "Bradesc", "Merca", "Tinko",
+         "Raiff", "Ziraat", "Garan", "Akba", "Kasik", "Mandir", "Negar", "Monob", "Priva"]
+SUFFIXES = ["", "o", "a", "ia", "er", "en", "ank", "bank", "ito", "ova"]
+
+
+def build_banks(count, rng):
+    """{canonical name: aliases} with distinct made-up bank names."""
+    banks = {}
+    while len(banks) < count:
+        root = rng.choice(ROOTS) + rng.choice(SUFFIXES) + rng.choice(["", str(rng.randint(2, 99))])
+        name = f"{rng.choice(PREFIXES)} {root}"
+        if name not in banks:
+            banks[name] = [root, f"{root} {rng.choice(['Bank', 'Pay', 'Online'])}"]
+    return banks
+
+
+def spell(name, rng):
+    """A payment method name as an exchange might show a bank."""
+    style = rng.random()
+    if style < 0.3:
+        return name.upper()
+    if style < 0.5:
+        return f"{name} Transfer"
+    if style < 0.6 and len(name) > 8:
+        cut = rng.randrange(3, len(name) - 1)
+        return name[:cut] + name[cut + 1:]
+    if style < 0.7:
+        return name.replace("a", "á", 1)
+    return name
+
+
+def build_snapshot(directory, banks, ads, rng):
+    """Write ads for every exchange to a snapshot store under directory and read them back."""
+    registry = PaymentMethodRegistry()
+    spelled = [spell(rng.choice([bank, *aliases]), rng) for bank, aliases in banks.items()]
+    for exchange in ("binance", "bybit", "okx"):
+        batch = AdBatch(registry)
+        for _ in range(ads // 3):
+            methods = rng.sample(WALLETS, rng.randint(0, 3))
+            if rng.random() < 0.4:
+                methods.append(rng.choice(spelled))
+            batch.append("advertiser", 1.0, 100.0, methods)
+        append_batch(directory, exchange, "ARS", batch)
+    return query(directory)
+
+
+def naive_mask(joined, banks):
+    aliases = [alias.lower() for bank, names in banks.items() for alias in (bank, *names)]
+    return np.array([any(alias in text.lower() for alias in aliases) for text in joined])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--banks", type=int, default=3000)
+    parser.add_argument("--ads", type=int, default=200000)
+    parser.add_argument("--naive-ads", type=int, default=5000, help="ads the (slow) naive filter is timed on")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    banks = build_banks(args.banks, rng)
+    with tempfile.TemporaryDirectory() as directory:
+        table = build_snapshot(directory, banks, args.ads, rng)
+    joined = [", ".join(methods) for methods in table.column("payment_methods").to_pylist()]
+    print(f"{sum(len(aliases) + 1 for aliases in banks.values())} aliases of {len(banks)} banks, "
+          f"{table.num_rows} ads")
+
+    start = time.perf_counter()
+    bank_filter = BankFilter(banks)
+    compile_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    compiled = bank_filter.table_mask(table)
+    first_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        compiled = bank_filter.table_mask(table)
+    seconds = (time.perf_counter() - start) / args.repeat
+
+    sample = joined[:args.naive_ads]
+    start = time.perf_counter()
+    naive = naive_mask(sample, banks)
+    naive_seconds = (time.perf_counter() - start) / len(sample) * table.num_rows
+
+    print(f"{'filter':<28}{'seconds':>10}{'us/ad':>10}{'matches':>10}")
+    print(f"{'naive substring (projected)':<28}{naive_seconds:>10.2f}{naive_seconds / table.num_rows * 1e6:>10.2f}"
+          f"{naive.mean():>10.1%}")
+    print(f"{'BankFilter (first call)':<28}{first_seconds:>10.3f}{first_seconds / table.num_rows * 1e6:>10.2f}"
+          f"{compiled.mean():>10.1%}")
+    print(f"{'BankFilter (cached names)':<28}{seconds:>10.3f}{seconds / table.num_rows * 1e6:>10.2f}"
+          f"{compiled.mean():>10.1%}")
+    print(f"Compiling the bank list took {compile_seconds * 1000:.0f} ms")
+
+    sample_compiled = compiled[:len(sample)]
+    print(f"On the first {len(sample)} ads: {np.sum(naive & ~sample_compiled)} matched only by the naive filter, "
+          f"{np.sum(sample_compiled & ~naive)} only by BankFilter")
+
+
+if __name__ == "__main__":
+    main()
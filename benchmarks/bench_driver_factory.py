@@ -0,0 +1,52 @@
+"""Compare page-load time and Firefox memory with and without the driver factory's tuning.
+
+Loads each exchange's P2P page --loads times in a plain headless Firefox and
+in one started by DriverFactory (resource blocking, consent cookies), and
+prints mean load time and Firefox RSS (RSS needs psutil).
+
+Usage: python benchmarks/bench_driver_factory.py [--loads 5] [--fiat USD] [--geckodriver PATH]
+"""
+import argparse
+
+from bench_utils import load_adapter
+from driver_factory import DriverFactory
+
+
+def measure(factory, url, loads):
+    """Return (mean load ms, Firefox RSS in MiB after the last load) for one fresh driver."""
+    driver = factory.create()
+    try:
+        for _ in range(loads):
+            driver.get(url)
+            factory.record_load(driver)
+        factory.should_recycle(driver)
+    finally:
+        driver.quit()
+    stats = factory.stats
+    load_ms = sum(stats.load_ms[-loads:]) / max(1, len(stats.load_ms[-loads:]))
+    rss = stats.rss[-1] / 2**20 if stats.rss else float("nan")
+    return load_ms, rss
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--loads", type=int, default=5)
+    parser.add_argument("--fiat", default="USD")
+    parser.add_argument("--geckodriver", default=None)
+    args = parser.parse_args()
+
+    print(f"{'exchange':<10}{'profile':<10}{'load ms':>10}{'RSS MiB':>10}")
+    for exchange in ("binance", "bybit", "okx"):
+        adapter = load_adapter(exchange)
+        url = adapter.p2p_url.format(currency=args.fiat)
+        variants = (
+            ("cold", DriverFactory(args.geckodriver, block_resources=False)),
+            ("tuned", DriverFactory(args.geckodriver, consent_cookies=adapter.consent_cookies)),
+        )
+        for name, factory in variants:
+            load_ms, rss = measure(factory, url, args.loads)
+            print(f"{exchange:<10}{name:<10}{load_ms:>10.0f}{rss:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
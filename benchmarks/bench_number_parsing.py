@@ -0,0 +1,147 @@
+"""Compare the scrapers' old per-cell number parsing with number_parsing.parse_numbers.
+
+The corpus is pages of prices and amounts for every fiat, each written the way
+one locale formats numbers: "1,234.56 USDT" (en), "1.234,56" (de),
+"1 234,56" with a narrow no-break space (fr), "1'234.56" (ch) and bare
+"1234.56". Prices follow each fiat's rough USDT rate, so "1,234"-style
+values that read either way show up where they do on the live pages. The
+table shows the share of values each parser gets right and its cost per
+value.
+
+Usage: python benchmarks/bench_number_parsing.py [--pages 2000] [--rows 20] [--repeat 3]
+"""
+import argparse
+import math
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fiat_currencies import FIAT_CURRENCIES  # noqa: E402
+from number_parsing import NumberParser  # noqa: E402
+
+# Fiats whose pages are formatted in each non-English locale in the corpus
+LOCALE_FIATS = {
+    "de": {"EUR", "BRL", "ARS", "COP", "CLP", "IDR", "VND", "TRY", "DKK", "ISK"},
+    "fr": {"RUB", "UAH", "KZT", "PLN", "CZK", "HUF", "SEK", "NOK", "XOF", "XAF"},
+    "ch": {"CHF"},
+    "plain": {"INR", "PKR", "KES", "NGN", "GHS"},
+}
+
+
+def format_number(value, locale, decimals=2, suffix=""):
+    text = f"{value:,.{decimals}f}"
+    if locale == "de":
+        text = text.replace(",", "_").replace(".", ",").replace("_", ".")
+    elif locale == "fr":
+        text = text.replace(",", " ").replace(".", ",")
+    elif locale == "ch":
+        text = text.replace(",", "'")
+    elif locale == "plain":
+        text = text.replace(",", "")
+    return text + suffix
+
+
+def build_corpus(pages, rows, seed=0):
+    """[(fiat, locale, texts, true values)], one entry per page column."""
+    rng = random.Random(seed)
+    fiats = sorted({fiat for fiats in FIAT_CURRENCIES.values() for fiat in fiats})
+    rates = {fiat: 10 ** rng.uniform(-0.5, 4.5) for fiat in fiats}
+    locales = {fiat: next((locale for locale, members in LOCALE_FIATS.items() if fiat in members), "en")
+               for fiat in fiats}
+
+    corpus = []
+    for _ in range(pages):
+        fiat = rng.choice(fiats)
+        locale = locales[fiat]
+        # Prices of the big fiats are whole numbers on the live pages
+        decimals = 0 if rates[fiat] > 1000 else 2
+        prices = [round(rates[fiat] * rng.uniform(0.97, 1.03), decimals) for _ in range(rows)]
+        amounts = [round(10 ** rng.uniform(0, 5), 2) for _ in range(rows)]
+        corpus.append((fiat, locale, [format_number(p, locale, decimals, f" {fiat}") for p in prices], prices))
+        corpus.append((fiat, locale, [format_number(a, locale, 2, " USDT") for a in amounts], amounts))
+    return corpus
+
+
+def binance_legacy(text):
+    return float(text.replace(" USDT", "").replace(",", ""))
+
+
+def bybit_legacy(text):
+    """Bybit's price_text.split()[0] attempt and its per-span regex fallback."""
+    try:
+        value = float(text.split()[0])
+    except ValueError:
+        value = 0.0
+    if value == 0.0:
+        match = re.search(r"(\d+[.,]\d+)", text)
+        if match:
+            try:
+                value = float(match.group(1))
+            except ValueError:
+                value = 0.0
+    return value
+
+
+def okx_legacy(text):
+    return float(re.sub(r"[^\d.]", "", text).strip())
+
+
+def per_value(parse):
+    def parse_column(texts, fiat):
+        values = []
+        for text in texts:
+            try:
+                values.append(parse(text))
+            except ValueError:
+                values.append(float("nan"))
+        return values
+    return parse_column
+
+
+def run(name, parse_column, corpus, repeat):
+    """Return {locale: (correct, total)} and the mean seconds per value."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = [parse_column(texts, fiat) for fiat, _, texts, _ in corpus]
+    seconds = (time.perf_counter() - start) / repeat
+
+    accuracy = {}
+    for (_, locale, _, expected), values in zip(corpus, results):
+        correct, total = accuracy.get(locale, (0, 0))
+        correct += sum(not math.isnan(value) and abs(value - truth) <= 1e-9 * max(1.0, truth)
+                       for value, truth in zip(values, expected))
+        accuracy[locale] = (correct, total + len(expected))
+    values = sum(len(texts) for _, _, texts, _ in corpus)
+    return accuracy, seconds / values
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--rows", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.pages, args.rows)
+    print(f"{sum(len(texts) for _, _, texts, _ in corpus)} values in {len(corpus)} page columns")
+
+    locales = ["en", "plain", "de", "fr", "ch"]
+    print(f"{'parser':<16}" + "".join(f"{locale:>8}" for locale in locales) + f"{'us/value':>10}")
+    parsers = [
+        ("binance (old)", per_value(binance_legacy)),
+        ("bybit (old)", per_value(bybit_legacy)),
+        ("okx (old)", per_value(okx_legacy)),
+        # A fresh parser so no decimal marks are known before the run
+        ("parse_numbers", NumberParser().parse_column),
+    ]
+    for name, parse_column in parsers:
+        accuracy, seconds = run(name, parse_column, corpus, args.repeat)
+        shares = "".join(f"{accuracy[locale][0] / accuracy[locale][1]:>8.1%}" for locale in locales)
+        print(f"{name:<16}{shares}{seconds * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Replay scrape history to compare full sweeps with the adaptive refresh scheduler.
+
+Every cycle each policy may spend --budget browser-minutes. "sweep" scrapes
+currencies in the usual fixed order, picking up where the last cycle
+stopped; "adaptive" asks RefreshScheduler.plan() for the most urgent ones.
+A market counts as fresh from a simulated scrape until its next real change
+in the history. The table shows the share of market-time that was fresh and
+the fresh market-hours bought per browser-minute.
+
+History comes from the Parquet snapshot store (--store) or, without one,
+from a synthetic week where a few fiats change every few minutes and most
+barely move.
+
+Usage: python benchmarks/bench_refresh_scheduler.py [--store p2p_history] [--days 3]
+                                                    [--budget 5 10 20] [--cycle 15]
+"""
+import argparse
+import bisect
+import math
+import os
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fiat_currencies import FIAT_CURRENCIES  # noqa: E402
+from refresh_scheduler import (  # noqa: E402
+    ROWS_PER_PAGE, SECONDS_PER_CURRENCY, SECONDS_PER_PAGE, MarketStats, RefreshScheduler, summarize_scrapes,
+)
+from snapshot_store import query_frame  # noqa: E402
+
+# Fiats whose books move all day in the synthetic history
+VOLATILE_FIATS = {"USD", "EUR", "NGN", "ARS", "TRY", "RUB", "UAH", "BRL", "VES", "INR", "KES", "PKR"}
+
+
+def synthetic_history(days, sweep_minutes=10, seed=0):
+    """Full sweeps every sweep_minutes where each market changes as a Poisson process."""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    sweeps = int(days * 24 * 60 / sweep_minutes)
+    rows = []
+    for exchange, fiats in FIAT_CURRENCIES.items():
+        for fiat in fiats:
+            # Changes per hour: a few per hour for the busy fiats, one every day or two for the rest
+            rate = rng.uniform(4, 20) if fiat in VOLATILE_FIATS else 10 ** rng.uniform(-1.7, 0)
+            ad_count = rng.randint(60, 400) if fiat in VOLATILE_FIATS else rng.randint(1, 40)
+            price = rng.uniform(1, 1000)
+            for sweep in range(sweeps):
+                if sweep and rng.random() < 1 - math.exp(-rate * sweep_minutes / 60):
+                    price *= 1 + rng.choice((-1, 1)) * rng.uniform(0.002, 0.02)
+                rows.append((exchange, fiat, start + timedelta(minutes=sweep * sweep_minutes),
+                             round(price, 4), ad_count, ad_count * 500.0))
+    return pd.DataFrame(rows, columns=["exchange", "fiat", "scraped_at", "best_price", "ad_count", "total_amount"])
+
+
+def stored_history(root, days):
+    frame = query_frame(root, start=datetime.now(timezone.utc) - timedelta(days=days),
+                        columns=["exchange", "fiat", "scraped_at", "rank", "price", "amount"])
+    return summarize_scrapes(frame) if not frame.empty else None
+
+
+class Market:
+    """One market's real history: the state at each recorded scrape and when it changed."""
+
+    def __init__(self, rows, scheduler):
+        self.times = [row.scraped_at.to_pydatetime() for row in rows]
+        self.states = [(row.best_price, row.ad_count, row.total_amount) for row in rows]
+        self.changes = []
+        previous = MarketStats(None, None)
+        for time, state in zip(self.times, self.states):
+            if previous.observations and previous.differs(*state, scheduler.price_tolerance,
+                                                          scheduler.amount_tolerance):
+                self.changes.append(time)
+            previous.observe(time, *state, scheduler.half_life_hours, scheduler.price_tolerance,
+                             scheduler.amount_tolerance)
+
+    def state_at(self, time):
+        return self.states[max(0, bisect.bisect_right(self.times, time) - 1)]
+
+    def fresh_until(self, time):
+        """When the state seen by a scrape at time stops being current."""
+        index = bisect.bisect_right(self.changes, time)
+        return self.changes[index] if index < len(self.changes) else None
+
+
+def scrape_seconds(ad_count):
+    return SECONDS_PER_CURRENCY + SECONDS_PER_PAGE * math.ceil(ad_count / ROWS_PER_PAGE)
+
+
+def simulate(history, policy, budget_minutes, cycle_minutes):
+    """Return (fresh share of market-time, browser-minutes spent, fresh market-hours)."""
+    scheduler = RefreshScheduler()
+    markets = {key: Market(list(rows.itertuples(index=False)), scheduler)
+               for key, rows in history.groupby(["exchange", "fiat"], sort=False)}
+    keys = list(markets)
+    start, end = history["scraped_at"].min().to_pydatetime(), history["scraped_at"].max().to_pydatetime()
+
+    scrapes = {key: [] for key in keys}
+    spent_seconds = 0.0
+    cursor = 0
+    now = start
+    while now < end:
+        budget = budget_minutes * 60
+        if policy == "sweep":
+            planned = []
+            while len(planned) < len(keys):
+                key = keys[cursor % len(keys)]
+                cost = scrape_seconds(markets[key].state_at(now)[1])
+                if cost > budget:
+                    break
+                budget -= cost
+                planned.append(key)
+                cursor += 1
+        else:
+            planned = scheduler.plan(keys, budget_minutes, now)
+
+        for key in planned:
+            state = markets[key].state_at(now)
+            spent_seconds += scrape_seconds(state[1])
+            scrapes[key].append(now)
+            scheduler.record(*key, now, *state)
+        now += timedelta(minutes=cycle_minutes)
+
+    fresh_hours = 0.0
+    for key, times in scrapes.items():
+        for index, time in enumerate(times):
+            until = min(t for t in (markets[key].fresh_until(time), end,
+                                    times[index + 1] if index + 1 < len(times) else None) if t is not None)
+            fresh_hours += (until - time).total_seconds() / 3600
+    total_hours = len(keys) * (end - start).total_seconds() / 3600
+    return fresh_hours / total_hours, spent_seconds / 60, fresh_hours
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--store", default=None, help="snapshot store to replay (default: synthetic history)")
+    parser.add_argument("--days", type=float, default=3)
+    parser.add_argument("--budget", type=float, nargs="+", default=[5, 10, 20],
+                        help="browser-minutes per cycle")
+    parser.add_argument("--cycle", type=float, default=15, help="minutes between cycles")
+    args = parser.parse_args()
+
+    history = stored_history(args.store, args.days) if args.store else None
+    if history is None:
+        print("Replaying synthetic history")
+        history = synthetic_history(args.days)
+    print(f"{history['scraped_at'].nunique()} sweeps, {len(history.groupby(['exchange', 'fiat']))} markets\n")
+
+    print(f"{'budget':>8}{'policy':>10}{'fresh %':>10}{'browser min':>13}{'fresh h/min':>13}")
+    for budget in args.budget:
+        for policy in ("sweep", "adaptive"):
+            fresh, minutes, fresh_hours = simulate(history, policy, budget, args.cycle)
+            print(f"{budget:>8.0f}{policy:>10}{fresh * 100:>10.1f}{minutes:>13.0f}"
+                  f"{fresh_hours / max(minutes, 1e-9):>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Compare per-element, single execute_script and in-process HTML row extraction on fixture pages.
+
+With --offline no browser is started: each fixture page is parsed with the
+adapter's RowParser, checked against the rows it was rendered from and
+timed, which is what the html mode costs on top of its one round trip.
+
+Usage: python benchmarks/bench_row_extraction.py [--rows 20] [--repeat 5] [--geckodriver PATH] [--offline]
+"""
+import argparse
+import contextlib
+import io
+import tempfile
+import time
+
+from bench_utils import RoundTripCounter, create_driver, load_adapter
+from fixture_pages import generate_rows, render_page, write_fixtures
+
+
+def time_extraction(driver, scrape, repeat):
+    """Return (round trips per page, mean seconds per page, last result)."""
+    with RoundTripCounter(driver) as counter:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = scrape(driver)
+        elapsed = time.perf_counter() - start
+    return counter.count / repeat, elapsed / repeat, result
+
+
+def batch_values(ads):
+    return ads.advertisers, ads.prices, ads.amounts, ads.joined_payment_methods()
+
+
+def run_offline(args):
+    """Parse rendered fixture pages in-process and check the rows against the generated ones."""
+    from ad_batch import AdBatch
+
+    print(f"{'exchange':<10}{'ms/page':>10}{'us/row':>10}{'rows':>6}  match")
+    for exchange in ("binance", "bybit", "okx"):
+        adapter = load_adapter(exchange)
+        rows = generate_rows(args.rows)
+        markup = render_page(exchange, rows)
+        # The adapters print every row they convert
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                ads = adapter.ads_from_rows(adapter.row_parser.parse(markup))
+            seconds = (time.perf_counter() - start) / args.repeat
+
+        expected = AdBatch()
+        for advertiser, price, amount, methods in rows:
+            expected.append(advertiser, price, amount, methods)
+        match = "yes" if batch_values(ads) == batch_values(expected) else "NO"
+        print(f"{exchange:<10}{seconds * 1000:>10.2f}{seconds * 1e6 / max(len(ads), 1):>10.1f}{len(ads):>6}  {match}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--geckodriver", default=None)
+    parser.add_argument("--offline", action="store_true", help="only time the HTML parser, without a browser")
+    args = parser.parse_args()
+
+    if args.offline:
+        run_offline(args)
+        return
+
+    driver = create_driver(args.geckodriver)
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            fixtures = write_fixtures(directory, rows_per_page=args.rows)
+            print(f"{'exchange':<10}{'mode':<10}{'round trips':>12}{'ms/page':>10}{'rows':>6}")
+            for exchange, (path, rows) in fixtures.items():
+                adapter = load_adapter(exchange)
+                driver.get(f"file://{path}")
+                results = {}
+                modes = (("elements", adapter.scrape_page_elements), ("js", adapter.scrape_page_js),
+                         ("html", adapter.scrape_page_html))
+                for mode, scrape in modes:
+                    trips, seconds, result = time_extraction(driver, scrape, args.repeat)
+                    results[mode] = batch_values(result)
+                    print(f"{exchange:<10}{mode:<10}{trips:>12.0f}{seconds * 1000:>10.1f}{len(result):>6}")
+                for mode in ("js", "html"):
+                    if results[mode] != results["elements"]:
+                        print(f"WARNING: {exchange} {mode} extraction returned different rows than element queries")
+    finally:
+        driver.quit()
+
+
+if __name__ == "__main__":
+    main()
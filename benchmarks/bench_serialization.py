@@ -0,0 +1,96 @@
+"""Time Sheets payload serialization: DataFrame.iterrows versus column-wise conversion.
+
+Usage: python benchmarks/bench_serialization.py [--rows 10000 100000] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sheets_writer import clean_float_series, dataframe_to_values  # noqa: E402
+
+from fixture_pages import PAYMENT_METHODS  # noqa: E402
+
+
+def clean_float_value(value):
+    """The per-value cleaner the Bybit script used before clean_float_series."""
+    if value is None:
+        return 0.0
+    try:
+        float_val = float(value)
+        if not (-1e308 <= float_val <= 1e308):
+            return 0.0
+        return float_val
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def iterrows_values(all_advertisers, all_prices, all_amounts, all_payment_methods):
+    """Clean with list comprehensions and serialize with iterrows, as main() used to."""
+    df = pd.DataFrame({
+        'Advertiser Name': all_advertisers,
+        'Price': [clean_float_value(price) for price in all_prices],
+        'Available Amount': [clean_float_value(amount) for amount in all_amounts],
+        'Payment Methods': all_payment_methods,
+    })
+    rows = [df.columns.tolist()]
+    for _, row in df.iterrows():
+        rows.append([str(row['Advertiser Name']), float(row['Price']),
+                     float(row['Available Amount']), str(row['Payment Methods'])])
+    return rows
+
+
+def vectorized_values(all_advertisers, all_prices, all_amounts, all_payment_methods):
+    df = pd.DataFrame({
+        'Advertiser Name': all_advertisers,
+        'Price': clean_float_series(all_prices).to_numpy(),
+        'Available Amount': clean_float_series(all_amounts).to_numpy(),
+        'Payment Methods': all_payment_methods,
+    })
+    return dataframe_to_values(df)
+
+
+def make_columns(rows):
+    rng = np.random.default_rng(0)
+    methods = [", ".join(rng.choice(PAYMENT_METHODS, 2, replace=False)) for _ in range(64)]
+    prices = (rng.uniform(0.9, 1.2, rows) * 1000).round(2).tolist()
+    prices[::97] = [None] * len(prices[::97])  # A few unparsable cells, like failed scrapes
+    return (
+        [f"merchant_{i}" for i in range(rows)],
+        prices,
+        rng.uniform(10, 50000, rows).round(2).tolist(),
+        [methods[i % len(methods)] for i in range(rows)],
+    )
+
+
+def best_of(function, columns, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*columns)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8}{'iterrows ms':>14}{'vectorized ms':>16}{'speedup':>9}")
+    for rows in args.rows:
+        columns = make_columns(rows)
+        slow, expected = best_of(iterrows_values, columns, args.repeat)
+        fast, result = best_of(vectorized_values, columns, args.repeat)
+        if result != expected:
+            print(f"WARNING: payloads differ at {rows} rows")
+        print(f"{rows:>8}{slow * 1000:>14.1f}{fast * 1000:>16.1f}{slow / fast:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""Time a full sweep of the fiat_currencies lists end to end, offline.
+
+P2PEngine.run() scrapes every currency of the chosen exchanges from the
+FixtureSite (selenium backend) or a ReplayServer with the same ads (api
+backend) and writes them through SheetsSink to a FakeSheetsServer, so the
+run covers page loads, pagination, extraction, the Parquet store and the
+Sheets flush (payment method summaries included) with no network access.
+
+Each run reports wall time, the time until the first values reach Sheets,
+rows/sec, browser round trips (WebDriver commands, or HTTP requests for the
+api backend) and Sheets API calls (plus the peak traced memory with
+--trace-memory, and how many currencies stopped for each reason with
+--max-pages, --max-amount or --max-price-distance), and is appended with the current commit to --history. Runs are compared with
+the median of the previous runs of the same configuration and a drop in
+rows/sec of more than --threshold percent is flagged (and fails the run
+with --fail-on-regression).
+
+Usage: python benchmarks/bench_sweep.py [--backend selenium|api] [--exchanges binance bybit okx]
+                                        [--fiats 10] [--workers 2] [--geckodriver PATH] [--html-parsing]
+                                        [--stream] [--trace-memory] [--max-pages N] [--max-amount USDT]
+                                        [--max-price-distance PERCENT] [--verbose]
+"""
+import argparse
+import contextlib
+import functools
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from bench_utils import REPO_ROOT, RoundTripCounter, load_adapter
+from fake_sheets import FakeSheetsServer, fake_client
+from fixture_site import FixtureSite, sweep_ad_counts
+from replay_server import PAGE_SIZES, PAYLOAD_BUILDERS, ReplayServer
+
+from depth_limits import DepthLimit  # noqa: E402
+from driver_factory import DriverFactory  # noqa: E402
+from p2p_engine import P2PEngine  # noqa: E402
+from phase_metrics import PHASE_METRICS  # noqa: E402
+from snapshot_store import query_frame  # noqa: E402
+
+DEFAULT_HISTORY = os.path.join(REPO_ROOT, "benchmarks", "results", "sweep_history.jsonl")
+
+
+def build_recording(site, fiat_lists):
+    """A ReplayServer recording with the same ads the fixture site serves."""
+    recording = {}
+    for exchange, fiats in fiat_lists.items():
+        build, page_size = PAYLOAD_BUILDERS[exchange], PAGE_SIZES[exchange]
+        for fiat in fiats:
+            rows = site.rows(exchange, fiat)
+            if not page_size:
+                recording[(exchange, fiat, 1)] = build(rows, len(rows))
+                continue
+            for page, start in enumerate(range(0, len(rows), page_size), start=1):
+                recording[(exchange, fiat, page)] = build(rows[start:start + page_size], len(rows))
+    return recording
+
+
+def seed_workbooks(sheets, adapters):
+    """One fake workbook per exchange with its fiats in column A of Main, like the real ones."""
+    for adapter in adapters:
+        adapter.sheet_id = f"bench-{adapter.name}"
+        main = [["Fiat", "Payment methods", "Ads", "Updated"]] + [[fiat] for fiat in adapter.fiat_currencies]
+        sheets.add_spreadsheet(adapter.sheet_id, {"Main": main}, title=f"{adapter.name} P2P")
+
+
+class CountingDriverFactory(DriverFactory):
+    """DriverFactory that counts the WebDriver commands of every driver it starts."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.counters = []
+
+    def create(self):
+        driver = super().create()
+        counter = RoundTripCounter(driver)
+        # Left installed for the driver's lifetime; quit() is counted too
+        counter.__enter__()
+        self.counters.append(counter)
+        return driver
+
+    @property
+    def round_trips(self):
+        return sum(counter.count for counter in self.counters)
+
+
+def run_sweep(args, fiat_lists, site, workdir):
+    """Run one engine sweep and return its measurements."""
+    adapters = [load_adapter(exchange) for exchange in fiat_lists]
+    replay = None
+    with FakeSheetsServer(latency=args.sheets_latency) as sheets, contextlib.ExitStack() as stack:
+        seed_workbooks(sheets, adapters)
+        if args.backend == "api":
+            replay = stack.enter_context(ReplayServer(build_recording(site, fiat_lists)))
+        for adapter in adapters:
+            adapter.fiat_currencies = fiat_lists[adapter.name]
+            adapter.p2p_url = site.p2p_url(adapter.name)
+            adapter.consent_cookies = {}
+            adapter.use_html_parsing = args.html_parsing
+            adapter.depth_limit = DepthLimit(args.max_pages, args.max_amount, args.max_price_distance)
+            if replay is not None:
+                adapter.api_class = functools.partial(adapter.api_class, base_url=replay.url)
+
+        factory = CountingDriverFactory(args.geckodriver)
+        store_dir = os.path.join(workdir, "p2p_history")
+        engine = P2PEngine(adapters, backend=args.backend, workers=args.workers, driver_factory=factory,
+                           sheet_snapshot_dir=os.path.join(workdir, "sheet_snapshots"),
+                           snapshot_store_dir=store_dir, retries=0, sheets_client=fake_client(sheets),
+                           stream_pages=args.stream)
+
+        output = sys.stdout if args.verbose else open(os.devnull, "w")
+        if args.trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(output):
+            engine.run()
+        wall = time.perf_counter() - start
+        peak_memory = tracemalloc.get_traced_memory()[1] if args.trace_memory else None
+        tracemalloc.stop()
+        if output is not sys.stdout:
+            output.close()
+
+        frame = query_frame(store_dir, columns=["exchange", "fiat"])
+        stop_reasons = {}
+        for currencies in engine.stop_reasons.values():
+            for entry in currencies.values():
+                stop_reasons[entry["reason"]] = stop_reasons.get(entry["reason"], 0) + 1
+        return {
+            "wall_seconds": round(wall, 3),
+            "first_write_seconds": round(sheets.first_write_at - start, 3) if sheets.first_write_at else None,
+            "peak_memory_bytes": peak_memory,
+            "rows": len(frame),
+            "currencies": len(frame.drop_duplicates()),
+            "round_trips": factory.round_trips if replay is None else replay.requests,
+            "page_requests": site.requests,
+            "sheets_calls": sheets.total_calls(),
+            "sheets_calls_by_endpoint": dict(sheets.calls),
+            "sheets_payload_bytes": sheets.payload_bytes,
+            "stop_reasons": stop_reasons,
+        }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def load_history(path, config):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return [record for record in records if record["config"] == config]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=("selenium", "api"), default="selenium")
+    parser.add_argument("--exchanges", nargs="+", default=["binance", "bybit", "okx"])
+    parser.add_argument("--fiats", type=int, default=None, help="only the first N fiats of each list")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--geckodriver", default=None)
+    parser.add_argument("--html-parsing", action="store_true", help="parse each page's table with lxml")
+    parser.add_argument("--stream", action="store_true", help="write every page to the sinks as it is scraped")
+    parser.add_argument("--trace-memory", action="store_true", help="report the peak memory traced by tracemalloc")
+    parser.add_argument("--max-pages", type=int, default=None, help="read at most N pages per currency")
+    parser.add_argument("--max-amount", type=float, default=None, help="stop a currency at this much USDT")
+    parser.add_argument("--max-price-distance", type=float, default=None,
+                        help="stop a currency after a price this many percent from the best")
+    parser.add_argument("--rows-per-page", type=int, default=10)
+    parser.add_argument("--render-delay-ms", type=int, default=50, help="delay before a clicked page renders")
+    parser.add_argument("--sheets-latency", type=float, default=0.0, help="seconds added to every Sheets call")
+    parser.add_argument("--history", default=DEFAULT_HISTORY)
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent drop in rows/sec to flag")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--verbose", action="store_true", help="show the engine's output")
+    args = parser.parse_args()
+
+    fiat_lists = {}
+    for exchange in args.exchanges:
+        fiats = list(load_adapter(exchange).fiat_currencies)
+        fiat_lists[exchange] = fiats[:args.fiats] if args.fiats else fiats
+    ad_counts = sweep_ad_counts(fiat_lists)
+    config = {"backend": args.backend, "exchanges": args.exchanges, "fiats": args.fiats, "workers": args.workers,
+              "html_parsing": args.html_parsing, "stream": args.stream, "trace_memory": args.trace_memory,
+              "max_pages": args.max_pages, "max_amount": args.max_amount,
+              "max_price_distance": args.max_price_distance,
+              "rows_per_page": args.rows_per_page, "render_delay_ms": args.render_delay_ms,
+              "sheets_latency": args.sheets_latency}
+
+    print(f"Sweeping {sum(map(len, fiat_lists.values()))} currencies ({sum(ad_counts.values())} ads) "
+          f"with the {args.backend} backend and {args.workers} worker(s)...")
+    with FixtureSite(ad_counts, args.rows_per_page, args.render_delay_ms) as site, \
+            tempfile.TemporaryDirectory() as workdir:
+        result = run_sweep(args, fiat_lists, site, workdir)
+
+    result["rows_per_second"] = round(result["rows"] / result["wall_seconds"], 1) if result["wall_seconds"] else 0.0
+    expected = sum(ad_counts.values())
+    limited = any(value is not None for value in (args.max_pages, args.max_amount, args.max_price_distance))
+    print(f"Wall time:      {result['wall_seconds']:.1f}s")
+    if result["first_write_seconds"] is not None:
+        print(f"First write:    {result['first_write_seconds']:.2f}s")
+    if result["peak_memory_bytes"] is not None:
+        print(f"Peak memory:    {result['peak_memory_bytes'] / 2 ** 20:.1f} MiB (traced)")
+    print(f"Rows:           {result['rows']} of {expected} in {result['currencies']} currencies"
+          f"{'' if result['rows'] == expected or limited else '  (MISSING ROWS)'}")
+    if limited:
+        print("Stop reasons:   " + ", ".join(f"{reason} {count}"
+                                             for reason, count in sorted(result["stop_reasons"].items())))
+    print(f"Rows/sec:       {result['rows_per_second']:.1f}")
+    print(f"Round trips:    {result['round_trips']} "
+          f"({result['round_trips'] / max(result['currencies'], 1):.1f} per currency)")
+    print(f"Sheets calls:   {result['sheets_calls']} ({result['sheets_payload_bytes']} payload bytes): "
+          + ", ".join(f"{name} {count}" for name, count in sorted(result["sheets_calls_by_endpoint"].items())))
+    PHASE_METRICS.report()
+
+    previous = load_history(args.history, config)
+    regressed = False
+    if previous:
+        baseline = statistics.median(record["result"]["rows_per_second"] for record in previous[-5:])
+        change = (result["rows_per_second"] - baseline) / baseline * 100 if baseline else 0.0
+        regressed = change < -args.threshold
+        print(f"Against the median of the last {min(len(previous), 5)} runs ({baseline:.1f} rows/sec, "
+              f"{previous[-1]['commit']} last): {change:+.1f}%{'  REGRESSION' if regressed else ''}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.history)), exist_ok=True)
+    record = {"commit": git_commit(), "at": datetime.now(timezone.utc).isoformat(), "config": config,
+              "result": result, "phases": PHASE_METRICS.summary()}
+    with open(args.history, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+    print(f"Recorded in {args.history}")
+
+    if regressed and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
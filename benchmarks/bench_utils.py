@@ -0,0 +1,56 @@
+"""Helpers shared by the benchmark scripts."""
+import importlib
+import os
+import sys
+
+from selenium import webdriver
+from selenium.webdriver.firefox.options import Options
+from selenium.webdriver.firefox.service import Service
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The scrapers and the modules they import live in the repository root
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+ADAPTER_CLASSES = {
+    "binance": ("binance_adapter", "BinanceAdapter"),
+    "bybit": ("bybit_adapter", "BybitAdapter"),
+    "okx": ("okx_adapter", "OKXAdapter"),
+}
+
+
+def load_adapter(exchange):
+    """Return an ExchangeAdapter instance for one exchange."""
+    module_name, class_name = ADAPTER_CLASSES[exchange]
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+def create_driver(geckodriver_path=None):
+    """Start a headless Firefox for benchmarking."""
+    options = Options()
+    options.add_argument("-headless")
+    service = Service(geckodriver_path) if geckodriver_path else Service()
+    return webdriver.Firefox(service=service, options=options)
+
+
+class RoundTripCounter:
+    """Count the WebDriver commands a driver sends while installed."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.count = 0
+        self._execute = driver.execute
+
+    def __enter__(self):
+        def counting_execute(driver_command, params=None):
+            self.count += 1
+            return self._execute(driver_command, params)
+
+        # WebElement calls go through parent.execute, so this counts element queries too
+        self.driver.execute = counting_execute
+        return self
+
+    def __exit__(self, *exc):
+        self.driver.execute = self._execute
+        return False
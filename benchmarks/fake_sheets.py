@@ -0,0 +1,298 @@
+"""In-memory stand-in for the Google Sheets API, served over local HTTP.
+
+fake_client(server) returns a real gspread.Client whose requests to
+sheets.googleapis.com go to the FakeSheetsServer instead, so SheetsSink and
+BatchedSheetsWriter run unmodified with no credentials and no network. The
+server implements the calls those use (spreadsheet metadata, batchUpdate,
+values get/update/clear/batchUpdate) and counts every request.
+"""
+import json
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+import gspread
+import requests
+
+SHEETS_ORIGIN = "https://sheets.googleapis.com"
+
+_CELL = re.compile(r"^([A-Z]*)(\d*)$")
+
+
+def _column_index(letters):
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord("A") + 1
+    return index - 1
+
+
+def parse_range(range_name):
+    """Split an A1 range into (sheet title or None, first row, first column, last row, last column).
+
+    Indexes are 0-based and inclusive; missing bounds are None (a whole
+    sheet, or whole rows/columns).
+    """
+    title, _, cells = range_name.rpartition("!")
+    if not title and not _CELL.match(cells.split(":")[0] or "!"):
+        title, cells = cells, ""
+    title = title.strip("'").replace("''", "'") or None
+    if not cells:
+        return title, None, None, None, None
+
+    start, _, end = cells.partition(":")
+    end = end or start
+    bounds = []
+    for cell in (start, end):
+        letters, digits = _CELL.match(cell).groups()
+        bounds.append((int(digits) - 1 if digits else None, _column_index(letters) if letters else None))
+    (first_row, first_col), (last_row, last_col) = bounds
+    return title, first_row, first_col, last_row, last_col
+
+
+class FakeSpreadsheet:
+    def __init__(self, spreadsheet_id, title):
+        self.id = spreadsheet_id
+        self.title = title
+        # title -> {"sheetId", "rowCount", "columnCount", "values": list of rows}
+        self.sheets = {}
+        self.next_sheet_id = 0
+
+    def add_sheet(self, title, rows=1000, cols=26, sheet_id=None, values=None):
+        sheet_id = self.next_sheet_id if sheet_id is None else sheet_id
+        self.next_sheet_id = max(self.next_sheet_id, sheet_id) + 1
+        self.sheets[title] = {"sheetId": sheet_id, "rowCount": rows, "columnCount": cols,
+                              "values": [list(row) for row in values or []]}
+        return self.properties(title, len(self.sheets) - 1)
+
+    def properties(self, title, index):
+        sheet = self.sheets[title]
+        return {"sheetId": sheet["sheetId"], "title": title, "index": index, "sheetType": "GRID",
+                "gridProperties": {"rowCount": sheet["rowCount"], "columnCount": sheet["columnCount"]}}
+
+    def metadata(self):
+        return {
+            "spreadsheetId": self.id,
+            "properties": {"title": self.title, "locale": "en_US", "timeZone": "Etc/UTC"},
+            "sheets": [{"properties": self.properties(title, index)} for index, title in enumerate(self.sheets)],
+        }
+
+    def sheet_by_id(self, sheet_id):
+        return next(title for title, sheet in self.sheets.items() if sheet["sheetId"] == sheet_id)
+
+    def _sheet(self, title):
+        return self.sheets[title or next(iter(self.sheets))]
+
+    def get(self, range_name, major_dimension="ROWS"):
+        title, first_row, first_col, last_row, last_col = parse_range(range_name)
+        rows = self._sheet(title)["values"]
+        first_row, first_col = first_row or 0, first_col or 0
+        last_row = len(rows) - 1 if last_row is None else last_row
+        values = []
+        for row in rows[first_row:last_row + 1]:
+            values.append(row[first_col:None if last_col is None else last_col + 1])
+        while values and not any(value != "" for value in values[-1]):
+            values.pop()
+        if major_dimension == "COLUMNS":
+            width = max((len(row) for row in values), default=0)
+            values = [[row[col] if col < len(row) else "" for row in values] for col in range(width)]
+            for column in values:
+                while column and column[-1] == "":
+                    column.pop()
+        return values
+
+    def update(self, range_name, values):
+        title, first_row, first_col, _, _ = parse_range(range_name)
+        rows = self._sheet(title)["values"]
+        first_row, first_col = first_row or 0, first_col or 0
+        for offset, new_row in enumerate(values):
+            while len(rows) <= first_row + offset:
+                rows.append([])
+            row = rows[first_row + offset]
+            while len(row) < first_col + len(new_row):
+                row.append("")
+            row[first_col:first_col + len(new_row)] = new_row
+        return sum(len(row) for row in values)
+
+    def clear(self, range_name, from_row=0):
+        title, first_row, first_col, last_row, last_col = parse_range(range_name)
+        rows = self._sheet(title)["values"]
+        first_row = from_row if first_row is None else first_row
+        last_row = len(rows) - 1 if last_row is None else last_row
+        for row in rows[first_row:last_row + 1]:
+            end = len(row) if last_col is None else min(len(row), last_col + 1)
+            for col in range(first_col or 0, end):
+                row[col] = ""
+
+
+class FakeSheetsServer:
+    """Serve fake spreadsheets on 127.0.0.1 from a background thread."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.spreadsheets = {}
+        self.calls = Counter()
+        self.payload_bytes = 0
+        # time.perf_counter() of the first call that wrote values
+        self.first_write_at = None
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _handle(self, method):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                if server.latency:
+                    threading.Event().wait(server.latency)
+                url = urlparse(self.path)
+                try:
+                    with server.lock:
+                        server.payload_bytes += len(raw)
+                        status, payload = server.dispatch(method, unquote(url.path), parse_qs(url.query),
+                                                          json.loads(raw or b"{}"))
+                except KeyError as e:
+                    status, payload = 404, {"error": {"code": 404, "message": f"not found: {e}", "status": "NOT_FOUND"}}
+                self._reply(status, payload)
+
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+            def do_PUT(self):
+                self._handle("PUT")
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def add_spreadsheet(self, spreadsheet_id, sheets=None, title="P2P"):
+        """Create a spreadsheet; sheets maps worksheet titles to their initial rows."""
+        spreadsheet = FakeSpreadsheet(spreadsheet_id, title)
+        for sheet_title, values in (sheets or {"Sheet1": []}).items():
+            spreadsheet.add_sheet(sheet_title, values=values)
+        self.spreadsheets[spreadsheet_id] = spreadsheet
+        return spreadsheet
+
+    def dispatch(self, method, path, query, body):
+        """Handle one Sheets API call and return (status, response body)."""
+        match = re.match(r"^/v4/spreadsheets/([^/:]+)(.*)$", path)
+        if not match:
+            raise KeyError(path)
+        spreadsheet = self.spreadsheets[match.group(1)]
+        rest = match.group(2)
+
+        if rest == "" and method == "GET":
+            self.calls["spreadsheets.get"] += 1
+            return 200, spreadsheet.metadata()
+        if rest == ":batchUpdate":
+            self.calls["spreadsheets.batchUpdate"] += 1
+            return 200, {"spreadsheetId": spreadsheet.id,
+                         "replies": [self._sheet_request(spreadsheet, request) for request in body["requests"]]}
+        if rest == "/values:batchUpdate":
+            self.calls["values.batchUpdate"] += 1
+            self._wrote()
+            cells = sum(spreadsheet.update(data["range"], data["values"]) for data in body["data"])
+            return 200, {"spreadsheetId": spreadsheet.id, "totalUpdatedCells": cells, "responses": []}
+        if rest == "/values:batchGet":
+            self.calls["values.batchGet"] += 1
+            major = query.get("majorDimension", ["ROWS"])[0]
+            return 200, {"spreadsheetId": spreadsheet.id, "valueRanges": [
+                {"range": range_name, "values": spreadsheet.get(range_name, major)}
+                for range_name in query.get("ranges", [])
+            ]}
+        if rest == "/values:batchClear":
+            self.calls["values.batchClear"] += 1
+            for range_name in body.get("ranges", []):
+                spreadsheet.clear(range_name)
+            return 200, {"spreadsheetId": spreadsheet.id}
+
+        range_name = rest[len("/values/"):] if rest.startswith("/values/") else None
+        if range_name is None:
+            raise KeyError(path)
+        if range_name.endswith(":clear"):
+            self.calls["values.clear"] += 1
+            spreadsheet.clear(range_name[:-len(":clear")])
+            return 200, {"spreadsheetId": spreadsheet.id, "clearedRange": range_name[:-len(":clear")]}
+        if method == "PUT":
+            self.calls["values.update"] += 1
+            self._wrote()
+            cells = spreadsheet.update(range_name, body["values"])
+            return 200, {"spreadsheetId": spreadsheet.id, "updatedRange": range_name, "updatedCells": cells}
+        self.calls["values.get"] += 1
+        major = query.get("majorDimension", ["ROWS"])[0]
+        return 200, {"range": range_name, "majorDimension": major, "values": spreadsheet.get(range_name, major)}
+
+    def _sheet_request(self, spreadsheet, request):
+        kind, spec = next(iter(request.items()))
+        if kind == "addSheet":
+            properties = spec["properties"]
+            grid = properties.get("gridProperties", {})
+            return {"addSheet": {"properties": spreadsheet.add_sheet(
+                properties["title"], grid.get("rowCount", 1000), grid.get("columnCount", 26),
+                properties.get("sheetId"))}}
+        if kind == "updateSheetProperties":
+            title = spreadsheet.sheet_by_id(spec["properties"]["sheetId"])
+            grid = spec["properties"].get("gridProperties", {})
+            spreadsheet.sheets[title]["rowCount"] = grid.get("rowCount", spreadsheet.sheets[title]["rowCount"])
+        elif kind == "updateCells":
+            title = spreadsheet.sheet_by_id(spec["range"]["sheetId"])
+            # Quoted, so titles such as "USD" are not read as a cell reference
+            spreadsheet.clear("'{}'".format(title.replace("'", "''")), spec["range"].get("startRowIndex", 0))
+        # Formatting requests (repeatCell, ...) have no effect on the stored values
+        return {}
+
+    def _wrote(self):
+        if self.first_write_at is None:
+            self.first_write_at = time.perf_counter()
+
+    def total_calls(self):
+        return sum(self.calls.values())
+
+    def reset_counts(self):
+        self.calls.clear()
+        self.payload_bytes = 0
+        self.first_write_at = None
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        return False
+
+
+class _LocalSheetsAdapter(requests.adapters.HTTPAdapter):
+    """Send requests for sheets.googleapis.com to the fake server instead."""
+
+    def __init__(self, base_url):
+        super().__init__()
+        self.base_url = base_url
+
+    def send(self, request, **kwargs):
+        request.url = self.base_url + request.url[len(SHEETS_ORIGIN):]
+        return super().send(request, **kwargs)
+
+
+def fake_client(server):
+    """A gspread client that talks to server without credentials."""
+    session = requests.Session()
+    session.trust_env = False
+    session.mount(SHEETS_ORIGIN, _LocalSheetsAdapter(server.url))
+    return gspread.Client(None, session=session)
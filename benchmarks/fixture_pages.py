@@ -0,0 +1,175 @@
+"""Offline copies of the Binance, Bybit and OKX P2P tables for benchmarks.
+
+The markup only keeps the elements and class names the scrapers select on, so a
+page renders instantly from disk and every run sees exactly the same rows.
+render_app() adds a small script that re-renders the table when a page number
+or the next button is clicked, like the live single-page apps do.
+"""
+import json
+import os
+import random
+
+PAYMENT_METHODS = [
+    "Bank Transfer", "Wise", "Revolut", "SEPA", "Zelle", "PayPal", "Skrill",
+    "Advcash", "Payeer", "Cash Deposit", "Mobile Money", "Airtel Money",
+]
+
+
+def generate_rows(count, seed=0):
+    """Generate deterministic (advertiser, price, amount, payment_methods) rows."""
+    rng = random.Random(seed)
+    rows = []
+    for index in range(count):
+        rows.append((
+            f"merchant_{seed}_{index}",
+            round(rng.uniform(0.9, 1.2) * 1000, 2),
+            round(rng.uniform(10, 50000), 2),
+            rng.sample(PAYMENT_METHODS, rng.randint(1, 4)),
+        ))
+    return rows
+
+
+def _binance_row(advertiser, price, amount, methods):
+    methods_html = "".join(f'<div class="PaymentMethodItem__text">{m}</div>' for m in methods)
+    return (
+        "<tr>"
+        f'<td><a href="/advertiserDetail?advertiserNo={advertiser}">{advertiser}</a></td>'
+        f'<td><div class="headline5">{price:,.2f}</div></td>'
+        f'<td><div class="body3">{amount:,.2f} USDT</div></td>'
+        f"<td>{methods_html}</td>"
+        "</tr>"
+    )
+
+
+def _current(n, page):
+    # aria-current marks the active page without touching the class names the scrapers match
+    return ' aria-current="page"' if n == page else ""
+
+
+def _binance_pagination(page, pages):
+    items = "".join(f'<a class="bn-pagination-item" data-page="{n}"{_current(n, page)}>{n}</a>'
+                    for n in range(1, pages + 1))
+    disabled = "true" if page >= pages else "false"
+    return (f'<div class="bn-pagination">{items}'
+            f'<div class="bn-pagination-next" aria-disabled="{disabled}" data-next></div></div>')
+
+
+def _bybit_row(advertiser, price, amount, methods):
+    methods_html = "".join(f'<span class="trade-list-tag">{m}</span>' for m in methods)
+    return (
+        "<tr>"
+        f'<td><div class="advertiser-name">{advertiser}</div></td>'
+        f'<td><span class="price-amount">{price:.2f} USD</span></td>'
+        f'<td><div class="ql-value">{amount:,.2f} USDT</div><div class="ql-value">10 ~ 500 USD</div></td>'
+        f"<td>{methods_html}</td>"
+        "</tr>"
+    )
+
+
+def _bybit_pagination(page, pages):
+    items = "".join(f'<li class="pagination-item" data-page="{n}"{_current(n, page)}>{n}</li>'
+                    for n in range(1, pages + 1))
+    disabled = " disabled" if page >= pages else ""
+    return (
+        f'<div class="trade-table__pagination"><ul>{items}'
+        f'<li class="pagination-next"><button aria-label="next page" data-next{disabled}></button></li></ul></div>'
+    )
+
+
+def _okx_row(advertiser, price, amount, methods):
+    methods_html = "".join(f'<div class="payment-item"><span class="pay-method">{m}</span></div>' for m in methods)
+    return (
+        '<tr class="custom-table-row">'
+        f'<td><div class="merchant-name"><a href="#">{advertiser}</a></div></td>'
+        f'<td><div class="price">{price:,.2f} USD</div></td>'
+        f'<td><div class="quantity-and-limit"><div class="show-item">{amount:,.2f} USDT</div>'
+        '<div class="show-item">10 - 500 USD</div></div></td>'
+        f"<td>{methods_html}</td>"
+        "</tr>"
+    )
+
+
+def _okx_pagination(page, pages):
+    items = "".join(f'<li class="okui-pagination-item" data-page="{n}"{_current(n, page)}>{n}</li>'
+                    for n in range(1, pages + 1))
+    disabled = " okui-pagination-disabled" if page >= pages else ""
+    return f'<ul class="okui-pagination">{items}<li class="okui-pagination-next{disabled}" data-next></li></ul>'
+
+
+# Header row the scrapers skip (Bybit and OKX drop rows[0])
+_HEADERS = {
+    "binance": "<tr><th>Advertiser</th><th>Price</th><th>Available</th><th>Payment</th></tr>",
+    "bybit": "<tr><th>Advertiser</th><th>Price</th><th>Available</th><th>Payment</th></tr>",
+    "okx": '<tr class="custom-table-row"><th>Advertiser</th><th>Price</th><th>Available</th><th>Payment</th></tr>',
+}
+
+_RENDERERS = {
+    "binance": (_binance_row, _binance_pagination),
+    "bybit": (_bybit_row, _bybit_pagination),
+    "okx": (_okx_row, _okx_pagination),
+}
+
+
+def render_page(exchange, rows, page=1, pages=1):
+    """Render one P2P table page for an exchange as a standalone HTML document."""
+    render_row, render_pagination = _RENDERERS[exchange]
+    body = "".join(render_row(*row) for row in rows)
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'></head><body>"
+        f"<table>{_HEADERS[exchange]}{body}</table>"
+        f"{render_pagination(page, pages)}"
+        "</body></html>"
+    )
+
+
+# Swaps in another page's table and pagination after renderDelay ms, the way the
+# live sites do after their XHR; a disabled next button does nothing
+_APP_JS = """
+let current = 1;
+const show = page => setTimeout(() => {
+    document.getElementById('p2p-table').innerHTML = HEADER + PAGES[page - 1].rows;
+    document.getElementById('p2p-pagination').innerHTML = PAGES[page - 1].pagination;
+    current = page;
+}, RENDER_DELAY);
+document.addEventListener('click', event => {
+    const item = event.target.closest('[data-page]');
+    if (item) return show(parseInt(item.dataset.page, 10));
+    const next = event.target.closest('[data-next]');
+    if (!next || next.disabled || next.getAttribute('aria-disabled') === 'true'
+            || /disabled/.test(next.className) || current >= PAGES.length) return;
+    show(current + 1);
+});
+"""
+
+
+def render_app(exchange, rows, rows_per_page=10, render_delay_ms=50):
+    """Render a paginated P2P table as one document whose pagination works without a server."""
+    render_row, render_pagination = _RENDERERS[exchange]
+    chunks = [rows[start:start + rows_per_page] for start in range(0, len(rows), rows_per_page)] or [[]]
+    pages = [
+        {"rows": "".join(render_row(*row) for row in chunk), "pagination": render_pagination(page, len(chunks))}
+        for page, chunk in enumerate(chunks, start=1)
+    ]
+    # Keep "</" out of the inline script so the embedded markup cannot close it
+    data = json.dumps(pages).replace("</", "<\\/")
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'></head><body>"
+        f"<table id='p2p-table'>{_HEADERS[exchange]}{pages[0]['rows']}</table>"
+        f"<div id='p2p-pagination'>{pages[0]['pagination']}</div>"
+        f"<script>const HEADER = {json.dumps(_HEADERS[exchange])}; const PAGES = {data}; "
+        f"const RENDER_DELAY = {int(render_delay_ms)};{_APP_JS}</script>"
+        "</body></html>"
+    )
+
+
+def write_fixtures(directory, rows_per_page=20, seed=0):
+    """Write one fixture page per exchange and return {exchange: (path, rows)}."""
+    os.makedirs(directory, exist_ok=True)
+    fixtures = {}
+    for exchange in _RENDERERS:
+        rows = generate_rows(rows_per_page, seed)
+        path = os.path.join(directory, f"{exchange}.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(render_page(exchange, rows))
+        fixtures[exchange] = (path, rows)
+    return fixtures
@@ -0,0 +1,100 @@
+"""Local HTTP server with a paginated P2P page per (exchange, fiat).
+
+/<exchange>/<fiat> serves fixture_pages.render_app() for that market, so a
+scraper whose p2p_url is FixtureSite.p2p_url(exchange) loads, paginates and
+extracts exactly as on the live site, with every run seeing the same ads.
+"""
+import threading
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from fixture_pages import generate_rows, render_app
+
+# Most fiats have a page or two of ads; the big markets run to tens of pages
+BUSY_FIATS = {"USD", "EUR", "NGN", "ARS", "TRY", "RUB", "UAH", "BRL", "VES", "INR", "KES", "PKR"}
+
+
+def sweep_ad_counts(fiat_lists, quiet=(0, 25), busy=(80, 200)):
+    """Deterministic {(exchange, fiat): ad count} for every exchange's fiat list."""
+    counts = {}
+    for exchange, fiats in fiat_lists.items():
+        for fiat in fiats:
+            low, high = busy if fiat in BUSY_FIATS else quiet
+            counts[(exchange, fiat)] = low + zlib.crc32(f"{exchange}/{fiat}".encode()) % (high - low + 1)
+    return counts
+
+
+class FixtureSite:
+    """Serve the fixture P2P pages on 127.0.0.1 from a background thread."""
+
+    def __init__(self, ad_counts, rows_per_page=10, render_delay_ms=50, latency=0.0):
+        self.ad_counts = ad_counts
+        self.rows_per_page = rows_per_page
+        self.render_delay_ms = render_delay_ms
+        self.latency = latency
+        self.requests = 0
+        self._documents = {}
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                if server.latency:
+                    threading.Event().wait(server.latency)
+                path = urlparse(self.path).path
+                if path == "/robots.txt":
+                    body, content_type = b"User-agent: *\n", "text/plain"
+                else:
+                    body = server.document(*path.strip("/").split("/", 1))
+                    if body is None:
+                        self.send_response(404)
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    content_type = "text/html; charset=utf-8"
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def p2p_url(self, exchange):
+        """An adapter p2p_url (formatted with {currency}) for exchange's pages on this site."""
+        return f"{self.url}/{exchange}/{{currency}}"
+
+    def rows(self, exchange, fiat):
+        """The (advertiser, price, amount, payment_methods) rows served for a market."""
+        return generate_rows(self.ad_counts[(exchange, fiat)], seed=zlib.crc32(f"{exchange}/{fiat}".encode()))
+
+    def document(self, exchange, fiat=""):
+        """The rendered page for a market, or None for an unknown one."""
+        key = (exchange, fiat)
+        if key not in self.ad_counts:
+            return None
+        with self._lock:
+            document = self._documents.get(key)
+        if document is None:
+            document = render_app(exchange, self.rows(exchange, fiat), self.rows_per_page,
+                                  self.render_delay_ms).encode()
+            with self._lock:
+                self._documents[key] = document
+        return document
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        return False
@@ -0,0 +1,151 @@
+"""Local HTTP server that replays recorded P2P API responses.
+
+Responses are keyed by (exchange, fiat, page). Point BinanceAPI, BybitAPI or
+OKXAPI (or async_engine.snapshot's base_urls) at ReplayServer.url to run the
+API backends with no network access.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from fixture_pages import generate_rows
+
+
+def binance_payload(rows, total):
+    return {
+        "code": "000000",
+        "total": total,
+        "data": [
+            {
+                "adv": {
+                    "price": f"{price:.2f}",
+                    "surplusAmount": f"{amount:.2f}",
+                    "tradeMethods": [{"tradeMethodName": method} for method in methods],
+                },
+                "advertiser": {"nickName": advertiser},
+            }
+            for advertiser, price, amount, methods in rows
+        ],
+    }
+
+
+def bybit_payload(rows, total):
+    return {
+        "ret_code": 0,
+        "result": {
+            "count": total,
+            "items": [
+                {"nickName": advertiser, "price": f"{price:.2f}", "lastQuantity": f"{amount:.2f}", "payments": methods}
+                for advertiser, price, amount, methods in rows
+            ],
+        },
+    }
+
+
+def okx_payload(rows, total):
+    return {
+        "code": 0,
+        "data": {
+            "sell": [
+                {"nickName": advertiser, "price": f"{price:.2f}", "availableAmount": f"{amount:.2f}",
+                 "paymentMethods": methods}
+                for advertiser, price, amount, methods in rows
+            ],
+        },
+    }
+
+
+PAYLOAD_BUILDERS = {"binance": binance_payload, "bybit": bybit_payload, "okx": okx_payload}
+
+PAGE_SIZES = {"binance": 20, "bybit": 10, "okx": None}
+
+
+def build_recording(fiats, ads_per_fiat=50):
+    """Build a {(exchange, fiat, page): payload} recording from generated fixture rows."""
+    recording = {}
+    for exchange, build in PAYLOAD_BUILDERS.items():
+        page_size = PAGE_SIZES[exchange]
+        for seed, fiat in enumerate(fiats):
+            rows = generate_rows(ads_per_fiat, seed)
+            if not page_size:
+                recording[(exchange, fiat, 1)] = build(rows, len(rows))
+                continue
+            for page, start in enumerate(range(0, len(rows), page_size), start=1):
+                recording[(exchange, fiat, page)] = build(rows[start:start + page_size], len(rows))
+    return recording
+
+
+def _request_key(path, query, body):
+    """Map an incoming API request to its (exchange, fiat, page) recording key."""
+    if path.endswith("/c2c/adv/search"):
+        return "binance", body["fiat"], int(body["page"])
+    if path.endswith("/fiat/otc/item/online"):
+        return "bybit", body["currencyId"], int(body["page"])
+    if path.endswith("/c2c/tradingOrders/books"):
+        return "okx", query["quoteCurrency"][0].upper(), 1
+    return None
+
+
+class ReplayServer:
+    """Serve a recording on 127.0.0.1 from a background thread."""
+
+    def __init__(self, recording, latency=0.0, throttle_every=0):
+        self.recording = recording
+        self.latency = latency
+        # Answer every Nth request with 429 to exercise client backoff
+        self.throttle_every = throttle_every
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _handle(self, body):
+                server.requests += 1
+                if server.throttle_every and server.requests % server.throttle_every == 0:
+                    self.send_response(429)
+                    self.send_header("Retry-After", "0.2")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                if server.latency:
+                    threading.Event().wait(server.latency)
+                url = urlparse(self.path)
+                if url.path.endswith("/queryAllPaymentList"):
+                    return self._reply(200, {"result": {"paymentConfigVo": []}})
+                key = _request_key(url.path, parse_qs(url.query), body)
+                if key is None:
+                    return self._reply(404, {"error": "unknown endpoint"})
+                # Pages past the end come back empty, like the live endpoints
+                payload = server.recording.get(key) or PAYLOAD_BUILDERS[key[0]]([], 0)
+                self._reply(200, payload)
+
+            def do_GET(self):
+                self._handle({})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                self._handle(json.loads(self.rfile.read(length) or b"{}"))
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        return False
@@ -0,0 +1,163 @@
+import math
+
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from ad_batch import AdBatch
+from fiat_currencies import FIAT_CURRENCIES
+from html_rows import RowParser, has_class
+from number_parsing import parse_number, parse_numbers
+from p2p_api import BinanceAPI
+from p2p_engine import ExchangeAdapter
+from page_waits import run_once_per_session
+
+# Runs in the page and returns one object per ad row (same selectors as scrape_page_elements)
+EXTRACT_ROWS_JS = """
+const rows = [];
+for (const row of document.querySelectorAll('tr')) {
+    const name = row.querySelector("a[href^='/advertiserDetail']");
+    const price = row.querySelector('td:nth-child(2) .headline5');
+    const amount = row.querySelector('td:nth-child(3) .body3');
+    if (!name || !price || !amount) continue;
+    rows.push({
+        advertiser: name.innerText.trim(),
+        price: price.innerText.trim(),
+        amount: amount.innerText.trim(),
+        payment_methods: Array.from(
+            row.querySelectorAll('td:nth-child(4) .PaymentMethodItem__text'),
+            pm => pm.innerText.trim()
+        ),
+    });
+}
+return rows;
+"""
+
+# The same rows parsed from the table's HTML, with XPath for the selectors above
+ROW_PARSER = RowParser(
+    ".//tr",
+    {
+        "advertiser": ".//a[starts-with(@href, '/advertiserDetail')]",
+        "price": f".//td[count(preceding-sibling::*) = 1]//*[{has_class('headline5')}]",
+        "amount": f".//td[count(preceding-sibling::*) = 2]//*[{has_class('body3')}]",
+    },
+    {"payment_methods": f".//td[count(preceding-sibling::*) = 3]//*[{has_class('PaymentMethodItem__text')}]"},
+    required=("advertiser", "price", "amount"),
+)
+
+
+def close_overlays(driver):
+    """Close any overlays or pop-ups that may obstruct the pagination elements."""
+    try:
+        WebDriverWait(driver, 2).until(
+            EC.element_to_be_clickable((By.XPATH, "//div[@id='onetrust-close-btn-container']"))
+        ).click()
+    except (TimeoutException, NoSuchElementException):
+        # print("No overlay found or unable to close overlay.")
+        None
+
+
+class BinanceAdapter(ExchangeAdapter):
+    name = 'binance'
+    p2p_url = 'https://p2p.binance.com/en/trade/all-payments/USDT?fiat={currency}'
+    fiat_currencies = FIAT_CURRENCIES['binance']
+    api_class = BinanceAPI
+
+    advertiser_selector = "a[href^='/advertiserDetail']"
+    page_item_selector = '.bn-pagination-item'
+    next_button_xpath = "//div[@class='bn-pagination-next' and not(@aria-disabled='true')]"
+    extract_rows_js = EXTRACT_ROWS_JS
+    row_parser = ROW_PARSER
+    # close_overlays' 2s timeout used to run on every page
+    legacy_wait_per_page = 2
+    consent_cookies = {
+        'https://p2p.binance.com': [{'name': 'OptanonAlertBoxClosed', 'value': None, 'domain': '.binance.com'}],
+    }
+
+    main_sheet_rows = 93
+
+    def ads_from_rows(self, rows):
+        """Convert the rows returned by EXTRACT_ROWS_JS (or ROW_PARSER) to an AdBatch."""
+        ads = AdBatch()
+
+        if not rows:
+            print("No rows found on the page.")
+            return ads
+
+        fiat = self.current_fiat()
+        prices = parse_numbers([row['price'] for row in rows], fiat, self.name)
+        amounts = parse_numbers([row['amount'] for row in rows], fiat, self.name)
+        for row, price, available_amount in zip(rows, prices, amounts):
+            try:
+                if math.isnan(price) or math.isnan(available_amount):
+                    raise ValueError(f"unreadable price {row['price']!r} or amount {row['amount']!r}")
+
+                ads.append(row['advertiser'], float(price), float(available_amount), row['payment_methods'])
+
+            except Exception as e:
+                print(f"Error occurred while processing a row: {e}")
+
+        return ads
+
+    def scrape_page_elements(self, driver):
+        """Scrape data from the current page with one WebDriver query per cell."""
+        ads = AdBatch()
+
+        rows = driver.find_elements(By.CSS_SELECTOR, 'tr')
+
+        if not rows:
+            print("No rows found on the page.")
+
+        for row in rows:
+            try:
+                # Use XPath to extract the advertiser name
+                name_elem = row.find_element(By.CSS_SELECTOR, "a[href^='/advertiserDetail']")
+                advertiser_name = name_elem.text
+
+                # Extract price (convert to float)
+                price_elem = row.find_element(By.CSS_SELECTOR, 'td:nth-child(2) .headline5')
+                price = parse_number(price_elem.text, self.current_fiat(), self.name)
+
+                # Extract available amount (clean up "USDT" text and convert to float)
+                amount_elem = row.find_element(By.CSS_SELECTOR, 'td:nth-child(3) .body3')
+                available_amount = parse_number(amount_elem.text, self.current_fiat(), self.name)
+
+                # Extract payment methods
+                payment_methods_elems = row.find_elements(By.CSS_SELECTOR, 'td:nth-child(4) .PaymentMethodItem__text')
+                payment_methods_list = [pm.text for pm in payment_methods_elems]
+
+                # Append data to the batch
+                ads.append(advertiser_name, price, available_amount, payment_methods_list)
+
+            except NoSuchElementException:
+                None
+            except Exception as e:
+                print(f"Error occurred while processing a row: {e}")
+
+        return ads
+
+    def prepare_page(self, driver):
+        # The cookie banner only shows up once per browser session
+        run_once_per_session(driver, 'overlays', close_overlays)
+
+    def page_numbers(self, driver):
+        """Retrieve the available page numbers from the pagination."""
+        try:
+            # Wait for the pagination items to be present
+            page_elements = WebDriverWait(driver, 5).until(
+                EC.presence_of_all_elements_located((By.XPATH, "//a[@class='bn-pagination-item' and not(contains(text(), '...'))]"))
+            )
+            # Extract the page numbers and convert them to integers
+            return [int(elem.text) for elem in page_elements if elem.text.isdigit()]
+        except TimeoutException:
+            print("Timeout while waiting for pagination elements.")
+            return []
+
+    def find_next_button(self, driver):
+        next_buttons = driver.find_elements(By.XPATH, self.next_button_xpath)
+        return next_buttons[0] if next_buttons else None
+
+    def click_next(self, driver, next_button):
+        print("Clicking next page...")
+        driver.execute_script("arguments[0].click();", next_button)
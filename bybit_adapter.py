@@ -0,0 +1,272 @@
+import numpy as np
+from selenium.common.exceptions import ElementClickInterceptedException, NoSuchElementException, TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from ad_batch import AdBatch
+from fiat_currencies import FIAT_CURRENCIES
+from html_rows import RowParser, has_class
+from number_parsing import parse_numbers
+from p2p_api import BybitAPI
+from p2p_engine import ExchangeAdapter
+from page_waits import run_once_per_session
+from sheets_writer import dataframe_to_values
+
+# Runs in the page and returns the raw text of each cell (same selectors as scrape_page_elements)
+EXTRACT_ROWS_JS = r"""
+const rows = [];
+const tableRows = Array.from(document.querySelectorAll('tr')).slice(1);
+for (const row of tableRows) {
+    const text = el => el ? el.innerText.trim() : null;
+    const name = row.querySelector('.advertiser-name');
+    const priceAmount = row.querySelector('.price-amount');
+    const priceTitle = row.querySelector('.text-\\[var\\(--bds-gray-t1-title\\)\\]');
+    rows.push({
+        advertiser: text(name),
+        price: text(priceAmount),
+        price_title: text(priceTitle),
+        price_candidates: Array.from(
+            row.querySelectorAll("span[class*='moly-text'], span[class*='price-amount']"),
+            span => span.innerText.trim()
+        ),
+        amount: text(row.querySelector("div[class*='ql-value']")),
+        payment_methods: Array.from(row.querySelectorAll('.trade-list-tag'), pm => pm.innerText),
+    });
+}
+return rows;
+"""
+
+# The same rows parsed from the table's HTML, with XPath for the selectors above
+ROW_PARSER = RowParser(
+    ".//tr",
+    {
+        "advertiser": f".//*[{has_class('advertiser-name')}]",
+        "price": f".//*[{has_class('price-amount')}]",
+        "price_title": f".//*[{has_class('text-[var(--bds-gray-t1-title)]')}]",
+        "amount": ".//div[contains(@class, 'ql-value')]",
+    },
+    {
+        "price_candidates": ".//span[contains(@class, 'moly-text') or contains(@class, 'price-amount')]",
+        "payment_methods": f".//*[{has_class('trade-list-tag')}]",
+    },
+    skip_header=True,
+)
+
+
+def handle_warning_popup(driver):
+    """Handle potential warning pop-up and click 'Confirm'."""
+    try:
+        confirm_button = WebDriverWait(driver, 2).until(
+            EC.element_to_be_clickable((By.XPATH, "//button[contains(@class, 'ant-btn-primary')]//span[text()='Confirm']"))
+        )
+        confirm_button.click()
+        print("Warning pop-up handled successfully.")
+    except (NoSuchElementException, TimeoutException):
+        pass
+    except Exception as e:
+        print(f"An error occurred while handling the pop-up: {e}")
+
+def close_warning_ad(driver):
+    """Close the warning advertisement if present."""
+    try:
+        close_button = WebDriverWait(driver, 2).until(
+            EC.element_to_be_clickable((By.CSS_SELECTOR, ".otc-ad-close"))
+        )
+        close_button.click()
+        print("Warning advertisement closed successfully.")
+    except (NoSuchElementException, TimeoutException):
+        pass
+    except Exception as e:
+        print(f"An error occurred while closing the advertisement: {e}")
+
+def parse_price_column(price_texts, title_texts, candidate_texts, fiat=None, exchange=None):
+    """Parse a page of prices: the price-amount text, else the title text, else the first
+    positive number among the row's price-like spans (0.0 if there is none)."""
+    prices = np.nan_to_num(parse_numbers([price or title for price, title in zip(price_texts, title_texts)], fiat,
+                                         exchange))
+    for index in np.flatnonzero(prices == 0.0):
+        candidates = parse_numbers(candidate_texts[index], fiat, exchange)
+        positive = candidates[candidates > 0]
+        if len(positive):
+            prices[index] = positive[0]
+    return prices
+
+def parse_amount_column(amount_texts, fiat=None, exchange=None):
+    """Parse a page of available amounts from the first ql-value texts (0.0 where unreadable)."""
+    return np.nan_to_num(parse_numbers(amount_texts, fiat, exchange))
+
+def parse_price_text(price_text, title_text=None, candidate_texts=(), fiat=None, exchange=None):
+    """Parse a price from the price-amount text, the title text or any price-like span."""
+    return float(parse_price_column([price_text], [title_text], [list(candidate_texts)], fiat, exchange)[0])
+
+def parse_amount_text(amount_text, fiat=None, exchange=None):
+    """Parse the available amount from the first ql-value text."""
+    return float(parse_amount_column([amount_text], fiat, exchange)[0])
+
+def append_row(ads, row_index, advertiser_name, price, available_amount, payment_methods_list):
+    """Append a parsed row to the batch if it carries any data."""
+    payment_methods_str = ', '.join(payment_methods_list) if payment_methods_list else 'N/A'
+
+    # Only append valid data
+    if advertiser_name != 'N/A' or price > 0 or available_amount > 0 or payment_methods_list:
+        ads.append(advertiser_name, price, available_amount, payment_methods_list)
+
+        print(f"Row {row_index} - Advertiser: {advertiser_name}, "
+              f"Price: {price}, "
+              f"Available Amount: {available_amount} USDT, "
+              f"Payment Methods: {payment_methods_str}")
+    else:
+        print(f"Row {row_index} - No valid data found")
+
+def update_worksheet_with_data(worksheet, df):
+    """Update worksheet with proper formatting for numbers and strings."""
+    try:
+        # Clear existing content
+        worksheet.clear()
+
+        # Prepare headers
+        headers = df.columns.tolist()
+        worksheet.update('A1:D1', [headers])
+
+        # Convert DataFrame to nested list format
+        data_rows = dataframe_to_values(df, header=False)
+
+        # Update data if there are rows
+        if data_rows:
+            # Use batch_update with valueInputOption=RAW to prevent string conversion
+            worksheet.spreadsheet.values_update(
+                f'{worksheet.title}!A2:D{len(data_rows)+1}',
+                params={'valueInputOption': 'RAW'},
+                body={'values': data_rows}
+            )
+
+            # Set number formatting for price and amount columns
+            worksheet.format(f'B2:C{len(data_rows)+1}', {
+                "numberFormat": {
+                    "type": "NUMBER",
+                    "pattern": "#,##0.00"
+                }
+            })
+
+        print("Worksheet updated successfully with proper formatting")
+    except Exception as e:
+        print(f"Error updating worksheet: {e}")
+
+
+class BybitAdapter(ExchangeAdapter):
+    name = 'bybit'
+    p2p_url = 'https://www.bybit.com/fiat/trade/otc?actionType=1&token=USDT&fiat={currency}&paymentMethod='
+    fiat_currencies = FIAT_CURRENCIES['bybit']
+    api_class = BybitAPI
+
+    advertiser_selector = '.advertiser-name'
+    page_item_selector = '.trade-table__pagination li.pagination-item'
+    next_button_selector = "li.pagination-next button[aria-label='next page']"
+    extract_rows_js = EXTRACT_ROWS_JS
+    row_parser = ROW_PARSER
+    # The two 2s pop-up timeouts used to run on every page
+    legacy_wait_per_page = 4
+
+    main_sheet_rows = 60
+    # Ads without payment methods show N/A, and Price/Available Amount get a number format
+    empty_payment_methods = 'N/A'
+    number_columns = (2, 3)
+
+    def ads_from_rows(self, rows):
+        """Convert the rows returned by EXTRACT_ROWS_JS (or ROW_PARSER) to an AdBatch."""
+        ads = AdBatch()
+
+        if not rows:
+            print("No rows found on the page.")
+            return ads
+
+        fiat = self.current_fiat()
+        prices = parse_price_column([row['price'] for row in rows], [row['price_title'] for row in rows],
+                                    [row['price_candidates'] for row in rows], fiat, self.name)
+        amounts = parse_amount_column([row['amount'] for row in rows], fiat, self.name)
+        for row_index, (row, price, available_amount) in enumerate(zip(rows, prices, amounts), start=1):
+            try:
+                append_row(ads, row_index, row['advertiser'] or 'N/A', float(price), float(available_amount),
+                           row['payment_methods'])
+
+            except Exception as e:
+                print(f"Error occurred while processing row {row_index}: {str(e)}")
+                continue
+
+        return ads
+
+    def scrape_page_elements(self, driver):
+        """Scrape data from the current page on Bybit with one WebDriver query per cell."""
+        ads = AdBatch()
+
+        rows = driver.find_elements(By.CSS_SELECTOR, 'tr')
+
+        if not rows:
+            print("No rows found on the page.")
+            return ads
+
+        for row_index, row in enumerate(rows[1:], start=1):
+            try:
+                # Extract advertiser name
+                advertiser_name_elem = row.find_elements(By.CLASS_NAME, "advertiser-name")
+                advertiser_name = advertiser_name_elem[0].text if advertiser_name_elem else 'N/A'
+
+                # Enhanced price extraction to handle both formats
+                try:
+                    price_text = None
+                    title_text = None
+                    price_amount_elem = row.find_elements(By.CLASS_NAME, "price-amount")
+                    if price_amount_elem:
+                        price_text = price_amount_elem[0].text
+                    else:
+                        price_elem = row.find_element(By.CSS_SELECTOR, ".text-\\[var\\(--bds-gray-t1-title\\)\\]")
+                        title_text = price_elem.text.strip()
+
+                    price = parse_price_text(price_text, title_text, fiat=self.current_fiat(), exchange=self.name)
+                    if price == 0.0:
+                        # Look for any element containing a price pattern
+                        all_text_elements = row.find_elements(By.XPATH, ".//span[contains(@class, 'moly-text') or contains(@class, 'price-amount')]")
+                        price = parse_price_text(None, None, (elem.text.strip() for elem in all_text_elements),
+                                                 self.current_fiat(), self.name)
+
+                except Exception as price_error:
+                    print(f"Debug - Price extraction error: {price_error}")
+                    price = 0.0
+
+                # Extract available amount
+                try:
+                    available_amount_elem = row.find_element(By.XPATH, ".//div[contains(@class, 'ql-value')][1]")
+                    available_amount = parse_amount_text(available_amount_elem.text, self.current_fiat(), self.name)
+                except:
+                    available_amount = 0.0
+
+                # Extract payment methods
+                payment_methods_elems = row.find_elements(By.CSS_SELECTOR, '.trade-list-tag')
+                payment_methods_list = [pm.text for pm in payment_methods_elems]
+
+                append_row(ads, row_index, advertiser_name, price, available_amount, payment_methods_list)
+
+            except Exception as e:
+                print(f"Error occurred while processing row {row_index}: {str(e)}")
+                continue
+
+        return ads
+
+    def prepare_page(self, driver):
+        # The warning dialogs only show up once per browser session
+        run_once_per_session(driver, 'warning_popup', handle_warning_popup)
+        run_once_per_session(driver, 'warning_ad', close_warning_ad)
+
+    def click_next(self, driver, next_button):
+        try:
+            next_button.click()
+        except ElementClickInterceptedException:
+            # A pop-up opened mid-session: dismiss it and click through the script instead
+            print("Next button is obscured. Closing pop-ups and retrying...")
+            close_warning_ad(driver)
+            handle_warning_popup(driver)
+            driver.execute_script("arguments[0].scrollIntoView(true); arguments[0].click();", next_button)
+
+    def write_worksheet(self, worksheet, df):
+        update_worksheet_with_data(worksheet, df)
@@ -0,0 +1,119 @@
+"""Stop scraping a currency once its pages reach deep enough into the order book.
+
+Only the top of each book is used, but pagination reads every listed ad
+unless told otherwise. A DepthLimit sets when a scrape may stop:
+
+- max_pages: after that many pages,
+- max_amount: once the ads read offer that much USDT in total,
+- max_price_distance: once a page has an ad priced more than that many
+  percent away from the best (first) ad.
+
+Every scrape gets its own DepthTracker (DepthLimit.tracker()), fed each page
+as it is scraped. Pages loaded in parallel tabs arrive out of order, so the
+conditions are checked on the pages in page order; the page a condition is
+met on is still kept. The tracker's reason records why the scrape stopped,
+including STOP_ALL_PAGES when no condition was met.
+"""
+STOP_MAX_PAGES = "max_pages"
+STOP_MAX_AMOUNT = "max_amount"
+STOP_PRICE_DISTANCE = "price_distance"
+# No condition was met: the scrape ran out of pages
+STOP_ALL_PAGES = "all_pages"
+
+
+class DepthLimit:
+    """The stop conditions of one exchange's scrapes; without any, every page is read."""
+
+    def __init__(self, max_pages=None, max_amount=None, max_price_distance=None):
+        self.max_pages = max_pages
+        self.max_amount = max_amount
+        # Percent from the best ad's price
+        self.max_price_distance = max_price_distance
+
+    def __bool__(self):
+        return any(value is not None for value in (self.max_pages, self.max_amount, self.max_price_distance))
+
+    def __repr__(self):
+        return (f"DepthLimit(max_pages={self.max_pages}, max_amount={self.max_amount}, "
+                f"max_price_distance={self.max_price_distance})")
+
+    def tracker(self):
+        """A DepthTracker for one scrape."""
+        return DepthTracker(self)
+
+    def page_limit(self, max_pages):
+        """The last page worth loading when the pagination shows max_pages (None if unknown)."""
+        if self.max_pages is None:
+            return max_pages
+        return self.max_pages if max_pages is None else min(max_pages, self.max_pages)
+
+
+class DepthTracker:
+    """How deep one currency's scrape has gone, and whether it should stop.
+
+    add() takes pages in any order and checks them in page order; reason
+    and stop_page are set on the page a condition is met. Only each page's
+    totals wait for the pages before it, never its ads.
+    """
+
+    def __init__(self, limit=None):
+        self.limit = limit or DepthLimit()
+        self.pages = 0
+        self.amount = 0.0
+        self.best_price = None
+        self.reason = None
+        self.stop_page = None
+        self._pending = {}
+
+    @property
+    def stopped(self):
+        """Whether a stop condition has been met."""
+        return self.stop_page is not None
+
+    def wanted(self, page):
+        """Whether page is still worth loading."""
+        if self.stop_page is not None:
+            return page <= self.stop_page
+        return self.limit.max_pages is None or page <= self.limit.max_pages
+
+    def add(self, page, ads):
+        """Take one scraped page; return True once the scrape can stop."""
+        if self.stop_page is not None or page <= self.pages:
+            return self.stopped
+        prices = ads.price_array()
+        self._pending[page] = (float(ads.amount_array().sum()), prices[0] if len(prices) else None,
+                               (prices.min(), prices.max()) if len(prices) else None)
+        while self.stop_page is None and self.pages + 1 in self._pending:
+            self._check(self.pages + 1, *self._pending.pop(self.pages + 1))
+        return self.stopped
+
+    def _check(self, page, amount, first_price, price_range):
+        self.pages = page
+        self.amount += amount
+        if self.best_price is None and first_price is not None:
+            self.best_price = float(first_price)
+        limit = self.limit
+        if limit.max_amount is not None and self.amount >= limit.max_amount:
+            self._stop(page, STOP_MAX_AMOUNT)
+        elif (limit.max_price_distance is not None and price_range is not None and self.best_price
+              and max(abs(price - self.best_price) for price in price_range) / abs(self.best_price) * 100
+              > limit.max_price_distance):
+            self._stop(page, STOP_PRICE_DISTANCE)
+        elif limit.max_pages is not None and page >= limit.max_pages:
+            self._stop(page, STOP_MAX_PAGES)
+
+    def _stop(self, page, reason):
+        self.stop_page = page
+        self.reason = reason
+        self._pending.clear()
+
+    def finish(self):
+        """The scrape is over; record STOP_ALL_PAGES if nothing stopped it earlier."""
+        if self.reason is None:
+            self.reason = STOP_ALL_PAGES
+        return self.reason
+
+    def describe(self):
+        """One line on how deep the scrape went and why it stopped."""
+        text = f"{self.pages} page{'' if self.pages == 1 else 's'}, {self.amount:,.2f} USDT"
+        return text if self.reason in (None, STOP_ALL_PAGES) else f"{text}, stopped on {self.reason}"
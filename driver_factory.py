@@ -0,0 +1,200 @@
+import statistics
+import threading
+import weakref
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+from selenium import webdriver
+from selenium.webdriver.firefox.options import Options
+from selenium.webdriver.firefox.service import Service
+
+try:
+    import psutil
+except ImportError:  # RSS is only reported when psutil is installed
+    psutil = None
+
+# Analytics, tag managers and the OneTrust consent scripts; none of them are needed to read the ads
+BLOCKED_HOSTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "connect.facebook.net",
+    "hotjar.com",
+    "clarity.ms",
+    "sentry.io",
+    "bugsnag.com",
+    "amplitude.com",
+    "mixpanel.com",
+    "segment.io",
+    "onesignal.com",
+    "cdn.cookielaw.org",
+    "geolocation.onetrust.com",
+)
+
+# Preferences that stop Firefox from downloading what the scrapers never look at
+RESOURCE_PREFS = {
+    "permissions.default.image": 2,
+    "gfx.downloadable_fonts.enabled": False,
+    "browser.display.use_document_fonts": 0,
+    "media.autoplay.default": 5,
+    "privacy.trackingprotection.enabled": True,
+    "browser.safebrowsing.malware.enabled": False,
+    "browser.safebrowsing.phishing.enabled": False,
+}
+
+# Duration of the current document's load, from the Navigation Timing API
+LOAD_TIME_JS = """
+const entry = performance.getEntriesByType('navigation')[0];
+return entry ? entry.duration : null;
+"""
+
+
+def configure_background_tabs(options):
+    """Stop Firefox from throttling timers in background tabs, which TabPaginator's tabs rely on."""
+    options.set_preference("dom.min_background_timeout_value", 4)
+    options.set_preference("dom.timeout.enable_budget_throttling", False)
+
+
+def blocklist_pac(hosts):
+    """Proxy auto-config that sends requests for hosts (and their subdomains) to a dead local port."""
+    conditions = " || ".join(f'host == "{host}" || dnsDomainIs(host, ".{host}")' for host in hosts)
+    return ("function FindProxyForURL(url, host) {"
+            f" if ({conditions}) return 'PROXY 127.0.0.1:9';"
+            " return 'DIRECT'; }")
+
+
+def _firefox_rss(driver):
+    """Resident memory of the driver's Firefox and its content processes, in bytes."""
+    pid = driver.capabilities.get("moz:processID")
+    if psutil is None or not pid:
+        return None
+    try:
+        browser = psutil.Process(pid)
+        processes = [browser] + browser.children(recursive=True)
+        return sum(process.memory_info().rss for process in processes)
+    except psutil.Error:
+        return None
+
+
+class DriverStats:
+    """Page-load times and Firefox memory samples across every driver of a factory."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.drivers = 0
+        self.recycles = 0
+        self.load_ms = []
+        self.rss = []
+
+    def report(self):
+        """Print driver starts, recycles, page-load times and Firefox RSS."""
+        with self.lock:
+            line = f"Drivers: {self.drivers} started, {self.recycles} recycled on page count"
+            if self.load_ms:
+                loads = sorted(self.load_ms)
+                p95 = loads[min(len(loads) - 1, int(len(loads) * 0.95))]
+                line += f", page load {statistics.mean(loads):.0f}ms mean / {p95:.0f}ms p95 over {len(loads)} loads"
+            if self.rss:
+                line += (f", Firefox RSS {statistics.mean(self.rss) / 2**20:.0f} MiB mean / "
+                         f"{max(self.rss) / 2**20:.0f} MiB peak")
+            print(line + ".")
+
+
+class DriverFactory:
+    """Start tuned Firefox sessions and decide when they should be recycled.
+
+    Every driver is headless and, with block_resources, skips images, web
+    fonts and the hosts in BLOCKED_HOSTS. consent_cookies maps an origin such
+    as 'https://p2p.binance.com' to cookie dicts (as for add_cookie) that are
+    set once when the driver starts, so cookie banners never show; a cookie
+    whose value is None gets the current UTC time, which is what consent
+    cookies usually store. profile_dir points Firefox at a pre-seeded profile
+    instead of a fresh one.
+
+    Scrapers call count_page() for every results page they read and
+    record_load() after each driver.get(); should_recycle() is meant for
+    WorkerPool's recycle_when and turns true after recycle_after_pages pages.
+    """
+
+    def __init__(self, geckodriver_path=None, block_resources=True, blocked_hosts=BLOCKED_HOSTS,
+                 consent_cookies=None, profile_dir=None, recycle_after_pages=200):
+        self.geckodriver_path = geckodriver_path
+        self.block_resources = block_resources
+        self.blocked_hosts = blocked_hosts
+        self.consent_cookies = consent_cookies or {}
+        self.profile_dir = profile_dir
+        self.recycle_after_pages = recycle_after_pages
+        self.stats = DriverStats()
+        self._pages = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def options(self):
+        """Firefox options for a new session."""
+        options = Options()
+        options.add_argument("-headless")
+        if self.profile_dir:
+            options.profile = self.profile_dir
+        configure_background_tabs(options)
+        if self.block_resources:
+            for name, value in RESOURCE_PREFS.items():
+                options.set_preference(name, value)
+            if self.blocked_hosts:
+                options.set_preference("network.proxy.type", 2)
+                options.set_preference("network.proxy.autoconfig_url",
+                                       "data:text/plain," + quote(blocklist_pac(self.blocked_hosts)))
+        return options
+
+    def create(self):
+        """Start a driver and seed its consent cookies."""
+        service = Service(self.geckodriver_path) if self.geckodriver_path else Service()
+        driver = webdriver.Firefox(service=service, options=self.options())
+        try:
+            self._seed_cookies(driver)
+        except Exception:
+            driver.quit()
+            raise
+        with self._lock:
+            self._pages[driver] = 0
+        with self.stats.lock:
+            self.stats.drivers += 1
+        return driver
+
+    def _seed_cookies(self, driver):
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        for origin, cookies in self.consent_cookies.items():
+            # Cookies can only be set for the domain the driver is on; robots.txt is the cheapest page there
+            driver.get(origin.rstrip("/") + "/robots.txt")
+            for cookie in cookies:
+                driver.add_cookie(dict(cookie, value=now if cookie.get("value") is None else cookie["value"]))
+
+    def count_page(self, driver):
+        """Note that one more results page was read on driver."""
+        with self._lock:
+            self._pages[driver] = self._pages.get(driver, 0) + 1
+
+    def record_load(self, driver):
+        """Record how long the page just loaded by driver.get() took."""
+        try:
+            duration = driver.execute_script(LOAD_TIME_JS)
+        except Exception:
+            return
+        if duration:
+            with self.stats.lock:
+                self.stats.load_ms.append(duration)
+
+    def should_recycle(self, driver):
+        """Sample the driver's memory and return True once it has read recycle_after_pages pages."""
+        rss = _firefox_rss(driver)
+        with self.stats.lock:
+            if rss:
+                self.stats.rss.append(rss)
+        with self._lock:
+            recycle = bool(self.recycle_after_pages) and self._pages.get(driver, 0) >= self.recycle_after_pages
+        if recycle:
+            with self.stats.lock:
+                self.stats.recycles += 1
+        return recycle
+
+    def report(self):
+        """Print the factory's driver statistics."""
+        self.stats.report()
@@ -0,0 +1,42 @@
+# Fiat currencies listed on each exchange's USDT P2P market
+BINANCE_FIATS = [
+    "AED", "AMD", "AOA", "ARS", "AUD", "AZN", "BDT", "BHD", "BIF", "BND",
+    "BOB", "BRL", "BWP", "BYN", "CAD", "CDF", "CHF", "CLP", "CNY", "COP",
+    "CRC", "CZK", "DOP", "DZD", "EGP", "ETB", "EUR", "GBP", "GEL", "GHS",
+    "GMD", "GNF", "GTQ", "HKD", "HNL", "HUF", "IDR", "INR", "IQD", "JOD",
+    "JPY", "KES", "KGS", "KHR", "KWD", "KZT", "LAK", "LBP", "LKR", "MAD",
+    "MDL", "MGA", "MOP", "MRU", "MXN", "MZN", "NIO", "NOK", "NPR", "OMR",
+    "PAB", "PEN", "PGK", "PHP", "PKR", "PLN", "PYG", "QAR", "RON", "RSD",
+    "RWF", "SAR", "SDG", "SEK", "SLL", "THB", "TJS", "TND", "TRY", "TWD", 
+    "TZS", "UAH", "UGX", "USD", "UYU", "UZS", "VES", "VND", "XAF", "XOF",
+    "YER", "ZAR", "ZMW"
+]
+
+BYBIT_FIATS = [
+    "AED", "AMD", "ARS", "AUD", "AZN", "BDT", "BGN", "BRL",
+    "BYN", "CAD", "CLP", "COP", "CZK", "DZD", "EGP", "EUR",
+    "GBP", "GEL", "GHS", "HKD", "HUF", "IDR", "ILS", "INR",
+    "JOD", "JPY", "KES", "KGS", "KHR", "KWD", "KZT", "LBP", "LKR",
+    "MAD", "MDL", "MXN", "MYR", "NGN", "NOK", "NPR",
+    "NZD", "PEN", "PHP", "PKR", "PLN", "RON", "RSD", "RUB", "SAR",
+    "SEK", "THB", "TJS", "TRY", "TWD", "UAH", "USD", "UZS",
+    "VES", "VND", "ZAR"
+]
+
+OKX_FIATS = [
+    "AED", "AMD", "ARS", "AUD", "AZN", "BGN", "BHD",
+    "BRL", "BWP", "BYN", "CAD", "CHF", "CLP", "CNY", "COP", "CZK", "DKK", 
+    "DOP", "EGP", "ETB", "EUR", "GBP", "GEL", "GHS", "HUF", "IDR", 
+    "ILS", "INR", "IQD", "ISK", "JMD", "JOD", "JPY", "KES", "KGS", "KWD",
+    "KZT", "LAK", "LBP", "LKR", "MAD", "MDL", "MOP",
+    "MXN", "MZN", "NOK", "NPR", "NZD", "OMR", "PAB", "PEN", "PKR", 
+    "PLN", "PYG", "QAR", "RON", "RSD", "RWF", "SAR", "SDG", "SEK", "THB", "TJS", "TND", 
+    "TRY", "TTD", "TZS", "UAH", "UGX", "USD", "UYU", "UZS", "VES", "VND", "XAF", "XOF", 
+    "ZAR", "ZMW"
+]
+
+FIAT_CURRENCIES = {
+    "binance": BINANCE_FIATS,
+    "bybit": BYBIT_FIATS,
+    "okx": OKX_FIATS,
+}
@@ -0,0 +1,58 @@
+"""Parse P2P result rows out of a page's HTML in-process.
+
+The page's results table is copied out with one WebDriver round trip
+(TABLE_HTML_JS, or driver.page_source) and parsed with lxml. Each adapter's
+RowParser uses precompiled XPath equivalents of its CSS selectors and
+returns the same row dicts as the adapter's EXTRACT_ROWS_JS, so both paths
+share ads_from_rows().
+"""
+from lxml import etree, html
+
+# Returns the outerHTML of the first element matching arguments[0], or null
+TABLE_HTML_JS = "const table = document.querySelector(arguments[0]); return table ? table.outerHTML : null;"
+
+
+def has_class(name):
+    """XPath predicate matching the CSS class selector .name."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def element_text(element):
+    """An element's text with whitespace collapsed, close to innerText.trim() for the table cells."""
+    return " ".join(element.text_content().split())
+
+
+class RowParser:
+    """Precompiled selectors for the rows of one exchange's results table.
+
+    rows selects the row elements (skip_header drops the first one).
+    fields map a row dict key to the XPath of its cell, taking the first
+    match's text or None; lists take the text of every match. Rows missing
+    any of the required fields are left out.
+    """
+
+    def __init__(self, rows, fields, lists=None, skip_header=False, required=()):
+        self.rows = etree.XPath(rows)
+        self.fields = {name: etree.XPath(path) for name, path in fields.items()}
+        self.lists = {name: etree.XPath(path) for name, path in (lists or {}).items()}
+        self.skip_header = skip_header
+        self.required = required
+
+    def parse(self, markup):
+        """Row dicts for every ad row in markup (a page or just its table)."""
+        rows = self.rows(html.fromstring(markup))
+        if self.skip_header:
+            rows = rows[1:]
+
+        parsed = []
+        for row in rows:
+            values = {}
+            for name, select in self.fields.items():
+                matches = select(row)
+                values[name] = element_text(matches[0]) if matches else None
+            if any(values[name] is None for name in self.required):
+                continue
+            for name, select in self.lists.items():
+                values[name] = [element_text(match) for match in select(row)]
+            parsed.append(values)
+        return parsed
@@ -0,0 +1,150 @@
+"""Parse locale-formatted prices and amounts, a whole column at a time.
+
+The P2P pages show numbers like "1,234.56", "1.234,56 USDT", "12 345,6" or
+"≈ 0.92 EUR". parse_numbers() decides from the whole column which of "." and
+"," is the decimal mark and converts the column to a float64 array in one go.
+
+Most columns are bare numbers with at most a shared unit ("1,234.56 USDT"),
+and those never go through a regex per value: the unit is stripped from the
+joined column, one pattern search over it finds the number that settles the
+decimal mark, one translate normalizes the marks and numpy reads the rest.
+Any other column has the first number pulled out of each text with one
+precompiled pattern.
+
+A column where every number is ambiguous (only "1,234"-style values, which
+read as 1234 or 1.234) takes the decimal mark last seen for its exchange and
+fiat, so the mark is learned per market from its unambiguous prices and
+amounts. Exchanges format the same fiat differently, so one exchange's mark
+never decides another's.
+"""
+import re
+import threading
+
+import numpy as np
+
+# A number with optional space/apostrophe thousand groups, then any "." or "," groups
+NUMBER_PATTERN = re.compile(r"[-+]?(?:\d{1,3}(?:[ \u00a0\u202f']\d{3})+|\d+)(?:[.,]\d+)*")
+
+# The first line of a joined column whose number decides the decimal mark:
+# lines with no mark, or "1,234"-style ones, read either way (see decimal_vote)
+DECIDING_LINE = re.compile(r"^(?![-+]?(?:[^.,\n]*|(?!0[.,])\d{1,3}[.,]\d{3})$).+$", re.MULTILINE)
+
+# Group separators that are never a decimal mark
+_GROUPING = " \u00a0\u202f'"
+# Drop the group separators and turn the decimal mark into "."
+_NORMALIZE = {
+    ".": str.maketrans("", "", "," + _GROUPING),
+    ",": str.maketrans({",": ".", ".": None, **{char: None for char in _GROUPING}}),
+}
+# What a joined column of bare numbers may hold (checked on its ASCII bytes)
+_BARE_CHARS = b"0123456789.,+-\n"
+
+
+def decimal_vote(token):
+    """The decimal mark a number token implies, or None if it reads either way (e.g. "1,234")."""
+    dot, comma = token.rfind("."), token.rfind(",")
+    if dot >= 0 and comma >= 0:
+        return "." if dot > comma else ","
+    if dot < 0 and comma < 0:
+        return None
+    mark = "." if dot >= 0 else ","
+    if token.count(mark) > 1:
+        # Repeated, so it separates thousands
+        return "," if mark == "." else "."
+    whole, _, fraction = token.partition(mark)
+    whole = whole.lstrip("+-").translate(_NORMALIZE[mark])
+    if len(fraction) != 3 or len(whole) > 3 or whole == "0":
+        return mark
+    return None
+
+
+class NumberParser:
+    """Column-wise number parsing that remembers each (exchange, fiat) market's decimal mark.
+
+    Shared by every worker in the process, like PAYMENT_METHODS.
+    """
+
+    def __init__(self, default_decimal="."):
+        self.default_decimal = default_decimal
+        self.decimal_marks = {}
+        self._lock = threading.Lock()
+
+    def decimal_mark(self, tokens, fiat=None, exchange=None):
+        """The decimal mark of the first token that decides it; the market's last known one if none does.
+
+        A column comes from one page, so every number in it shares the locale.
+        """
+        return self._column_mark("\n".join(tokens), fiat, exchange)
+
+    def _column_mark(self, lines, fiat, exchange):
+        market = (exchange, fiat)
+        match = DECIDING_LINE.search(lines)
+        if match is None:
+            return self.decimal_marks.get(market, self.default_decimal)
+        mark = decimal_vote(match.group())
+        if fiat is not None and self.decimal_marks.get(market) != mark:
+            with self._lock:
+                self.decimal_marks[market] = mark
+        return mark
+
+    def parse_column(self, texts, fiat=None, exchange=None):
+        """float64 array of the first number in each text; NaN where there is none."""
+        if not texts:
+            return np.empty(0)
+        values = self._parse_bare(texts, fiat, exchange)
+        if values is None:
+            search = NUMBER_PATTERN.search
+            matches = [search(text) if text else None for text in texts]
+            tokens = [match.group() if match else "nan" for match in matches]
+            mark = self.decimal_mark(tokens, fiat, exchange)
+            # One translate over the whole column instead of one per value
+            cleaned = "\n".join(tokens).translate(_NORMALIZE[mark]).split("\n")
+            try:
+                values = np.array(cleaned, dtype=np.float64)
+            except ValueError:
+                values = np.array([_to_float(value) for value in cleaned], dtype=np.float64)
+        values[np.isinf(values)] = np.nan
+        return values
+
+    def _parse_bare(self, texts, fiat, exchange):
+        """The column's values if every text is a bare number plus the first text's unit, else None."""
+        if not all(texts):
+            return None
+        joined = "\n".join(texts)
+        _, space, unit = texts[0].rpartition(" ")
+        if space and unit.isalpha():
+            joined = (joined + "\n").replace(f" {unit}\n", "\n")[:-1]
+        try:
+            if joined.encode("ascii").translate(None, _BARE_CHARS):
+                return None
+        except UnicodeEncodeError:
+            return None
+        mark = self._column_mark(joined, fiat, exchange)
+        try:
+            return np.array(joined.translate(_NORMALIZE[mark]).split("\n"), dtype=np.float64)
+        except ValueError:
+            return None
+
+
+def _to_float(text):
+    try:
+        return float(text)
+    except ValueError:
+        return float("nan")
+
+
+# Shared by every adapter and worker so each market's decimal mark is learned once
+NUMBERS = NumberParser()
+
+
+def parse_numbers(texts, fiat=None, exchange=None):
+    """Parse a column of formatted numbers (see NumberParser.parse_column)."""
+    return NUMBERS.parse_column(texts, fiat, exchange)
+
+
+def parse_number(text, fiat=None, exchange=None):
+    """Parse one formatted number, raising ValueError like float() if there is none."""
+    value = NUMBERS.parse_column([text], fiat, exchange)[0]
+    if np.isnan(value):
+        raise ValueError(f"no number in {text!r}")
+    return float(value)
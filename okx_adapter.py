@@ -0,0 +1,143 @@
+import math
+
+from selenium.webdriver.common.by import By
+
+from ad_batch import AdBatch
+from fiat_currencies import FIAT_CURRENCIES
+from html_rows import RowParser, has_class
+from number_parsing import parse_number, parse_numbers
+from p2p_api import OKXAPI
+from p2p_engine import ExchangeAdapter
+
+# Runs in the page and returns the raw text of each cell (same selectors as scrape_page_elements)
+EXTRACT_ROWS_JS = """
+const text = el => el ? el.innerText.trim() : null;
+return Array.from(document.querySelectorAll('tr.custom-table-row')).slice(1).map(row => ({
+    advertiser: text(row.querySelector('.merchant-name a')),
+    price: text(row.querySelector('.price')),
+    amount: text(row.querySelector('.quantity-and-limit .show-item:first-child')),
+    payment_methods: Array.from(
+        row.querySelectorAll('.payment-item .pay-method'),
+        pm => pm.innerText.trim()
+    ),
+}));
+"""
+
+# The same rows parsed from the table's HTML, with XPath for the selectors above
+ROW_PARSER = RowParser(
+    f".//tr[{has_class('custom-table-row')}]",
+    {
+        "advertiser": f".//*[{has_class('merchant-name')}]//a",
+        "price": f".//*[{has_class('price')}]",
+        "amount": f".//*[{has_class('quantity-and-limit')}]//*[{has_class('show-item')}][not(preceding-sibling::*)]",
+    },
+    {"payment_methods": f".//*[{has_class('payment-item')}]//*[{has_class('pay-method')}]"},
+    skip_header=True,
+)
+
+
+def parse_number_text(text, fiat=None, exchange=None):
+    """Parse a formatted price or amount ("1,234.56 USD", "1.234,56") to float."""
+    return parse_number(text, fiat, exchange)
+
+def append_row(ads, advertiser_name, price, available_amount, payment_methods_list):
+    """Append a parsed row to the batch."""
+    ads.append(advertiser_name, price, available_amount, payment_methods_list)
+
+    if price and available_amount:
+        payment_methods_str = ", ".join(payment_methods_list)
+        print(
+            f"Advertiser: {advertiser_name}, Price: {price}, Available Amount: {available_amount} USDT, Payment Methods: {payment_methods_str}"
+        )
+
+
+class OKXAdapter(ExchangeAdapter):
+    name = "okx"
+    p2p_url = "https://www.okx.com/p2p-markets/{currency}/buy-usdt"
+    fiat_currencies = FIAT_CURRENCIES["okx"]
+    api_class = OKXAPI
+
+    advertiser_selector = ".merchant-name"
+    page_item_selector = "li.okui-pagination-item"
+    next_button_selector = "li.okui-pagination-next"
+    extract_rows_js = EXTRACT_ROWS_JS
+    row_parser = ROW_PARSER
+    # A 2s sleep used to run before every click
+    legacy_wait_per_page = 2
+
+    main_sheet_rows = 79
+
+    def ads_from_rows(self, rows):
+        """Convert the rows returned by EXTRACT_ROWS_JS (or ROW_PARSER) to an AdBatch."""
+        ads = AdBatch()
+
+        if not rows:
+            print("No rows found on the page.")
+            return ads
+
+        fiat = self.current_fiat()
+        prices = parse_numbers([row["price"] for row in rows], fiat, self.name)
+        amounts = parse_numbers([row["amount"] for row in rows], fiat, self.name)
+        for row_index, (row, price, available_amount) in enumerate(zip(rows, prices, amounts), start=1):
+            try:
+                if row["advertiser"] is None or row["price"] is None or row["amount"] is None:
+                    raise ValueError("missing advertiser, price or available amount cell")
+                if math.isnan(price) or math.isnan(available_amount):
+                    raise ValueError(f"unreadable price {row['price']!r} or amount {row['amount']!r}")
+
+                append_row(ads, row["advertiser"], float(price), float(available_amount), row["payment_methods"])
+            except Exception as e:
+                print(f"Error occurred while processing row {row_index}: {e}")
+
+        return ads
+
+    def scrape_page_elements(self, driver):
+        """Scrape data from the current page on OKX with one WebDriver query per cell."""
+        ads = AdBatch()
+
+        rows = driver.find_elements(By.CSS_SELECTOR, "tr.custom-table-row")
+
+        if not rows:
+            print("No rows found on the page.")
+            return ads
+
+        for row_index, row in enumerate(rows[1:], start=1):
+            try:
+                # Extract advertiser name
+                advertiser_name_elem = row.find_element(
+                    By.CSS_SELECTOR, ".merchant-name a"
+                )
+                advertiser_name = advertiser_name_elem.text
+
+                # Extract price
+                price_elem = row.find_element(By.CSS_SELECTOR, ".price")
+                price = parse_number_text(price_elem.text, self.current_fiat(), self.name)
+
+                # Extract available amount
+                available_amount_elem = row.find_element(
+                    By.CSS_SELECTOR, ".quantity-and-limit .show-item:first-child"
+                )
+                available_amount = parse_number_text(available_amount_elem.text, self.current_fiat(), self.name)
+
+                # Extract payment methods
+                payment_methods_elems = row.find_elements(
+                    By.CSS_SELECTOR, ".payment-item .pay-method"
+                )
+                payment_methods_list = [pm.text.strip() for pm in payment_methods_elems]
+
+                append_row(ads, advertiser_name, price, available_amount, payment_methods_list)
+            except Exception as e:
+                print(f"Error occurred while processing row {row_index}: {e}")
+
+        return ads
+
+    def find_next_button(self, driver):
+        next_buttons = driver.find_elements(By.CSS_SELECTOR, self.next_button_selector)
+        if not next_buttons:
+            return None
+
+        # Check if the next button is disabled
+        if "okui-pagination-disabled" in next_buttons[0].get_attribute("class"):
+            print("Next button is disabled. Reached the last page.")
+            return None
+        return next_buttons[0]
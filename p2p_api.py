@@ -0,0 +1,240 @@
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from ad_batch import AdBatch
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64; rv:128.0) Gecko/20100101 Firefox/128.0",
+    "Accept": "application/json",
+}
+
+
+class BinanceAPI:
+    """Binance P2P advert search (the endpoint behind p2p.binance.com/en/trade)."""
+
+    name = "binance"
+    page_size = 20
+
+    def __init__(self, base_url="https://p2p.binance.com"):
+        self.base_url = base_url.rstrip("/")
+
+    def request(self, fiat, page):
+        """Return the HTTP request for one page of ads as keyword arguments for requests."""
+        return {
+            "method": "POST",
+            "url": f"{self.base_url}/bapi/c2c/v2/friendly/c2c/adv/search",
+            "json": {
+                "asset": "USDT",
+                "fiat": fiat,
+                "tradeType": "BUY",
+                "page": page,
+                "rows": self.page_size,
+                "payTypes": [],
+                "publisherType": None,
+            },
+        }
+
+    def parse(self, payload):
+        """Return (rows, total_ads) from a search response."""
+        rows = []
+        for item in payload.get("data") or []:
+            adv = item["adv"]
+            rows.append((
+                item["advertiser"]["nickName"],
+                float(adv["price"]),
+                float(adv.get("surplusAmount") or adv.get("tradableQuantity") or 0),
+                [method["tradeMethodName"] for method in adv.get("tradeMethods") or []],
+            ))
+        return rows, payload.get("total")
+
+
+class BybitAPI:
+    """Bybit OTC online item list (the endpoint behind bybit.com/fiat/trade/otc)."""
+
+    name = "bybit"
+    page_size = 10
+
+    def __init__(self, base_url="https://api2.bybit.com"):
+        self.base_url = base_url.rstrip("/")
+        self.payment_names = {}
+
+    def request(self, fiat, page):
+        """Return the HTTP request for one page of ads as keyword arguments for requests."""
+        return {
+            "method": "POST",
+            "url": f"{self.base_url}/fiat/otc/item/online",
+            "json": {
+                "tokenId": "USDT",
+                "currencyId": fiat,
+                "payment": [],
+                "side": "1",
+                "size": str(self.page_size),
+                "page": str(page),
+                "amount": "",
+            },
+        }
+
+    def payment_list_request(self):
+        """Return the request for the payment id -> name table."""
+        return {"method": "POST", "url": f"{self.base_url}/fiat/otc/configuration/queryAllPaymentList"}
+
+    def load_payment_names(self, payload):
+        """Store the payment id -> name table so ads list names instead of ids."""
+        for payment in (payload.get("result") or {}).get("paymentConfigVo") or []:
+            self.payment_names[str(payment["paymentType"])] = payment["paymentName"]
+
+    def parse(self, payload):
+        """Return (rows, total_ads) from an item list response."""
+        result = payload.get("result") or {}
+        rows = []
+        for item in result.get("items") or []:
+            rows.append((
+                item.get("nickName") or "N/A",
+                float(item.get("price") or 0),
+                float(item.get("lastQuantity") or 0),
+                [self.payment_names.get(str(p), str(p)) for p in item.get("payments") or []],
+            ))
+        return rows, result.get("count")
+
+
+class OKXAPI:
+    """OKX C2C order book (the endpoint behind okx.com/p2p-markets).
+
+    The book endpoint returns every ad for a currency in one response, so there
+    is only ever a single page.
+    """
+
+    name = "okx"
+    page_size = None
+
+    def __init__(self, base_url="https://www.okx.com"):
+        self.base_url = base_url.rstrip("/")
+
+    def request(self, fiat, page):
+        """Return the HTTP request for the ads of a currency as keyword arguments for requests."""
+        return {
+            "method": "GET",
+            "url": f"{self.base_url}/v3/c2c/tradingOrders/books",
+            "params": {
+                "quoteCurrency": fiat.lower(),
+                "baseCurrency": "usdt",
+                "side": "sell",
+                "paymentMethod": "all",
+                "userType": "all",
+                "showTrade": "false",
+                "receivingAds": "false",
+                "t": str(int(time.time() * 1000)),
+            },
+        }
+
+    def parse(self, payload):
+        """Return (rows, total_ads) from a book response."""
+        rows = []
+        for item in (payload.get("data") or {}).get("sell") or []:
+            rows.append((
+                item["nickName"],
+                float(item["price"]),
+                float(item["availableAmount"]),
+                list(item.get("paymentMethods") or []),
+            ))
+        return rows, len(rows)
+
+
+EXCHANGE_APIS = {
+    "binance": BinanceAPI,
+    "bybit": BybitAPI,
+    "okx": OKXAPI,
+}
+
+
+def page_count(total_ads, page_size):
+    """Number of pages needed for total_ads, or 1 when the API does not page."""
+    if not page_size or not total_ads:
+        return 1
+    return -(-int(total_ads) // page_size)
+
+
+def create_session(pool_size=10, retries=3):
+    """Create a requests session with a pooled, retrying HTTP adapter."""
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    retry = Retry(
+        total=retries,
+        backoff_factor=1,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=None,  # The search endpoints are POSTs but safe to repeat
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class APIFetcher:
+    """Fetch every page of ads for a currency straight from an exchange's JSON API.
+
+    fetch_currency returns the same AdBatch as paginate_and_load_pages, so a
+    fetcher can replace a WebDriver in WorkerPool (it also has quit()).
+    """
+
+    def __init__(self, api, session=None, timeout=15):
+        self.api = api
+        self.session = session or create_session()
+        self.timeout = timeout
+        if isinstance(api, BybitAPI) and not api.payment_names:
+            try:
+                api.load_payment_names(self._get(api.payment_list_request()))
+            except (requests.RequestException, ValueError) as e:
+                print(f"Could not load Bybit payment names, using payment ids: {e}")
+
+    def _get(self, request):
+        request = dict(request)
+        response = self.session.request(request.pop("method"), request.pop("url"), timeout=self.timeout, **request)
+        response.raise_for_status()
+        return response.json()
+
+    def fetch_page(self, fiat, page):
+        """Return (rows, total_ads) for one page."""
+        return self.api.parse(self._get(self.api.request(fiat, page)))
+
+    def fetch_currency(self, fiat, on_page=None, keep_ads=True, depth=None):
+        """Fetch every page for a currency and return its ads.
+
+        on_page(page, ads), if given, is called with every page; without
+        keep_ads the pages only go there and None is returned. With a
+        depth_limits.DepthTracker the fetch stops once it says so.
+        """
+        all_ads = AdBatch()
+        fetched = 0
+
+        print(f"Fetching {fiat} from the {self.api.name} API...")
+        page = 1
+        max_pages = 1
+        while page <= max_pages:
+            rows, total_ads = self.fetch_page(fiat, page)
+            if page == 1:
+                max_pages = page_count(total_ads, self.api.page_size)
+            if not rows:
+                break
+            ads = AdBatch.from_rows(rows)
+            fetched += len(ads)
+            if on_page is not None:
+                on_page(page, ads)
+            if keep_ads:
+                all_ads.extend(ads)
+            page += 1
+            if depth is not None and depth.add(page - 1, ads):
+                break
+
+        if depth is not None:
+            depth.finish()
+        print(f"Fetched {fetched} ads for {fiat} over {page - 1} pages"
+              f"{f' (stopped on {depth.reason})' if depth is not None and depth.stopped else ''}.")
+        return all_ads if keep_ads else None
+
+    def quit(self):
+        """Close the pooled HTTP session."""
+        self.session.close()
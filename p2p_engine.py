@@ -0,0 +1,1042 @@
+"""Scrape several exchanges in one process on a shared browser pool and Sheets client.
+
+Each exchange is an ExchangeAdapter (binance_adapter.py, bybit_adapter.py,
+okx_adapter.py). The hyphenated scraper scripts run one adapter each; this
+module's main() runs any mix of them together.
+
+With --daemon it keeps scraping until SIGTERM (or Ctrl+C), with warm browsers
+and Sheets client, and writes each exchange's staleness to a status file.
+
+Usage: python p2p_engine.py [--exchanges binance bybit okx] [--backend selenium|api] [--workers N]
+                            [--budget-minutes M] [--daemon] [--max-staleness-minutes M]
+"""
+import argparse
+import collections
+import itertools
+import json
+import os
+import signal
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import gspread
+from google.oauth2.service_account import Credentials
+from lxml import etree
+from selenium.common.exceptions import ElementClickInterceptedException, TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from ad_batch import AdBatch
+from bank_filter import BankFilter
+from depth_limits import DepthLimit
+from driver_factory import DriverFactory
+from html_rows import TABLE_HTML_JS
+from p2p_api import APIFetcher, create_session
+from page_waits import PageTransition, WAIT_STATS
+from page_pipeline import CurrencyPages, JSONLinesSink, PageFanout, PageStream, ParquetSink
+from payment_summary import (PAYMENT_METHODS_SHEET, SUMMARY_COLUMNS, SUMMARY_NUMBER_COLUMNS, amount_summary,
+                             payment_options, summarize_payment_methods, summary_rows)
+from phase_metrics import PHASE_METRICS
+from refresh_scheduler import RefreshScheduler
+from sheets_writer import BatchedSheetsWriter, dataframe_to_values
+from snapshot_store import append_batch
+from spread_analytics import DEFAULT_DEPTH, compute_spreads, write_spreads
+from sweep_journal import SweepJournal
+from tab_paginator import TabPaginator
+from worker_pool import PoolCancelled, WorkerPool
+
+# Workbook each exchange writes to when run through main()
+SHEET_IDS = {
+    "binance": "insert google sheets api here",
+    "bybit": "insert google sheets api here",
+    "okx": "insert google sheets api here",
+}
+
+
+class ExchangeAdapter:
+    """Everything exchange-specific about scraping one exchange's P2P pages.
+
+    Subclasses set the class attributes and implement ads_from_rows() and
+    scrape_page_elements(); paginate() does the rest (page 1, the parallel
+    tabs, then the next-button fallback). The hooks below it cover each
+    exchange's quirks: pop-ups, finding and clicking the next button and how
+    a worksheet is written without batching.
+    """
+
+    name = None
+    p2p_url = None  # formatted with {currency}
+    fiat_currencies = ()
+    api_class = None  # p2p_api class used by the 'api' backend
+
+    # First advertiser of the results table; a new one means the next page has rendered
+    advertiser_selector = None
+    # Numbered pagination buttons, used by the tabs to jump straight to their page
+    page_item_selector = None
+    next_button_selector = None
+    # Runs in the page and returns one object per ad row
+    extract_rows_js = None
+    # html_rows.RowParser returning the same row objects from the page's HTML, and the
+    # element whose outerHTML holds every row (the whole page source if it is missing)
+    row_parser = None
+    table_selector = "table"
+    # What each page used to cost in fixed waits, for the wait report
+    legacy_wait_per_page = 0
+    # Cookies the driver factory sets when a browser starts (see DriverFactory)
+    consent_cookies = {}
+
+    # Rows of the Main sheet (from row 2) whose update time in column D is stamped after each run
+    main_sheet_rows = 0
+    # Main sheet columns for each currency's payment options and amount summary
+    main_summary_columns = ("B", "C")
+    # In daemon mode no currency should go longer than this without a fresh scrape
+    max_staleness = timedelta(hours=1)
+    # Text for ads without payment methods, and the 1-based span of columns formatted as numbers
+    empty_payment_methods = ""
+    number_columns = None
+
+    def __init__(self, sheet_id=None, tab_count=4, use_js_extraction=True, page_transition_timeout=10,
+                 max_staleness=None, use_html_parsing=False, bank_filter=None, depth_limit=None):
+        self.sheet_id = sheet_id
+        # BankFilter the Main sheet's payment options are narrowed to (None lists every method)
+        self.bank_filter = bank_filter
+        # DepthLimit on how many pages of each currency are read (every page without one)
+        self.depth_limit = depth_limit or DepthLimit()
+        if max_staleness is not None:
+            self.max_staleness = max_staleness
+        self.tab_count = tab_count
+        self.use_js_extraction = use_js_extraction
+        self.use_html_parsing = use_html_parsing
+        self.page_transition_timeout = page_transition_timeout
+        # Set by the engine so pages and load times are counted against the shared factory
+        self.driver_factory = None
+        # The currency each worker thread is scraping, for parsing its numbers
+        self._scraping = threading.local()
+
+    # ---- Scraping ----
+    def scrape_currency(self, driver, currency, known_pages=None, on_page=None, keep_ads=True, depth=None):
+        """Load the P2P page for a currency and collect its pages of ads (see paginate())."""
+        print(f"Scraping {self.name} {currency}...")
+        self._scraping.fiat = currency
+        with PHASE_METRICS.time(self.name, "currency"):
+            with PHASE_METRICS.time(self.name, "page_load"):
+                driver.get(self.p2p_url.format(currency=currency))
+            if self.driver_factory is not None:
+                self.driver_factory.record_load(driver)
+            return self.paginate(driver, known_pages, on_page, keep_ads, depth)
+
+    def scrape_page(self, driver):
+        """Scrape data from the current page, falling back to per-element queries if the script fails."""
+        if self.driver_factory is not None:
+            self.driver_factory.count_page(driver)
+        start = time.perf_counter()
+        ads = self.extract_page(driver)
+        seconds = time.perf_counter() - start
+        PHASE_METRICS.observe(self.name, "scrape_page", seconds)
+        if len(ads):
+            PHASE_METRICS.observe(self.name, "scrape_row", seconds / len(ads), len(ads))
+        return ads
+
+    def extract_page(self, driver):
+        """Extract the current page's ads with the configured method."""
+        if self.use_html_parsing and self.row_parser is not None:
+            try:
+                return self.scrape_page_html(driver)
+            except (WebDriverException, etree.LxmlError) as e:
+                print(f"HTML row parsing failed, falling back to the page script: {e}")
+        if self.use_js_extraction:
+            try:
+                return self.scrape_page_js(driver)
+            except WebDriverException as e:
+                print(f"JavaScript row extraction failed, falling back to element queries: {e}")
+        return self.scrape_page_elements(driver)
+
+    def scrape_page_html(self, driver):
+        """Scrape the current page from one copy of its results table, parsed in-process."""
+        markup = driver.execute_script(TABLE_HTML_JS, self.table_selector) or driver.page_source
+        return self.ads_from_rows(self.row_parser.parse(markup))
+
+    def scrape_page_js(self, driver):
+        """Scrape the current page with a single execute_script call."""
+        return self.ads_from_rows(driver.execute_script(self.extract_rows_js))
+
+    def ads_from_rows(self, rows):
+        """Convert the row objects of extract_rows_js (or row_parser) to an AdBatch."""
+        raise NotImplementedError
+
+    def current_fiat(self):
+        """The currency this thread is scraping, or None outside scrape_currency()."""
+        return getattr(self._scraping, "fiat", None)
+
+    def scrape_page_elements(self, driver):
+        """Scrape the current page with one WebDriver query per cell."""
+        raise NotImplementedError
+
+    def paginate(self, driver, known_pages=None, on_page=None, keep_ads=True, depth=None):
+        """Collect the pages of the currency the driver has loaded, until depth says to stop.
+
+        Pages after the first that are in known_pages ({page number: AdBatch})
+        are not scraped again; on_page(page, ads) is called with every page
+        that is. Without keep_ads the pages only go to on_page and None is
+        returned, so a deep market is never held in memory. depth is the
+        scrape's DepthTracker (a new one of depth_limit if not given); its
+        reason says why the pagination stopped.
+        """
+        known_pages = known_pages or {}
+        depth = depth if depth is not None else self.depth_limit.tracker()
+        all_ads = AdBatch()
+
+        def scraped(page):
+            ads = self.scrape_page(driver)
+            depth.add(page, ads)
+            if on_page is not None:
+                on_page(page, ads)
+            return ads if keep_ads else AdBatch()
+
+        with PHASE_METRICS.time(self.name, "wait_for_rows"):
+            self.wait_for_page_to_load(driver)
+        with PHASE_METRICS.time(self.name, "popups"):
+            self.prepare_page(driver)
+
+        page_numbers = self.page_numbers(driver)
+        max_pages = max(page_numbers) if page_numbers else None
+        if max_pages:
+            print(f"Detected maximum page number: {max_pages}")
+
+        current_page_num = 1
+        print(f"Scraping page {current_page_num} (first page)...")
+        all_ads.extend(scraped(current_page_num))
+        max_pages = depth.limit.page_limit(max_pages)
+
+        # Load the remaining pages in parallel tabs, jumping straight to each page number
+        if self.tab_count > 1 and max_pages and max_pages > 1 and not depth.stopped:
+            paginator = TabPaginator(self.page_item_selector, self.advertiser_selector, self.scrape_page,
+                                     self.tab_count, on_page=on_page, keep_pages=keep_ads, depth=depth)
+            with PHASE_METRICS.time(self.name, "tab_pages"):
+                ads = paginator.scrape(driver, max_pages, all_ads, known_pages)
+            self._report_depth(depth)
+            return ads
+
+        while (max_pages is None or current_page_num < max_pages) and not depth.stopped:
+            next_button = self.find_next_button(driver)
+            if next_button is None:
+                print("No more pages to scrape. Stopping pagination.")
+                break
+
+            try:
+                with PHASE_METRICS.time(self.name, "next_page"), \
+                        PageTransition(driver, self.advertiser_selector, self.page_transition_timeout,
+                                       self.legacy_wait_per_page) as transition:
+                    self.click_next(driver, next_button)
+            except WebDriverException as e:
+                print(f"Failed to click next button: {e}")
+                break
+
+            if transition.status == "timeout":
+                print("Next page never rendered. Stopping pagination.")
+                break
+            if transition.status == "navigated":
+                with PHASE_METRICS.time(self.name, "wait_for_rows"):
+                    self.wait_for_page_to_load(driver)
+
+            current_page_num += 1
+            if current_page_num in known_pages:
+                print(f"Reusing checkpointed page {current_page_num}.")
+                all_ads.extend(known_pages[current_page_num])
+                depth.add(current_page_num, known_pages[current_page_num])
+                continue
+            print(f"Scraping page {current_page_num}...")
+            all_ads.extend(scraped(current_page_num))
+
+        self._report_depth(depth)
+        return all_ads if keep_ads else None
+
+    def _report_depth(self, depth):
+        depth.finish()
+        if depth.limit:
+            print(f"Read {depth.describe()}.")
+
+    def wait_for_page_to_load(self, driver, timeout=5):
+        """Wait until the page content is fully loaded."""
+        try:
+            WebDriverWait(driver, timeout).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, self.advertiser_selector))
+            )
+            print("Page loaded successfully.")
+        except TimeoutException:
+            print("Timeout while waiting for the page to load.")
+
+    def prepare_page(self, driver):
+        """Dismiss anything covering the results once the first page has loaded."""
+
+    def page_numbers(self, driver):
+        """Retrieve the page numbers shown in the pagination (empty if there is none)."""
+        page_elements = driver.find_elements(By.CSS_SELECTOR, self.page_item_selector)
+        return [int(elem.text) for elem in page_elements if elem.text.strip().isdigit()]
+
+    def find_next_button(self, driver):
+        """Return the next-page button, or None on the last page."""
+        next_buttons = driver.find_elements(By.CSS_SELECTOR, self.next_button_selector)
+        if not next_buttons or not next_buttons[0].is_enabled():
+            return None
+        return next_buttons[0]
+
+    def click_next(self, driver, next_button):
+        """Click the next-page button, through the page script if something covers it."""
+        try:
+            next_button.click()
+        except ElementClickInterceptedException:
+            print("Next button is obscured. Clicking it through the page script...")
+            driver.execute_script("arguments[0].scrollIntoView(true); arguments[0].click();", next_button)
+
+    # ---- Google Sheets ----
+    def to_frame(self, ads):
+        """The worksheet columns for a currency's ads."""
+        return ads.to_frame(empty_payment_methods=self.empty_payment_methods)
+
+    def write_worksheet(self, worksheet, df):
+        """Replace a worksheet's contents directly (used when writes are not batched)."""
+        worksheet.clear()
+        worksheet.update([df.columns.values.tolist()] + df.values.tolist())
+
+
+class SheetsSink:
+    """Write every exchange's currencies to its workbook through one authorized client.
+
+    With batch_writes, each exchange's worksheets are buffered in a
+    BatchedSheetsWriter and flushed by finish(); otherwise each currency is
+    written as it arrives. Every currency is also appended to the Parquet
+    history when store_dir is set.
+
+    finish() stamps each written currency's own scrape time in column D of
+    the Main sheet, on the row whose column A holds that currency. Each
+    currency's payment methods are summarized in memory (see
+    payment_summary) into the Payment Methods worksheet and the Main sheet's
+    payment options and amount summary columns.
+
+    It is also a page_pipeline sink: write_page() collects a streamed
+    currency's pages and end_currency() writes it like write(), so streaming
+    costs no extra Sheets requests and a currency that fails partway is
+    never half-written.
+    """
+
+    def __init__(self, client, batch_writes=True, snapshot_dir="sheet_snapshots", store_dir="p2p_history"):
+        self.client = client
+        self.batch_writes = batch_writes
+        self.snapshot_dir = snapshot_dir
+        self.store_dir = store_dir
+        self.workbooks = {}
+        self.writers = {}
+        self.scraped_at = {}
+        self.main_rows = {}
+        # Per exchange: {currency: Payment Methods rows}, and the Main sheet cells waiting for finish()
+        self.method_rows = {}
+        self.main_summaries = {}
+        # (exchange, currency) -> the pages of a streamed currency so far
+        self.streams = {}
+
+    def open(self, adapter):
+        """Open the adapter's workbook (once per exchange)."""
+        if adapter.name in self.workbooks:
+            return
+        workbook = self.client.open_by_key(adapter.sheet_id)
+        self.workbooks[adapter.name] = workbook
+        if self.batch_writes:
+            self.writers[adapter.name] = BatchedSheetsWriter(workbook, snapshot_dir=self.snapshot_dir,
+                                                             exchange=adapter.name)
+        self.scraped_at[adapter.name] = {}
+        self.main_rows[adapter.name] = _main_sheet_rows(workbook, adapter)
+        self.method_rows[adapter.name] = _payment_method_rows(workbook)
+        self.main_summaries[adapter.name] = {}
+
+    def write(self, adapter, currency, ads, scraped_at=None):
+        """Store one currency's ads and write (or buffer) its worksheet."""
+        scraped_at = scraped_at or datetime.now(timezone.utc)
+        if self.store_dir:
+            try:
+                with PHASE_METRICS.time(adapter.name, "snapshot_store"):
+                    append_batch(self.store_dir, adapter.name, currency, ads, scraped_at)
+            except Exception as e:
+                print(f"Error saving the {currency} snapshot: {e}")
+
+        if adapter.name in self.writers:
+            with PHASE_METRICS.time(adapter.name, "sheets_write"):
+                self._buffer(adapter, currency, ads, scraped_at)
+            self._summarize(adapter, currency, ads)
+            print(f"Data for {adapter.name} {currency} has been scraped and buffered.\n")
+            return
+
+        df = adapter.to_frame(ads)
+        workbook = self.workbooks[adapter.name]
+        with PHASE_METRICS.time(adapter.name, "sheets_write"):
+            # Create or access the corresponding worksheet for the currency
+            try:
+                worksheet = workbook.worksheet(currency)
+                print(f"Updating existing worksheet for {currency}...")
+            except gspread.WorksheetNotFound:
+                worksheet = workbook.add_worksheet(title=currency, rows="1000", cols="10")
+                print(f"Created new worksheet for {currency}...")
+
+            adapter.write_worksheet(worksheet, df)
+        self.scraped_at[adapter.name][currency] = scraped_at
+        self._summarize(adapter, currency, ads)
+        print(f"Data for {adapter.name} {currency} has been scraped and updated successfully.\n")
+
+    def restore(self, adapter, currency, ads, scraped_at):
+        """Take back a currency finished by an interrupted run (it is already in the Parquet store)."""
+        if adapter.name in self.writers:
+            self._buffer(adapter, currency, ads, scraped_at)
+        else:
+            # Its worksheet was written before the interruption; only the Main sheet cells are missing
+            self.scraped_at[adapter.name][currency] = scraped_at
+        self._summarize(adapter, currency, ads)
+
+    def _buffer(self, adapter, currency, ads, scraped_at):
+        values = dataframe_to_values(adapter.to_frame(ads))
+        self.writers[adapter.name].write_table(currency, values, number_columns=adapter.number_columns)
+        self.scraped_at[adapter.name][currency] = scraped_at
+
+    def _summarize(self, adapter, currency, ads):
+        with PHASE_METRICS.time(adapter.name, "payment_methods"):
+            self._record_summary(adapter, currency, summarize_payment_methods(ads))
+
+    def _record_summary(self, adapter, currency, summary):
+        self.method_rows[adapter.name][currency] = summary_rows(currency, summary)
+        self.main_summaries[adapter.name][currency] = [payment_options(summary, adapter.bank_filter),
+                                                       amount_summary(summary)]
+
+    def write_page(self, adapter, currency, page, ads):
+        """Collect one streamed page; end_currency() writes the currency once all of it is in."""
+        self.streams.setdefault((adapter.name, currency), AdBatch()).extend(ads)
+
+    def end_currency(self, adapter, currency, scraped_at, error=None):
+        """Write a streamed currency like write(); one that failed leaves its worksheet as it was."""
+        ads = self.streams.pop((adapter.name, currency), None)
+        if error is not None:
+            # The previous scrape stays until the retry succeeds
+            return
+        self.write(adapter, currency, ads if ads is not None else AdBatch(), scraped_at)
+
+    def summary_ranges(self, adapter):
+        """(cells, values) of the Main sheet payment options and amount summaries written since the last finish()."""
+        first, last = adapter.main_summary_columns
+        rows = self.main_rows[adapter.name]
+        return [(f"{first}{rows[currency]}:{last}{rows[currency]}", [cells])
+                for currency, cells in self.main_summaries[adapter.name].items() if currency in rows]
+
+    def payment_method_table(self, adapter):
+        """The Payment Methods worksheet: a header, then every known currency's rows in fiat list order."""
+        known = self.method_rows[adapter.name]
+        order = {currency: index for index, currency in enumerate(adapter.fiat_currencies)}
+        currencies = sorted(known, key=lambda currency: (order.get(currency, len(order)), currency))
+        return [SUMMARY_COLUMNS] + [row for currency in currencies for row in known[currency]]
+
+    def timestamp_ranges(self, adapter):
+        """(cells, values) of the Main sheet timestamps for the currencies written since the last finish()."""
+        stamps = self.scraped_at[adapter.name]
+        rows = self.main_rows[adapter.name]
+        if rows:
+            return [(f"D{rows[currency]}", [[_sheet_time(scraped_at)]])
+                    for currency, scraped_at in stamps.items() if currency in rows]
+
+        # Without currency codes in column A, stamp the whole range with the newest scrape
+        count = adapter.main_sheet_rows
+        return [(f"D2:D{count + 1}", [[_sheet_time(max(stamps.values()))]] * count)]
+
+    def finish(self, adapter):
+        """Stamp the Main sheet, write the payment method summaries and flush buffered worksheets."""
+        workbook = self.workbooks[adapter.name]
+        if not self.scraped_at[adapter.name]:
+            return
+        main_cells = self.timestamp_ranges(adapter) + self.summary_ranges(adapter)
+        methods = self.payment_method_table(adapter)
+        self.scraped_at[adapter.name] = {}
+        self.main_summaries[adapter.name] = {}
+
+        writer = self.writers.get(adapter.name)
+        if writer is None:
+            try:
+                with PHASE_METRICS.time(adapter.name, "sheets_write"):
+                    workbook.worksheet("Main").batch_update([{"range": cells, "values": values}
+                                                             for cells, values in main_cells])
+            except Exception as e:
+                print(f"Error updating the Main sheet: {e}")
+            try:
+                with PHASE_METRICS.time(adapter.name, "payment_methods"):
+                    _write_payment_methods(workbook, methods)
+            except Exception as e:
+                print(f"Error writing the {PAYMENT_METHODS_SHEET} sheet: {e}")
+            return
+
+        # Every currency sheet, the payment methods and the Main sheet cells in one flush
+        writer.write_table(PAYMENT_METHODS_SHEET, methods, number_columns=SUMMARY_NUMBER_COLUMNS)
+        for cells, values in main_cells:
+            writer.write_range("Main", cells, values)
+        try:
+            with PHASE_METRICS.time(adapter.name, "sheets_flush"):
+                writer.flush()
+        except Exception as e:
+            print(f"Error writing buffered {adapter.name} worksheets: {e}")
+
+
+def _main_sheet_rows(workbook, adapter):
+    """Map each of the adapter's currencies found in column A of the Main sheet to its row number."""
+    try:
+        values = workbook.worksheet("Main").col_values(1)
+    except Exception as e:
+        print(f"Error reading the Main sheet currencies: {e}")
+        return {}
+    currencies = set(adapter.fiat_currencies)
+    return {value.strip(): row for row, value in enumerate(values, start=1) if value.strip() in currencies}
+
+
+def _payment_method_rows(workbook):
+    """{currency: rows} of the Payment Methods worksheet, so currencies not scraped this run are kept."""
+    try:
+        values = workbook.worksheet(PAYMENT_METHODS_SHEET).get_values(value_render_option="UNFORMATTED_VALUE")
+    except gspread.WorksheetNotFound:
+        return {}
+    except Exception as e:
+        print(f"Error reading the {PAYMENT_METHODS_SHEET} sheet: {e}")
+        return {}
+    rows = {}
+    for row in values[1:]:
+        if row and row[0]:
+            rows.setdefault(row[0], []).append(row)
+    return rows
+
+
+def _write_payment_methods(workbook, values):
+    """Replace the Payment Methods worksheet directly, creating it on the first run."""
+    try:
+        worksheet = workbook.worksheet(PAYMENT_METHODS_SHEET)
+    except gspread.WorksheetNotFound:
+        worksheet = workbook.add_worksheet(title=PAYMENT_METHODS_SHEET, rows=len(values), cols=len(SUMMARY_COLUMNS))
+    worksheet.clear()
+    worksheet.update(values)
+
+
+def _sheet_time(scraped_at):
+    """A scrape time as local wall-clock text, the format the Main sheet has always used."""
+    return scraped_at.astimezone().strftime("%Y-%m-%d %H:%M:%S")
+
+
+class APIClients:
+    """The 'api' backend's stand-in for a WebDriver: one APIFetcher per exchange on a shared session."""
+
+    def __init__(self, adapters):
+        self.session = create_session()
+        self.fetchers = {name: APIFetcher(adapter.api_class(), self.session) for name, adapter in adapters.items()}
+
+    def fetch_currency(self, exchange, currency, on_page=None, keep_ads=True, depth=None):
+        with PHASE_METRICS.time(exchange, "api_fetch"):
+            return self.fetchers[exchange].fetch_currency(currency, on_page, keep_ads, depth)
+
+    def quit(self):
+        """Close the shared HTTP session."""
+        self.session.close()
+
+
+def authorize(credentials_file="credentials.json"):
+    """Authenticate and initialize the Google Sheets client."""
+    scopes = ["https://www.googleapis.com/auth/spreadsheets"]
+    creds = Credentials.from_service_account_file(credentials_file, scopes=scopes)
+    return gspread.authorize(creds)
+
+
+class P2PEngine:
+    """Scrape every adapter's currencies on one worker pool and write them through one sink.
+
+    Currencies of the different exchanges are interleaved, so with several
+    workers each exchange's site sees roughly 1/len(adapters) of the load.
+    All browsers come from one DriverFactory, which sets every adapter's
+    consent cookies.
+
+    With a RefreshScheduler, a run only scrapes the markets most likely to
+    have changed that fit in budget_minutes of browser time, most urgent
+    first. The scheduler is seeded from the snapshot store.
+
+    With a checkpoint_file, run() journals every finished currency and page
+    (see SweepJournal) and continues an interrupted sweep where it stopped.
+    Currencies that fail are retried at the end of the sweep, up to
+    retries times with a backoff that starts at retry_backoff seconds and
+    doubles each round.
+
+    The time spent in each phase (see PHASE_METRICS) is printed after a
+    run, exported as Prometheus histograms to metrics_file and summarized
+    as JSON in run_summary_dir.
+
+    With a spreads_file, each run ends by comparing the latest prices in the
+    snapshot store across exchanges (see spread_analytics) and writing the
+    table there as CSV.
+
+    With stream_pages, every result page goes to the snapshot store and any
+    extra page_sinks as soon as it is scraped (see page_pipeline). Pages wait
+    in a queue of stream_buffer_pages, so scraping slows down when the sinks
+    fall behind. The worksheets are still written a whole currency at a
+    time, batched as usual. Streaming does not use the checkpoint journal.
+    The sinks are closed when run() or serve() ends.
+
+    Each adapter's depth_limit stops its currencies' pagination early (see
+    depth_limits). Why every currency stopped is counted after a run and
+    kept per currency in stop_reasons and the run summary.
+    """
+
+    def __init__(self, adapters, backend="selenium", workers=1, recycle_after=25, driver_factory=None,
+                 batch_sheets_writes=True, sheet_snapshot_dir="sheet_snapshots", snapshot_store_dir="p2p_history",
+                 credentials_file="credentials.json", scheduler=None, budget_minutes=None, checkpoint_file=None,
+                 retries=2, retry_backoff=30, metrics_file=None, run_summary_dir=None, sheets_client=None,
+                 spreads_file=None, spread_depth=DEFAULT_DEPTH, stream_pages=False, page_sinks=(),
+                 stream_buffer_pages=8):
+        self.adapters = {adapter.name: adapter for adapter in adapters}
+        self.backend = backend
+        self.workers = workers
+        self.recycle_after = recycle_after
+        self.driver_factory = driver_factory or DriverFactory()
+        for adapter in adapters:
+            self.driver_factory.consent_cookies.update(adapter.consent_cookies)
+            adapter.driver_factory = self.driver_factory
+        self.batch_sheets_writes = batch_sheets_writes
+        self.sheet_snapshot_dir = sheet_snapshot_dir
+        self.snapshot_store_dir = snapshot_store_dir
+        self.credentials_file = credentials_file
+        self.scheduler = scheduler
+        self.budget_minutes = budget_minutes
+        self.journal = SweepJournal(checkpoint_file) if checkpoint_file and not stream_pages else None
+        if checkpoint_file and stream_pages:
+            print("The checkpoint journal is not used while streaming pages.")
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.metrics_file = metrics_file
+        self.run_summary_dir = run_summary_dir
+        # An already authorized gspread client; otherwise credentials_file is used
+        self.sheets_client = sheets_client
+        self.spreads_file = spreads_file
+        self.spread_depth = spread_depth
+        self.stream_pages = stream_pages
+        self.page_sinks = list(page_sinks)
+        self.stream_buffer_pages = stream_buffer_pages
+        # The PageStream of the scrape in progress, while streaming
+        self._stream = None
+        # exchange -> currency -> how deep its last scrape went and why it stopped (see record_depth())
+        self.stop_reasons = {}
+        # (exchange, currency) -> when it was last scraped successfully, for the staleness report
+        self.last_scraped = {}
+
+    def tasks(self):
+        """(exchange, currency) pairs, taking one currency from each exchange in turn."""
+        per_exchange = [[(name, currency) for currency in adapter.fiat_currencies]
+                        for name, adapter in self.adapters.items()]
+        tasks = [task for group in itertools.zip_longest(*per_exchange) for task in group if task is not None]
+        if self.scheduler is not None:
+            planned = self.scheduler.plan(tasks, self.budget_minutes)
+            print(f"Refresh scheduler picked {len(planned)} of {len(tasks)} currencies.")
+            return planned
+        return tasks
+
+    def create_pool(self, keep_drivers=False):
+        """Worker pool over (exchange, currency) tasks for the configured backend (see scrape_task())."""
+        if self.backend == "api":
+            return WorkerPool(lambda: APIClients(self.adapters), self.scrape_task,
+                              workers=self.workers, recycle_after=self.recycle_after, keep_drivers=keep_drivers)
+        return WorkerPool(self.driver_factory.create, self.scrape_task,
+                          workers=self.workers, recycle_after=self.recycle_after,
+                          recycle_when=self.driver_factory.should_recycle, keep_drivers=keep_drivers)
+
+    def scrape_task(self, worker, task):
+        """Scrape one (exchange, currency) on a pool worker (a WebDriver or APIClients).
+
+        Returns (ads, time the scrape finished, its DepthTracker); ads is None while streaming.
+        """
+        exchange, currency = task
+        depth = self.adapters[exchange].depth_limit.tracker()
+        if self.backend == "api":
+            ads = worker.fetch_currency(exchange, currency, depth=depth, **self.stream_args(task, depth))
+        else:
+            ads = self.adapters[exchange].scrape_currency(worker, currency, depth=depth,
+                                                          **self.checkpoint_args(task),
+                                                          **self.stream_args(task, depth))
+        return ads, datetime.now(timezone.utc), depth
+
+    def checkpoint_args(self, task):
+        """known_pages and on_page for scrape_currency() while a journaled sweep is open."""
+        journal = self.journal
+        if journal is None or not journal.active:
+            return {}
+        return {"known_pages": journal.cached_pages(*task),
+                "on_page": lambda page, ads: journal.record_page(*task, page, ads)}
+
+    def stream_args(self, task, depth=None):
+        """on_page and keep_ads for a scrape (with DepthTracker depth) while its pages are streamed."""
+        stream = self._stream
+        if stream is None:
+            return {}
+        return {"on_page": stream.page_callback(task, depth), "keep_ads": False}
+
+    def open_sink(self):
+        """Authorize Google Sheets, open every adapter's workbook and seed the scheduler."""
+        client = self.sheets_client or authorize(self.credentials_file)
+        if self.stream_pages:
+            # The worksheets still get whole currencies; only the local sinks take every page
+            sinks = [SheetsSink(client, batch_writes=self.batch_sheets_writes,
+                                snapshot_dir=self.sheet_snapshot_dir, store_dir=None)]
+            if self.snapshot_store_dir:
+                sinks.append(ParquetSink(self.snapshot_store_dir))
+            sink = PageFanout(sinks + self.page_sinks)
+        else:
+            sink = SheetsSink(client, batch_writes=self.batch_sheets_writes,
+                              snapshot_dir=self.sheet_snapshot_dir, store_dir=self.snapshot_store_dir)
+        for adapter in self.adapters.values():
+            sink.open(adapter)
+
+        if self.scheduler is not None and self.snapshot_store_dir:
+            try:
+                print(f"Refresh scheduler replayed {self.scheduler.load_history(self.snapshot_store_dir)} scrapes.")
+            except Exception as e:
+                print(f"Error loading the scrape history: {e}")
+        return sink
+
+    def close_sink(self, sink):
+        """Close the files the sink from open_sink() holds (the page_sinks' JSON lines files)."""
+        close = getattr(sink, "close", None)
+        if close is not None:
+            close()
+
+    def scrape(self, pool, sink, tasks, stop=None):
+        """Scrape tasks on the pool and write each result; return the tasks whose scrape failed.
+
+        Once stop is set, only the tasks in progress finish.
+        """
+        if self.stream_pages:
+            return self.stream(pool, sink, tasks, stop)
+        journal = self.journal if self.journal is not None and self.journal.active else None
+        failed = []
+        for (exchange, currency), result, error in pool.run(tasks):
+            if stop is not None and stop.is_set():
+                pool.cancel()
+            if isinstance(error, PoolCancelled):
+                continue
+            if error is not None:
+                print(f"An error occurred while processing {exchange} currency {currency}: {error}")
+                failed.append((exchange, currency))
+                if journal is not None:
+                    journal.record_failure(exchange, currency, error)
+                continue
+            scraped, scraped_at, depth = result
+            self.record_depth(exchange, currency, depth)
+            self.last_scraped[(exchange, currency)] = scraped_at
+            if journal is not None:
+                journal.record_done(exchange, currency, scraped, scraped_at)
+            if self.scheduler is not None:
+                self.scheduler.record_batch(exchange, currency, scraped, scraped_at)
+            try:
+                sink.write(self.adapters[exchange], currency, scraped, scraped_at)
+            except Exception as e:
+                print(f"An error occurred while processing {exchange} currency {currency}: {e}")
+        return failed
+
+    def stream(self, pool, sink, tasks, stop=None):
+        """scrape() with every page written to the sinks as it arrives."""
+        stream = PageStream(self.stream_buffer_pages)
+
+        def collect():
+            try:
+                for task, result, error in pool.run(tasks):
+                    stream.end(task, result, error)
+            finally:
+                stream.close()
+
+        self._stream = stream
+        collector = threading.Thread(target=collect, daemon=True)
+        collector.start()
+        currencies = {}
+        failed = []
+        try:
+            for event in stream.events():
+                if stop is not None and stop.is_set():
+                    pool.cancel()
+                kind, task = event[:2]
+                exchange, currency = task
+                adapter = self.adapters[exchange]
+                if kind == "page":
+                    page, ads, depth = event[2:]
+                    pages = currencies.get(task) or currencies.setdefault(task, CurrencyPages(depth))
+                    for page, ads in pages.add(page, ads):
+                        sink.write_page(adapter, currency, page, ads)
+                    continue
+
+                result, error = event[2:]
+                pages = currencies.pop(task, None) or CurrencyPages()
+                pages.drain()
+                if isinstance(error, PoolCancelled):
+                    continue
+                if error is not None:
+                    print(f"An error occurred while processing {exchange} currency {currency}: {error}")
+                    failed.append(task)
+                    sink.end_currency(adapter, currency, None, error)
+                    continue
+                scraped_at, depth = result[1:]
+                self.record_depth(exchange, currency, depth)
+                self.last_scraped[task] = scraped_at
+                if self.scheduler is not None:
+                    self.scheduler.record(exchange, currency, scraped_at, pages.best_price, pages.rows,
+                                          pages.total_amount)
+                sink.end_currency(adapter, currency, scraped_at)
+        finally:
+            if collector.is_alive():
+                # Unblock the workers and the collector if writing stopped early
+                pool.cancel()
+                for _ in stream.events():
+                    pass
+            collector.join()
+            self._stream = None
+        return failed
+
+    def record_depth(self, exchange, currency, depth):
+        """Keep the stop reason, pages and USDT amount of a currency's last scrape."""
+        self.stop_reasons.setdefault(exchange, {})[currency] = {
+            "reason": depth.reason, "pages": depth.pages, "amount": round(depth.amount, 2)}
+
+    def report_depth(self):
+        """Print how many currencies of each exchange stopped for each reason."""
+        for exchange, currencies in self.stop_reasons.items():
+            counts = collections.Counter(entry["reason"] for entry in currencies.values())
+            print(f"{exchange} stop reasons: "
+                  + ", ".join(f"{reason} {count}" for reason, count in counts.most_common()))
+
+    def retry_failed(self, pool, sink, failed):
+        """Scrape failed tasks again with a doubling backoff; return the ones that never succeeded."""
+        for attempt in range(1, self.retries + 1):
+            if not failed:
+                break
+            delay = self.retry_backoff * 2 ** (attempt - 1)
+            print(f"Retrying {len(failed)} failed currencies in {delay:.0f}s (attempt {attempt} of {self.retries})...")
+            time.sleep(delay)
+            failed = self.scrape(pool, sink, failed)
+        if failed:
+            print(f"Giving up on {len(failed)} currencies: "
+                  f"{', '.join(f'{exchange} {currency}' for exchange, currency in failed)}")
+        return failed
+
+    def run(self):
+        """Scrape every currency of every adapter and write the results."""
+        sink = self.open_sink()
+        pool = self.create_pool()
+        tasks = self.tasks()
+        if self.journal is not None:
+            tasks = [task for task in self.journal.begin(tasks) if task[0] in self.adapters]
+            for exchange, currency, ads, scraped_at in self.journal.completed_batches():
+                if exchange in self.adapters:
+                    sink.restore(self.adapters[exchange], currency, ads, scraped_at)
+
+        failed = self.scrape(pool, sink, tasks)
+        pool.report()
+        failed = self.retry_failed(pool, sink, failed)
+
+        if self.scheduler is not None:
+            self.scheduler.report()
+        if self.backend != "api":
+            WAIT_STATS.report()
+            self.driver_factory.report()
+        self.report_depth()
+
+        for adapter in self.adapters.values():
+            sink.finish(adapter)
+        self.close_sink(sink)
+        if self.journal is not None:
+            self.journal.end()
+
+        self.write_spreads()
+        PHASE_METRICS.report()
+        self.export_metrics(summary={"currencies": len(tasks), "failed": [list(task) for task in failed],
+                                     "stop_reasons": self.stop_reasons})
+
+    def write_spreads(self):
+        """Write the cross-exchange spread table of the latest snapshots to spreads_file."""
+        if not self.spreads_file or not self.snapshot_store_dir:
+            return
+        bank_filters = [adapter.bank_filter for adapter in self.adapters.values() if adapter.bank_filter]
+        try:
+            frame = compute_spreads(self.snapshot_store_dir, self.spread_depth,
+                                    bank_filters[0] if bank_filters else None)
+            write_spreads(frame, self.spreads_file)
+            print(f"Spreads of {len(frame)} fiat/payment method pairs written to {self.spreads_file}")
+        except Exception as e:
+            print(f"Error computing the cross-exchange spreads: {e}")
+
+    def export_metrics(self, summary=None):
+        """Write the Prometheus textfile and, when summary is given, the run's JSON summary."""
+        try:
+            if self.metrics_file:
+                PHASE_METRICS.write_textfile(self.metrics_file)
+            if summary is not None and self.run_summary_dir:
+                extra = {"exchanges": list(self.adapters), "backend": self.backend, "workers": self.workers,
+                         **summary}
+                print(f"Run summary written to {PHASE_METRICS.write_summary(self.run_summary_dir, extra)}")
+        except OSError as e:
+            print(f"Error writing metrics: {e}")
+
+    def serve(self, pause_seconds=30, status_file="engine_status.json"):
+        """Scrape in cycles until SIGTERM or Ctrl+C, keeping browsers and the Sheets client warm.
+
+        Each cycle scrapes every currency, or what the refresh scheduler
+        plans when the engine has one, flushes the Sheets writes and rewrites
+        status_file with each exchange's staleness against its max_staleness
+        SLO. On a signal the currencies in progress finish and are written
+        before the browsers are closed.
+        """
+        stop = threading.Event()
+
+        def request_stop(signum, frame):
+            print(f"Received signal {signum}; finishing the currencies in progress...")
+            stop.set()
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+
+        for name, adapter in self.adapters.items():
+            if self.scheduler is not None:
+                # Markets about to break their exchange's SLO jump the queue
+                self.scheduler.max_intervals.setdefault(name, adapter.max_staleness)
+
+        started_at = datetime.now(timezone.utc)
+        sink = self.open_sink()
+        pool = self.create_pool(keep_drivers=True)
+        cycle = 0
+        try:
+            while not stop.is_set():
+                tasks = self.tasks()
+                if tasks:
+                    cycle += 1
+                    print(f"Starting cycle {cycle} with {len(tasks)} currencies.")
+                    self.scrape(pool, sink, tasks, stop)
+                    pool.report()
+                    for adapter in self.adapters.values():
+                        sink.finish(adapter)
+                    self.write_spreads()
+                self.write_status(status_file, started_at, cycle)
+                self.export_metrics()
+                stop.wait(pause_seconds)
+        finally:
+            pool.close()
+            self.close_sink(sink)
+            if self.backend != "api":
+                WAIT_STATS.report()
+                self.driver_factory.report()
+            self.write_status(status_file, started_at, cycle)
+            self.report_depth()
+            PHASE_METRICS.report()
+            self.export_metrics(summary={"cycles": cycle, "stop_reasons": self.stop_reasons})
+            print("Engine stopped.")
+
+    def staleness(self, started_at, now=None):
+        """Per exchange: the oldest currency, its age, the SLO and how many currencies are past it.
+
+        Currencies this engine has not scraped yet count as stale since started_at.
+        """
+        now = now or datetime.now(timezone.utc)
+        report = {}
+        for name, adapter in self.adapters.items():
+            ages = {}
+            for currency in adapter.fiat_currencies:
+                ages[currency] = now - self.last_scraped.get((name, currency), started_at)
+            oldest = max(ages, key=ages.get)
+            report[name] = {
+                "oldest_currency": oldest,
+                "max_staleness_seconds": round(ages[oldest].total_seconds()),
+                "slo_seconds": round(adapter.max_staleness.total_seconds()),
+                "currencies": len(ages),
+                "over_slo": sum(age > adapter.max_staleness for age in ages.values()),
+            }
+        return report
+
+    def write_status(self, path, started_at, cycles):
+        """Print each exchange's staleness and write it to path as JSON."""
+        now = datetime.now(timezone.utc)
+        report = self.staleness(started_at, now)
+        for name, status in report.items():
+            state = "OK" if not status["over_slo"] else f"{status['over_slo']} currencies over SLO"
+            print(f"{name}: oldest {status['oldest_currency']} at {status['max_staleness_seconds']}s "
+                  f"(SLO {status['slo_seconds']}s) - {state}")
+        if not path:
+            return
+
+        status = {"updated_at": now.isoformat(), "started_at": started_at.isoformat(), "cycles": cycles,
+                  "exchanges": report}
+        try:
+            # Replace atomically so a monitor never reads half a file
+            with open(path + ".tmp", "w") as f:
+                json.dump(status, f, indent=2)
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            print(f"Error writing the status file: {e}")
+
+
+def main():
+    from binance_adapter import BinanceAdapter
+    from bybit_adapter import BybitAdapter
+    from okx_adapter import OKXAdapter
+    from scraper_settings import GECKODRIVER_PATH
+
+    adapter_classes = {"binance": BinanceAdapter, "bybit": BybitAdapter, "okx": OKXAdapter}
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--exchanges", nargs="+", choices=list(adapter_classes), default=list(adapter_classes))
+    parser.add_argument("--backend", choices=("selenium", "api"), default="selenium")
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--budget-minutes", type=float, default=None,
+                        help="browser-minutes to spend, on the markets most likely to have changed")
+    parser.add_argument("--daemon", action="store_true", help="keep scraping until SIGTERM")
+    parser.add_argument("--max-staleness-minutes", type=float, default=None,
+                        help="staleness SLO for every exchange in daemon mode")
+    parser.add_argument("--pause", type=float, default=30, help="seconds between daemon cycles")
+    parser.add_argument("--checkpoint", default="p2p_checkpoint.jsonl",
+                        help="journal an interrupted run continues from ('' disables it)")
+    parser.add_argument("--retries", type=int, default=2, help="retries for currencies that failed")
+    parser.add_argument("--metrics-file", default=None,
+                        help="Prometheus textfile for the per-phase timing histograms")
+    parser.add_argument("--run-summary-dir", default="run_summaries",
+                        help="directory for each run's JSON timing summary ('' disables it)")
+    parser.add_argument("--html-parsing", action="store_true",
+                        help="copy each page's results table once and parse it with lxml")
+    parser.add_argument("--spreads-file", default=None,
+                        help="CSV file for the cross-exchange spreads of the latest prices")
+    parser.add_argument("--spread-depth", type=float, default=DEFAULT_DEPTH,
+                        help="USDT bought for the depth price in the spreads")
+    parser.add_argument("--stream", action="store_true",
+                        help="write every result page to the snapshot store as soon as it is scraped")
+    parser.add_argument("--jsonl", default=None,
+                        help="while streaming, also write every ad as JSON lines to this file ('-' for stdout)")
+    parser.add_argument("--bank-list", default=None,
+                        help="JSON bank list ({bank: [aliases]}) the payment options are filtered to")
+    parser.add_argument("--max-pages", type=int, default=None, help="read at most this many pages per currency")
+    parser.add_argument("--max-amount", type=float, default=None,
+                        help="stop a currency once its ads offer this much USDT")
+    parser.add_argument("--max-price-distance", type=float, default=None,
+                        help="stop a currency after a page with a price this many percent from the best")
+    args = parser.parse_args()
+
+    max_staleness = timedelta(minutes=args.max_staleness_minutes) if args.max_staleness_minutes else None
+    bank_filter = BankFilter.from_file(args.bank_list) if args.bank_list else None
+    depth_limit = DepthLimit(args.max_pages, args.max_amount, args.max_price_distance)
+    adapters = [adapter_classes[name](sheet_id=SHEET_IDS[name], max_staleness=max_staleness,
+                                      use_html_parsing=args.html_parsing, bank_filter=bank_filter,
+                                      depth_limit=depth_limit)
+                for name in args.exchanges]
+    scheduler = RefreshScheduler() if args.budget_minutes is not None else None
+    engine = P2PEngine(adapters, backend=args.backend, workers=args.workers,
+                       driver_factory=DriverFactory(GECKODRIVER_PATH), scheduler=scheduler,
+                       budget_minutes=args.budget_minutes, checkpoint_file=args.checkpoint,
+                       retries=args.retries, metrics_file=args.metrics_file,
+                       run_summary_dir=args.run_summary_dir, spreads_file=args.spreads_file,
+                       spread_depth=args.spread_depth, stream_pages=args.stream,
+                       page_sinks=[JSONLinesSink.from_path(args.jsonl)] if args.jsonl and args.stream else ())
+    if args.daemon:
+        engine.serve(pause_seconds=args.pause)
+    else:
+        engine.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""Stream each currency's result pages to the sinks while it is still being scraped.
+
+The scraping threads put every page on a PageStream, a bounded queue, as
+soon as it is scraped; the engine's thread takes them off in order and hands
+each page to every sink. When the sinks fall behind the queue fills up and
+the scrapers wait on it, so at most max_pages pages are in flight however
+deep a market is. Pages scraped in parallel tabs are held only until the
+pages before them arrive (see CurrencyPages).
+
+A sink implements the PageSink methods: write_page() for every page, then
+end_currency() once the currency is done (with the error if it failed),
+finish() at the end of every run or daemon cycle and close() once the engine
+is done with it. The sinks here write the Parquet snapshot
+store and JSON lines page by page; SheetsSink collects each currency and
+writes it whole, batched like a run without streaming.
+"""
+import json
+import queue
+import sys
+
+from ad_batch import AdBatch
+from phase_metrics import PHASE_METRICS
+from snapshot_store import SnapshotWriter
+
+
+class PageStream:
+    """Bounded hand-off of (exchange, currency) pages and results from the workers to one consumer."""
+
+    def __init__(self, max_pages=8):
+        self.queue = queue.Queue(max_pages)
+
+    def page_callback(self, task, depth=None):
+        """on_page(page, ads) for a scrape of task with the DepthTracker depth; blocks while the stream is full."""
+        def on_page(page, ads):
+            with PHASE_METRICS.time(task[0], "stream_wait"):
+                self.queue.put(("page", task, page, ads, depth))
+        return on_page
+
+    def end(self, task, result, error):
+        """Mark task done with its pool result or error."""
+        self.queue.put(("end", task, result, error))
+
+    def close(self):
+        """No more events will follow."""
+        self.queue.put(None)
+
+    def events(self):
+        """Yield ("page", task, page, ads, depth) and ("end", task, result, error) until close()."""
+        while True:
+            event = self.queue.get()
+            if event is None:
+                return
+            yield event
+
+
+class CurrencyPages:
+    """Put one currency's streamed pages back in page order and keep its running totals.
+
+    Pages from the parallel tabs arrive out of order, so a page waits until
+    every page before it has arrived. Ads that moved to the next page while
+    the tabs loaded are dropped from it, like merge_pages() does for a whole
+    currency. With the scrape's DepthTracker, pages past the page it stopped
+    on are dropped: a tab may have scraped them before the pages that met
+    the stop condition came in.
+    """
+
+    def __init__(self, depth=None):
+        self.depth = depth
+        self.next_page = 1
+        self.pending = {}
+        self.previous_keys = set()
+        self.rows = 0
+        self.best_price = None
+        self.total_amount = 0.0
+
+    def add(self, page, ads):
+        """Take one page; return the (page, ads) now ready to write, in order."""
+        self.pending[page] = ads
+        ready = []
+        while self.next_page in self.pending:
+            page = self.next_page
+            self.next_page += 1
+            if self.depth is not None and not self.depth.wanted(page):
+                self.pending.pop(page)
+                continue
+            ready.append(self._release(page))
+        return ready
+
+    def drain(self):
+        """Drop the pages still waiting once the currency ends; they come after a page that never came.
+
+        Returns the page numbers dropped.
+        """
+        dropped = sorted(self.pending)
+        if dropped:
+            wanted = [page for page in dropped if self.depth is None or self.depth.wanted(page)]
+            if wanted:
+                print(f"Page {self.next_page} never came; dropped pages {wanted} after it.")
+            self.pending.clear()
+        return dropped
+
+    def _release(self, page):
+        ads = self.pending.pop(page)
+        keys = [ads.row_key(index) for index in range(len(ads))]
+        if self.previous_keys and any(key in self.previous_keys for key in keys):
+            unique = AdBatch(ads.registry)
+            for index, key in enumerate(keys):
+                if key not in self.previous_keys:
+                    unique.append_from(ads, index)
+            print(f"Dropped {len(ads) - len(unique)} ads repeated from the previous page.")
+            ads = unique
+        self.previous_keys = set(keys)
+        if len(ads):
+            if self.best_price is None:
+                self.best_price = float(ads.prices[0])
+            self.rows += len(ads)
+            self.total_amount += float(ads.amount_array().sum())
+        return page, ads
+
+
+class PageSink:
+    """Where streamed pages go. Every method is optional."""
+
+    def open(self, adapter):
+        """Prepare for the adapter's currencies (once per exchange)."""
+
+    def write_page(self, adapter, currency, page, ads):
+        """Write one page of a currency; pages come in order, starting with page 1."""
+
+    def end_currency(self, adapter, currency, scraped_at, error=None):
+        """The currency's last page has been written, or its scrape failed with error."""
+
+    def finish(self, adapter):
+        """The run is over for the adapter's currencies."""
+
+    def close(self):
+        """Release the files the sink holds open; nothing is written after this."""
+
+
+class ParquetSink(PageSink):
+    """Append every streamed currency to the snapshot store, one row group per page."""
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        self.writers = {}
+
+    def write_page(self, adapter, currency, page, ads):
+        key = (adapter.name, currency)
+        with PHASE_METRICS.time(adapter.name, "snapshot_store"):
+            writer = self.writers.get(key)
+            if writer is None:
+                writer = self.writers[key] = SnapshotWriter(self.store_dir, adapter.name, currency)
+            writer.write(ads)
+
+    def end_currency(self, adapter, currency, scraped_at, error=None):
+        writer = self.writers.pop((adapter.name, currency), None)
+        if error is not None:
+            if writer is not None:
+                writer.abort()
+            return
+        with PHASE_METRICS.time(adapter.name, "snapshot_store"):
+            if writer is None:
+                # No pages at all: the store still records an empty scrape
+                writer = SnapshotWriter(self.store_dir, adapter.name, currency, scraped_at)
+                writer.write(AdBatch())
+            writer.close()
+
+
+class JSONLinesSink(PageSink):
+    """Write every streamed ad as one JSON object per line (to stdout by default).
+
+    close() closes the stream only if the sink opened it (from_path()).
+    """
+
+    def __init__(self, stream=None, owns_stream=False):
+        self.stream = stream or sys.stdout
+        self.owns_stream = owns_stream and stream is not None
+
+    @classmethod
+    def from_path(cls, path):
+        """A sink writing to path, or to stdout for "-"."""
+        if path == "-":
+            return cls()
+        return cls(open(path, "a", encoding="utf-8"), owns_stream=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def write_page(self, adapter, currency, page, ads):
+        lines = [
+            json.dumps({"exchange": adapter.name, "fiat": currency, "page": page, "advertiser": advertiser,
+                        "price": price, "amount": amount, "payment_methods": methods})
+            for advertiser, price, amount, methods in ads.rows()
+        ]
+        if lines:
+            self.stream.write("\n".join(lines) + "\n")
+            self.stream.flush()
+
+    def close(self):
+        if self.owns_stream:
+            self.stream.close()
+        else:
+            self.stream.flush()
+
+
+class PageFanout:
+    """Pass every call on to each of several sinks; a sink that fails does not stop the others."""
+
+    def __init__(self, sinks):
+        self.sinks = list(sinks)
+
+    def open(self, adapter):
+        self._each("open", adapter)
+
+    def write_page(self, adapter, currency, page, ads):
+        self._each("write_page", adapter, currency, page, ads)
+
+    def end_currency(self, adapter, currency, scraped_at, error=None):
+        self._each("end_currency", adapter, currency, scraped_at, error)
+
+    def finish(self, adapter):
+        self._each("finish", adapter)
+
+    def close(self):
+        """Close every sink that has a close(), even if another one fails."""
+        for sink in self.sinks:
+            close = getattr(sink, "close", None)
+            if close is None:
+                continue
+            try:
+                close()
+            except Exception as e:
+                print(f"Error in {type(sink).__name__}.close: {e}")
+
+    def _each(self, method, adapter, *args):
+        for sink in self.sinks:
+            try:
+                getattr(sink, method)(adapter, *args)
+            except Exception as e:
+                print(f"Error in {type(sink).__name__}.{method} for {adapter.name}"
+                      f"{f' {args[0]}' if args else ''}: {e}")
@@ -0,0 +1,138 @@
+import threading
+import time
+import weakref
+
+from selenium.common.exceptions import JavascriptException, TimeoutException, WebDriverException
+
+# Remembers the first row matching the selector and flags the first DOM mutation
+# that replaces it (or changes its text, for frameworks that reuse row nodes)
+OBSERVE_ROWS_JS = """
+const selector = arguments[0];
+if (window.__p2pRows && window.__p2pRows.observer) window.__p2pRows.observer.disconnect();
+const first = document.querySelector(selector);
+const state = window.__p2pRows = {selector, first, text: first ? first.textContent : null, changed: false};
+const replaced = () => {
+    const current = document.querySelector(selector);
+    return current !== state.first || (current !== null && current.textContent !== state.text);
+};
+state.observer = new MutationObserver(() => {
+    if (replaced()) {
+        state.changed = true;
+        state.observer.disconnect();
+    }
+});
+state.observer.observe(document.body, {childList: true, subtree: true, characterData: true});
+"""
+
+# Resolves as soon as the observed rows were replaced and a new first row is in the DOM
+WAIT_FOR_ROWS_JS = """
+const timeoutMs = arguments[0];
+const done = arguments[arguments.length - 1];
+const deadline = Date.now() + timeoutMs;
+const check = () => {
+    const state = window.__p2pRows;
+    if (!state) return done('navigated');
+    if (state.changed && document.querySelector(state.selector)) return done('changed');
+    if (Date.now() > deadline) return done('timeout');
+    setTimeout(check, 25);
+};
+check();
+"""
+
+
+class WaitStats:
+    """Seconds spent waiting for pages versus the fixed waits the old code paid."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.transitions = 0
+        self.timeouts = 0
+        self.waited = 0.0
+        self.fixed_budget = 0.0
+
+    def record(self, seconds, fixed_seconds, timed_out=False):
+        with self.lock:
+            self.transitions += 1
+            self.timeouts += timed_out
+            self.waited += seconds
+            self.fixed_budget += fixed_seconds
+
+    def report(self):
+        """Print waits, timeouts and the seconds saved against the fixed sleeps."""
+        saved = self.fixed_budget - self.waited
+        print(f"Page transitions: {self.transitions} ({self.timeouts} timed out), "
+              f"{self.waited:.1f}s waiting instead of {self.fixed_budget:.1f}s of fixed waits, "
+              f"{saved:.1f}s saved this sweep.")
+
+
+# Shared by every worker in the process
+WAIT_STATS = WaitStats()
+
+
+class PageTransition:
+    """Wait for the current results page to be replaced by the next one.
+
+    Use around the action that changes the page:
+
+        with PageTransition(driver, ".advertiser-name"):
+            next_button.click()
+
+    On exit it blocks (one WebDriver round trip) until the first row matching
+    row_selector is replaced and the new rows are in the DOM, or timeout
+    seconds pass. fixed_seconds is what the old fixed sleeps and popup waits
+    cost per page; it only feeds WAIT_STATS.
+    """
+
+    def __init__(self, driver, row_selector, timeout=10, fixed_seconds=0.0, stats=WAIT_STATS):
+        self.driver = driver
+        self.row_selector = row_selector
+        self.timeout = timeout
+        self.fixed_seconds = fixed_seconds
+        self.stats = stats
+        self.status = None
+
+    def __enter__(self):
+        self.driver.execute_script(OBSERVE_ROWS_JS, self.row_selector)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            return False
+        try:
+            self.driver.set_script_timeout(self.timeout + 5)
+            self.status = self.driver.execute_async_script(WAIT_FOR_ROWS_JS, int(self.timeout * 1000))
+        except (JavascriptException, TimeoutException):
+            self.status = "timeout"
+        except WebDriverException:
+            # The click triggered a full navigation that tore down the script context
+            self.status = "navigated"
+
+        seconds = time.perf_counter() - self.start
+        self.stats.record(seconds, self.fixed_seconds, timed_out=self.status == "timeout")
+        if self.status == "timeout":
+            print(f"Timeout after {seconds:.1f}s while waiting for the next page to render.")
+        return False
+
+    @property
+    def changed(self):
+        return self.status == "changed"
+
+
+_handled_sessions = {}
+_handled_lock = threading.Lock()
+
+
+def run_once_per_session(driver, key, handler):
+    """Run handler(driver) the first time it is asked for on this driver only.
+
+    Cookie banners and warning dialogs only show up once per browser session,
+    so waiting for them on every page costs their full timeout each time.
+    """
+    with _handled_lock:
+        handled = _handled_sessions.setdefault(key, weakref.WeakSet())
+        if driver in handled:
+            return False
+        handled.add(driver)
+    handler(driver)
+    return True
@@ -0,0 +1,70 @@
+"""Per payment method statistics of a scraped currency, computed in memory.
+
+Every ad is counted once under each of its payment methods. For each method
+the summary has the number of ads, the USDT they offer in total and the
+lowest, median and best price, where the best price is that of the method's
+first ad in the exchange's own ranking. SheetsSink writes the summaries to
+each workbook's Payment Methods worksheet and the Main sheet.
+"""
+import numpy as np
+import pandas as pd
+
+PAYMENT_METHODS_SHEET = "Payment Methods"
+SUMMARY_COLUMNS = ["Fiat", "Payment Method", "Ads", "Total USDT", "Min Price", "Median Price", "Best Price"]
+# 1-based span of SUMMARY_COLUMNS written as numbers
+SUMMARY_NUMBER_COLUMNS = (3, 7)
+
+
+def explode_methods(ads):
+    """(ad index, payment method id) arrays with one entry per ad and payment method."""
+    if not len(ads.method_ids):
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.int32)
+    offsets = np.frombuffer(ads.method_offsets, dtype=np.int32)
+    method_ids = np.frombuffer(ads.method_ids, dtype=np.int32)
+    return np.repeat(np.arange(len(ads)), np.diff(offsets)), method_ids
+
+
+def summarize_payment_methods(ads):
+    """DataFrame of every payment method's ads, total USDT and prices, most USDT first."""
+    ad_index, method_ids = explode_methods(ads)
+    return _summarize(method_ids, ads.price_array()[ad_index], ads.amount_array()[ad_index], ads.registry)
+
+
+def _summarize(method_ids, prices, amounts, registry):
+    exploded = pd.DataFrame({"method": method_ids, "price": prices, "amount": amounts})
+    # sort=False keeps the ads in page order, so "first" is the best ranked one
+    summary = exploded.groupby("method", sort=False).agg(
+        ads=("price", "size"), total=("amount", "sum"), min_price=("price", "min"),
+        median_price=("price", "median"), best_price=("price", "first"),
+    )
+    summary = summary.sort_values(["total", "ads"], ascending=False, kind="stable")
+    names = np.array(registry.names if registry is not None else [], dtype=object)
+    return pd.DataFrame({
+        "Payment Method": names[summary.index.to_numpy()] if len(summary) else [],
+        "Ads": summary["ads"].to_numpy(),
+        "Total USDT": summary["total"].to_numpy(),
+        "Min Price": summary["min_price"].to_numpy(),
+        "Median Price": summary["median_price"].to_numpy(),
+        "Best Price": summary["best_price"].to_numpy(),
+    })
+
+
+def summary_rows(currency, summary):
+    """Rows of the Payment Methods worksheet for one currency."""
+    return [[currency, method, int(count), float(total), float(low), float(median), float(best)]
+            for method, count, total, low, median, best in summary.itertuples(index=False)]
+
+
+def payment_options(summary, bank_filter=None):
+    """The Main sheet's payment options: every method (or those matching bank_filter), most USDT first."""
+    methods = list(summary["Payment Method"])
+    if bank_filter is not None:
+        methods = bank_filter.method_names(methods)
+    return ", ".join(methods)
+
+
+def amount_summary(summary):
+    """The Main sheet's amount summary: USDT and ads per payment method, one method per line."""
+    return "\n".join(f"{method}: {total:,.2f} USDT ({count} ad{'' if count == 1 else 's'})"
+                     for method, count, total in zip(summary["Payment Method"], summary["Ads"],
+                                                     summary["Total USDT"]))
@@ -0,0 +1,142 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Upper bounds in seconds; wide enough for a 1 ms row parse and a 2 minute Sheets flush
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+class Histogram:
+    """Prometheus-style histogram of one phase's durations."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds, times=1):
+        index = next((i for i, bound in enumerate(self.buckets) if seconds <= bound), len(self.buckets))
+        self.counts[index] += times
+        self.count += times
+        self.sum += seconds * times
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """Estimate a quantile by interpolating inside its bucket, as Prometheus' histogram_quantile does."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                if index == len(self.buckets):
+                    return self.max
+                lower = self.buckets[index - 1] if index else 0.0
+                return min(self.max, lower + (self.buckets[index] - lower) * (rank - seen) / count)
+            seen += count
+        return self.max
+
+
+class PhaseMetrics:
+    """Time spent per (exchange, phase), shared by every worker in the process.
+
+    Wrap a phase in `with PHASE_METRICS.time("bybit", "page_load"):` or
+    record a measured duration with observe(). write_textfile() exports the
+    histograms in the Prometheus text format (for node_exporter's textfile
+    collector) and write_summary() a JSON summary of the run.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.started_at = datetime.now(timezone.utc)
+
+    def observe(self, exchange, phase, seconds, times=1):
+        with self.lock:
+            histogram = self.histograms.get((exchange, phase))
+            if histogram is None:
+                histogram = self.histograms[(exchange, phase)] = Histogram()
+            histogram.observe(seconds, times)
+
+    @contextmanager
+    def time(self, exchange, phase):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(exchange, phase, time.perf_counter() - start)
+
+    def summary(self):
+        """{exchange: {phase: count, total, mean, p50, p95 and max seconds}}, phases by total time."""
+        with self.lock:
+            items = sorted(self.histograms.items(), key=lambda item: -item[1].sum)
+            summary = {}
+            for (exchange, phase), histogram in items:
+                summary.setdefault(exchange, {})[phase] = {
+                    "count": histogram.count,
+                    "total_seconds": round(histogram.sum, 3),
+                    "mean_seconds": round(histogram.sum / histogram.count, 4) if histogram.count else 0.0,
+                    "p50_seconds": round(histogram.quantile(0.5), 4),
+                    "p95_seconds": round(histogram.quantile(0.95), 4),
+                    "max_seconds": round(histogram.max, 4),
+                }
+            return summary
+
+    def report(self):
+        """Print where each exchange's time went, largest phase first."""
+        for exchange, phases in self.summary().items():
+            print(f"Time per phase for {exchange}:")
+            for phase, stats in phases.items():
+                print(f"  {phase:<16}{stats['total_seconds']:>10.1f}s total, {stats['count']:>6} x "
+                      f"{stats['mean_seconds'] * 1000:8.1f} ms mean, p95 {stats['p95_seconds'] * 1000:8.1f} ms")
+
+    def textfile(self):
+        """The histograms in the Prometheus text exposition format."""
+        lines = [
+            "# HELP p2p_phase_seconds Time spent in each phase of a scrape.",
+            "# TYPE p2p_phase_seconds histogram",
+        ]
+        with self.lock:
+            for (exchange, phase), histogram in sorted(self.histograms.items()):
+                labels = f'exchange="{exchange}",phase="{phase}"'
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+                    cumulative += count
+                    lines.append(f'p2p_phase_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f"p2p_phase_seconds_sum{{{labels}}} {histogram.sum:.6f}")
+                lines.append(f"p2p_phase_seconds_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path):
+        """Write the Prometheus textfile atomically so the collector never reads half of it."""
+        _write_atomic(path, self.textfile())
+
+    def write_summary(self, directory, extra=None):
+        """Write this run's summary to directory/run-<UTC time>.json and return the path."""
+        finished_at = datetime.now(timezone.utc)
+        summary = {
+            "started_at": self.started_at.isoformat(),
+            "finished_at": finished_at.isoformat(),
+            "wall_seconds": round((finished_at - self.started_at).total_seconds(), 3),
+            **(extra or {}),
+            "phases": self.summary(),
+        }
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"run-{finished_at:%Y%m%dT%H%M%S}.json")
+        _write_atomic(path, json.dumps(summary, indent=2))
+        return path
+
+
+def _write_atomic(path, text):
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(path + ".tmp", path)
+
+
+# Shared by every worker in the process
+PHASE_METRICS = PhaseMetrics()
@@ -0,0 +1,202 @@
+import heapq
+import math
+from datetime import datetime, timedelta, timezone
+
+from snapshot_store import query_frame
+
+# Rough browser cost of one currency, used until the scheduler has seen its ad count
+SECONDS_PER_CURRENCY = 6.0
+SECONDS_PER_PAGE = 2.0
+ROWS_PER_PAGE = 10
+
+
+class MarketStats:
+    """What the scheduler knows about one (exchange, fiat) market.
+
+    The change rate is a Poisson estimate, changes per hour of observed
+    time, where older observations decay with the given half-life so a
+    market that calms down (or heats up) is re-rated within a day or two.
+    """
+
+    def __init__(self, exchange, fiat):
+        self.exchange = exchange
+        self.fiat = fiat
+        self.last_scraped = None
+        self.best_price = None
+        self.ad_count = None
+        self.total_amount = None
+        self.changes = 0.0
+        self.exposure_hours = 0.0
+        self.observations = 0
+
+    def differs(self, best_price, ad_count, total_amount, price_tolerance, amount_tolerance):
+        """Whether a new observation counts as a change from the last one."""
+        if ad_count != self.ad_count:
+            return True
+        if best_price is None or self.best_price is None:
+            return best_price != self.best_price
+        if abs(best_price - self.best_price) > price_tolerance * abs(self.best_price):
+            return True
+        return abs(total_amount - self.total_amount) > amount_tolerance * max(abs(self.total_amount), 1.0)
+
+    def observe(self, scraped_at, best_price, ad_count, total_amount, half_life_hours,
+                price_tolerance, amount_tolerance):
+        """Fold one scrape into the change rate estimate."""
+        if self.last_scraped is not None:
+            hours = (scraped_at - self.last_scraped).total_seconds() / 3600
+            if hours <= 0:
+                return
+            changed = self.differs(best_price, ad_count, total_amount, price_tolerance, amount_tolerance)
+            decay = 0.5 ** (hours / half_life_hours)
+            self.changes = self.changes * decay + changed
+            self.exposure_hours = self.exposure_hours * decay + hours
+
+        self.last_scraped = scraped_at
+        self.best_price = best_price
+        self.ad_count = ad_count
+        self.total_amount = total_amount
+        self.observations += 1
+
+
+class RefreshScheduler:
+    """Spend a fixed scraping budget on the markets most likely to have changed.
+
+    Every scrape is recorded with record() / record_batch() (or replayed
+    from the Parquet history with load_history()). plan() then orders the
+    candidate (exchange, fiat) tasks by the probability that the market
+    changed since its last scrape, per browser-second it costs to scrape,
+    and cuts the list at the budget. Markets older than max_interval (or
+    their exchange's entry in max_intervals) always go first, so quiet fiats
+    like BIF or PGK still refresh.
+    """
+
+    def __init__(self, min_interval=timedelta(minutes=10), max_interval=timedelta(hours=6),
+                 half_life=timedelta(days=1), prior_changes=1.0, prior_hours=1.0,
+                 price_tolerance=0.001, amount_tolerance=0.05, stale_threshold=0.5, max_intervals=None):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_intervals = dict(max_intervals or {})
+        self.half_life_hours = half_life.total_seconds() / 3600
+        self.prior_changes = prior_changes
+        self.prior_hours = prior_hours
+        self.price_tolerance = price_tolerance
+        self.amount_tolerance = amount_tolerance
+        self.stale_threshold = stale_threshold
+        self.markets = {}
+
+    def market(self, exchange, fiat):
+        key = (exchange, fiat)
+        if key not in self.markets:
+            self.markets[key] = MarketStats(exchange, fiat)
+        return self.markets[key]
+
+    def max_interval_for(self, exchange):
+        return self.max_intervals.get(exchange, self.max_interval)
+
+    def record(self, exchange, fiat, scraped_at, best_price, ad_count, total_amount):
+        """Record one scrape's summary: the top ad's price, the number of ads and their total amount."""
+        self.market(exchange, fiat).observe(
+            scraped_at, best_price, ad_count, total_amount, self.half_life_hours,
+            self.price_tolerance, self.amount_tolerance,
+        )
+
+    def record_batch(self, exchange, fiat, ads, scraped_at=None):
+        """Record one scraped AdBatch."""
+        prices = ads.price_array()
+        self.record(exchange, fiat, scraped_at or datetime.now(timezone.utc),
+                    float(prices[0]) if len(prices) else None, len(ads), float(ads.amount_array().sum()))
+
+    def load_history(self, root, lookback=timedelta(days=3), now=None):
+        """Replay the last lookback of the Parquet snapshot store; return the number of scrapes read."""
+        now = now or datetime.now(timezone.utc)
+        frame = query_frame(root, start=now - lookback,
+                            columns=["exchange", "fiat", "scraped_at", "rank", "price", "amount"])
+        if frame.empty:
+            return 0
+
+        scrapes = summarize_scrapes(frame)
+        for row in scrapes.itertuples(index=False):
+            self.record(row.exchange, row.fiat, row.scraped_at.to_pydatetime(),
+                        row.best_price, row.ad_count, row.total_amount)
+        return len(scrapes)
+
+    def change_rate(self, exchange, fiat):
+        """Estimated changes per hour."""
+        stats = self.markets.get((exchange, fiat))
+        if stats is None:
+            return self.prior_changes / self.prior_hours
+        return (stats.changes + self.prior_changes) / (stats.exposure_hours + self.prior_hours)
+
+    def stale_probability(self, exchange, fiat, now):
+        """Probability that the market changed since it was last scraped."""
+        stats = self.markets.get((exchange, fiat))
+        if stats is None or stats.last_scraped is None:
+            return 1.0
+        hours = max(0.0, (now - stats.last_scraped).total_seconds() / 3600)
+        return 1.0 - math.exp(-self.change_rate(exchange, fiat) * hours)
+
+    def interval(self, exchange, fiat):
+        """Refresh interval at which the market reaches stale_threshold, clamped to [min_interval, max_interval]."""
+        hours = -math.log(1.0 - self.stale_threshold) / self.change_rate(exchange, fiat)
+        interval = max(self.min_interval, timedelta(seconds=round(hours * 3600)))
+        return min(self.max_interval_for(exchange), interval)
+
+    def cost(self, exchange, fiat):
+        """Estimated browser-seconds to scrape the market, from its last ad count."""
+        stats = self.markets.get((exchange, fiat))
+        if stats is None or not stats.ad_count:
+            return SECONDS_PER_CURRENCY + SECONDS_PER_PAGE
+        return SECONDS_PER_CURRENCY + SECONDS_PER_PAGE * math.ceil(stats.ad_count / ROWS_PER_PAGE)
+
+    def plan(self, tasks, budget_minutes=None, now=None):
+        """Order (exchange, fiat) tasks by priority and keep those that fit in budget_minutes.
+
+        Markets scraped less than min_interval ago are skipped unless their
+        max interval is even shorter. Without a
+        budget every remaining task is returned, most urgent first.
+        """
+        now = now or datetime.now(timezone.utc)
+        heap = []
+        for index, (exchange, fiat) in enumerate(tasks):
+            stats = self.markets.get((exchange, fiat))
+            age = now - stats.last_scraped if stats is not None and stats.last_scraped else None
+            overdue = age is None or age >= self.max_interval_for(exchange)
+            if not overdue and age < self.min_interval:
+                continue
+            score = self.stale_probability(exchange, fiat, now) / self.cost(exchange, fiat)
+            # heapq is a min-heap; the index keeps the caller's order among equal scores
+            heapq.heappush(heap, (not overdue, -score, index, exchange, fiat))
+
+        planned = []
+        budget_seconds = budget_minutes * 60 if budget_minutes is not None else math.inf
+        while heap:
+            _, _, _, exchange, fiat = heapq.heappop(heap)
+            cost = self.cost(exchange, fiat)
+            if cost > budget_seconds:
+                continue
+            budget_seconds -= cost
+            planned.append((exchange, fiat))
+        return planned
+
+    def report(self, now=None, limit=10):
+        """Print the most and least volatile markets with their refresh intervals."""
+        now = now or datetime.now(timezone.utc)
+        ranked = sorted(self.markets, key=lambda key: self.change_rate(*key), reverse=True)
+        if len(ranked) > 2 * limit:
+            ranked = ranked[:limit] + ranked[-limit:]
+        for exchange, fiat in ranked:
+            stats = self.markets[(exchange, fiat)]
+            print(f"{exchange:<8} {fiat:<4} {self.change_rate(exchange, fiat):6.2f} changes/h, "
+                  f"{stats.ad_count or 0:4d} ads, refresh every {self.interval(exchange, fiat)}, "
+                  f"stale p={self.stale_probability(exchange, fiat, now):.2f}")
+
+
+def summarize_scrapes(frame):
+    """One row per (exchange, fiat, scraped_at) with the top ad's price, ad count and total amount."""
+    frame = frame.sort_values(["scraped_at", "exchange", "fiat", "rank"])
+    grouped = frame.groupby(["exchange", "fiat", "scraped_at"], sort=False, observed=True)
+    scrapes = grouped.agg(best_price=("price", "first"), ad_count=("price", "size"),
+                          total_amount=("amount", "sum")).reset_index()
+    scrapes["exchange"] = scrapes["exchange"].astype(str)
+    scrapes["fiat"] = scrapes["fiat"].astype(str)
+    return scrapes.sort_values("scraped_at", kind="stable").reset_index(drop=True)
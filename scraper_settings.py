@@ -0,0 +1,116 @@
+"""Settings shared by the single-exchange scraper scripts, and the code that runs them.
+
+Each binance-/bybit-/okx-p2p-scraper.py script only sets its SHEET_ID and
+passes run_scraper() the settings below it does differently, by name:
+run_scraper(BybitAdapter, SHEET_ID, TAB_COUNT=2).
+"""
+from datetime import timedelta
+
+from bank_filter import BankFilter
+from depth_limits import DepthLimit
+from driver_factory import DriverFactory
+from p2p_engine import P2PEngine
+from refresh_scheduler import RefreshScheduler
+
+GECKODRIVER_PATH = "C:\\Program Files\\GeckoDriver\\geckodriver.exe"  # Path to your geckodriver
+
+# "selenium" renders the P2P pages in Firefox, "api" reads the exchange's JSON endpoints directly
+FETCH_BACKEND = "selenium"
+
+# Number of Firefox sessions (or API sessions) scraping currencies at the same time
+WORKER_COUNT = 1
+# Restart each worker's Firefox after this many currencies to cap memory growth
+RECYCLE_DRIVER_AFTER = 25
+# ...or after it has read this many result pages, whichever comes first
+RECYCLE_DRIVER_AFTER_PAGES = 200
+# Skip images, web fonts and analytics hosts when loading the P2P pages
+BLOCK_RESOURCES = True
+
+# Buffer every currency and write them all in a few batched Sheets requests at the end of the run
+BATCH_SHEETS_WRITES = True
+# Last grid written to each worksheet; batched writes only send the cells that changed since then
+SHEET_SNAPSHOT_DIR = "sheet_snapshots"
+
+# Every scrape is also appended to this local Parquet dataset (None disables it)
+SNAPSHOT_STORE_DIR = "p2p_history"
+# Browser-minutes per run, spent on the currencies most likely to have changed since their
+# last scrape (None scrapes every currency)
+REFRESH_BUDGET_MINUTES = None
+
+# Keep scraping in cycles until stopped (SIGTERM or Ctrl+C) instead of exiting after one pass
+DAEMON_MODE = False
+# Daemon mode: no currency should go longer than this without a fresh scrape
+MAX_STALENESS_MINUTES = 60
+# Daemon mode: seconds to wait between cycles, and the JSON file each exchange's staleness is
+# written to ({exchange} is the adapter's name)
+DAEMON_PAUSE_SECONDS = 30
+DAEMON_STATUS_FILE = "{exchange}_status.json"
+
+# Journal of the current sweep, so a run killed halfway continues where it stopped (None disables it)
+CHECKPOINT_FILE = "{exchange}_checkpoint.jsonl"
+# Currencies that fail are retried at the end of the sweep this many times, waiting
+# RETRY_BACKOFF_SECONDS before the first retry and twice as long before each next one
+FAILED_CURRENCY_RETRIES = 2
+RETRY_BACKOFF_SECONDS = 30
+
+# Per-phase timing histograms in the Prometheus text format, for node_exporter's textfile
+# collector (None disables it), and a directory for each run's JSON timing summary
+METRICS_TEXTFILE = None
+RUN_SUMMARY_DIR = "run_summaries"
+
+# Seconds to wait for the next page's rows to replace the current ones
+PAGE_TRANSITION_TIMEOUT = 10
+# Browser tabs loading result pages at the same time (1 clicks through the pages one by one)
+TAB_COUNT = 4
+# Extract every row in a single WebDriver round trip instead of one per cell
+USE_JS_EXTRACTION = True
+# Instead, copy the results table's HTML in one round trip and parse it here with lxml
+USE_HTML_PARSING = False
+
+# JSON bank list ({bank name: [aliases]}) the Main sheet's payment options are filtered to
+# (None lists every payment method)
+BANK_LIST_FILE = None
+
+# Stop reading a currency's pages after MAX_PAGES pages, once its ads offer MAX_AMOUNT USDT in
+# total, or after a page with a price more than MAX_PRICE_DISTANCE_PERCENT from the best ad
+# (None disables a condition; without any, every page is read)
+MAX_PAGES = None
+MAX_AMOUNT = None
+MAX_PRICE_DISTANCE_PERCENT = None
+
+
+def settings(**overrides):
+    """Every setting above by name, with overrides applied (unknown names raise ValueError)."""
+    values = {name: value for name, value in globals().items() if name.isupper()}
+    unknown = sorted(set(overrides) - set(values))
+    if unknown:
+        raise ValueError(f"Unknown scraper setting(s): {', '.join(unknown)}")
+    values.update(overrides)
+    return values
+
+
+def run_scraper(adapter_class, sheet_id, **overrides):
+    """Scrape one exchange into the workbook sheet_id with the settings above and overrides."""
+    s = settings(**overrides)
+    adapter = adapter_class(sheet_id=sheet_id, tab_count=s["TAB_COUNT"], use_js_extraction=s["USE_JS_EXTRACTION"],
+                            page_transition_timeout=s["PAGE_TRANSITION_TIMEOUT"],
+                            max_staleness=timedelta(minutes=s["MAX_STALENESS_MINUTES"]),
+                            use_html_parsing=s["USE_HTML_PARSING"],
+                            bank_filter=BankFilter.from_file(s["BANK_LIST_FILE"]) if s["BANK_LIST_FILE"] else None,
+                            depth_limit=DepthLimit(s["MAX_PAGES"], s["MAX_AMOUNT"], s["MAX_PRICE_DISTANCE_PERCENT"]))
+    driver_factory = DriverFactory(s["GECKODRIVER_PATH"], block_resources=s["BLOCK_RESOURCES"],
+                                   recycle_after_pages=s["RECYCLE_DRIVER_AFTER_PAGES"])
+    scheduler = RefreshScheduler() if s["REFRESH_BUDGET_MINUTES"] is not None else None
+    checkpoint_file = s["CHECKPOINT_FILE"] and s["CHECKPOINT_FILE"].format(exchange=adapter.name)
+    engine = P2PEngine([adapter], backend=s["FETCH_BACKEND"], workers=s["WORKER_COUNT"],
+                       recycle_after=s["RECYCLE_DRIVER_AFTER"], driver_factory=driver_factory,
+                       batch_sheets_writes=s["BATCH_SHEETS_WRITES"], sheet_snapshot_dir=s["SHEET_SNAPSHOT_DIR"],
+                       snapshot_store_dir=s["SNAPSHOT_STORE_DIR"], scheduler=scheduler,
+                       budget_minutes=s["REFRESH_BUDGET_MINUTES"], checkpoint_file=checkpoint_file,
+                       retries=s["FAILED_CURRENCY_RETRIES"], retry_backoff=s["RETRY_BACKOFF_SECONDS"],
+                       metrics_file=s["METRICS_TEXTFILE"], run_summary_dir=s["RUN_SUMMARY_DIR"])
+    if s["DAEMON_MODE"]:
+        status_file = s["DAEMON_STATUS_FILE"] and s["DAEMON_STATUS_FILE"].format(exchange=adapter.name)
+        engine.serve(pause_seconds=s["DAEMON_PAUSE_SECONDS"], status_file=status_file)
+    else:
+        engine.run()
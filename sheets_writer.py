@@ -0,0 +1,309 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Google recommends keeping Sheets API request bodies under 2 MB
+MAX_PAYLOAD_BYTES = 2_000_000
+
+# Largest magnitude the Sheets API accepts for a number
+SHEETS_FLOAT_LIMIT = 1e308
+
+# Columns written as numbers; every other column is written as text
+NUMBER_COLUMNS = ("Price", "Available Amount")
+
+# Size of worksheets created for new currencies (same as the old add_worksheet call)
+NEW_SHEET_ROWS = 1000
+NEW_SHEET_COLS = 10
+
+
+def a1_range(title, cells):
+    """Build an A1 range such as 'USD'!A1, quoting the title in case it has spaces."""
+    return "'{}'!{}".format(title.replace("'", "''"), cells)
+
+
+def clean_float_series(values):
+    """Vectorized clean_float_value: parse to float64, with unparsable or out-of-range values as 0.0."""
+    numbers = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").astype("float64")
+    # NaN and +/-inf fail the comparison, so they become 0.0 as well
+    return numbers.where(numbers.abs() <= SHEETS_FLOAT_LIMIT, 0.0)
+
+
+def dataframe_to_values(df, number_columns=NUMBER_COLUMNS, header=True):
+    """Convert a DataFrame to the nested lists the Sheets API takes, one column at a time.
+
+    Number columns become Python floats, everything else str. The rows are
+    assembled in an object array so no Python code runs per row.
+    """
+    grid = np.empty((len(df), len(df.columns)), dtype=object)
+    for index, name in enumerate(df.columns):
+        if name in number_columns:
+            grid[:, index] = clean_float_series(df[name].to_numpy()).tolist()
+        else:
+            grid[:, index] = df[name].to_numpy(dtype=object).astype(str).tolist()
+    rows = grid.tolist()
+    return [df.columns.tolist()] + rows if header else rows
+
+
+def column_letter(index):
+    """Spreadsheet column letters for a 0-based column index (0 -> A, 26 -> AA)."""
+    letters = ""
+    index += 1
+    while index:
+        index, rest = divmod(index - 1, 26)
+        letters = chr(ord("A") + rest) + letters
+    return letters
+
+
+def changed_ranges(old_grid, new_grid):
+    """Return the (first row, end row, first column, end column) blocks of new_grid that differ from old_grid.
+
+    Rows are compared by index, so the sheet keeps the scraped order. Runs of
+    changed rows are grouped into one block spanning the columns that changed
+    in any of them; a row shorter than before is padded with blanks so the
+    cells it no longer has are cleared.
+    """
+    blocks = []
+    block = None
+    for index, row in enumerate(new_grid):
+        old_row = old_grid[index] if index < len(old_grid) else None
+        if old_row is None:
+            columns = (0, len(row))
+        else:
+            width = max(len(row), len(old_row))
+            changed = [column for column in range(width)
+                       if (row[column] if column < len(row) else "")
+                       != (old_row[column] if column < len(old_row) else "")]
+            columns = (changed[0], changed[-1] + 1) if changed else None
+        if columns is None:
+            if block is not None:
+                blocks.append(tuple(block))
+                block = None
+        elif block is None:
+            block = [index, index + 1, *columns]
+        else:
+            block[1] = index + 1
+            block[2] = min(block[2], columns[0])
+            block[3] = max(block[3], columns[1])
+    if block is not None:
+        blocks.append(tuple(block))
+    return blocks
+
+
+def _padded(row, first, end):
+    return [row[column] if column < len(row) else "" for column in range(first, end)]
+
+
+class BatchedSheetsWriter:
+    """Buffer worksheet writes and commit them with as few Sheets API requests as possible.
+
+    write_table() replaces a worksheet's contents (creating the worksheet if
+    needed), write_range() updates a single range such as the Main sheet
+    timestamps. Nothing is sent until flush(), which costs one metadata read,
+    one spreadsheets.batchUpdate (add sheets, resize, clear, number formats) and
+    one values.batchUpdate per MAX_PAYLOAD_BYTES of values.
+
+    With a snapshot_dir, the last grid written for each (exchange, worksheet) is
+    kept on disk and later writes only send the cells that changed, compared
+    row by row in the scraped order. Without a snapshot the worksheet is
+    cleared and rewritten.
+    """
+
+    def __init__(self, workbook, max_payload_bytes=MAX_PAYLOAD_BYTES, snapshot_dir=None, exchange=None):
+        self.workbook = workbook
+        self.max_payload_bytes = max_payload_bytes
+        self.snapshot_dir = os.path.join(snapshot_dir, exchange or "default") if snapshot_dir else None
+        self.tables = {}
+        self.ranges = []
+        self.requests = 0
+        self.payload_bytes = 0
+
+    def write_table(self, title, values, number_columns=None, number_pattern="#,##0.00"):
+        """Replace the contents of worksheet `title` with values (header row first).
+
+        number_columns is an optional 1-based (first, last) column span whose data
+        rows get a NUMBER format.
+        """
+        self.tables[title] = (values, number_columns, number_pattern)
+
+    def write_range(self, title, cells, values):
+        """Update one range of an existing worksheet."""
+        self.ranges.append((a1_range(title, cells), values))
+
+    def flush(self):
+        """Send every buffered write and return the number of API requests used."""
+        if not self.tables and not self.ranges:
+            return 0
+        requests_before = self.requests
+        bytes_before = self.payload_bytes
+
+        worksheets = {worksheet.title: worksheet for worksheet in self.workbook.worksheets()}
+        self.requests += 1
+
+        plans = {title: self._plan_table(title, table[0], worksheets.get(title)) for title, table in self.tables.items()}
+
+        # A flush that fails halfway leaves the sheet out of step with its snapshot,
+        # so drop the snapshots now and only write them back once everything is sent
+        for title in plans:
+            self._drop_snapshot(title)
+
+        sheet_requests = self._sheet_requests(worksheets, plans)
+        if sheet_requests:
+            self._send(self.workbook.batch_update, {"requests": sheet_requests})
+
+        value_ranges = [value_range for plan in plans.values() for value_range in plan["value_ranges"]]
+        value_ranges += [{"range": range_name, "values": values} for range_name, values in self.ranges]
+        for chunk in self._chunk_value_ranges(value_ranges):
+            self._send(self.workbook.values_batch_update, {"valueInputOption": "RAW", "data": chunk})
+
+        for title, plan in plans.items():
+            self._save_snapshot(title, plan["grid"])
+
+        used = self.requests - requests_before
+        unchanged = sum(1 for plan in plans.values() if not plan["value_ranges"] and not plan["full"])
+        print(f"Flushed {len(self.tables)} worksheets ({unchanged} unchanged) and {len(self.ranges)} ranges "
+              f"in {used} Sheets API requests, {self.payload_bytes - bytes_before} payload bytes.")
+        self.tables = {}
+        self.ranges = []
+        return used
+
+    def _send(self, method, body):
+        self.payload_bytes += len(json.dumps(body))
+        method(body)
+        self.requests += 1
+
+    def _snapshot_path(self, title):
+        return os.path.join(self.snapshot_dir, f"{title}.json")
+
+    def _load_snapshot(self, title):
+        if not self.snapshot_dir:
+            return None
+        try:
+            with open(self._snapshot_path(title), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _drop_snapshot(self, title):
+        if self.snapshot_dir and os.path.exists(self._snapshot_path(title)):
+            os.remove(self._snapshot_path(title))
+
+    def _save_snapshot(self, title, grid):
+        if not self.snapshot_dir:
+            return
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        path = self._snapshot_path(title)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(grid, f)
+        os.replace(path + ".tmp", path)
+
+    def _plan_table(self, title, values, worksheet):
+        """Decide what to send for one table: the whole grid, or only the cells that changed."""
+        old_grid = self._load_snapshot(title) if worksheet is not None else None
+        if old_grid is None or not values or not old_grid:
+            value_ranges = [{"range": a1_range(title, "A1"), "values": values}] if values else []
+            return {"full": True, "grid": values, "value_ranges": value_ranges, "clear_from": None, "grew": True}
+
+        grid = values
+        value_ranges = [
+            {"range": a1_range(title, f"{column_letter(first_column)}{start + 1}"),
+             "values": [_padded(row, first_column, end_column) for row in grid[start:end]]}
+            for start, end, first_column, end_column in changed_ranges(old_grid, grid)
+        ]
+        return {
+            "full": False,
+            "grid": grid,
+            "value_ranges": value_ranges,
+            "clear_from": len(grid) if len(grid) < len(old_grid) else None,
+            "grew": len(grid) > len(old_grid),
+        }
+
+    def _sheet_requests(self, worksheets, plans):
+        """Build the spreadsheets.batchUpdate requests that prepare every buffered table."""
+        requests = []
+        next_sheet_id = max((worksheet.id for worksheet in worksheets.values()), default=0) + 1
+
+        for title, (values, number_columns, number_pattern) in self.tables.items():
+            plan = plans[title]
+            row_count = len(plan["grid"])
+            worksheet = worksheets.get(title)
+            if worksheet is None:
+                sheet_id = next_sheet_id
+                next_sheet_id += 1
+                requests.append({"addSheet": {"properties": {
+                    "sheetId": sheet_id,
+                    "title": title,
+                    "gridProperties": {"rowCount": max(NEW_SHEET_ROWS, row_count), "columnCount": NEW_SHEET_COLS},
+                }}})
+                print(f"Created new worksheet for {title}...")
+            else:
+                sheet_id = worksheet.id
+                if row_count > worksheet.row_count:
+                    requests.append({"updateSheetProperties": {
+                        "properties": {"sheetId": sheet_id, "gridProperties": {"rowCount": row_count}},
+                        "fields": "gridProperties.rowCount",
+                    }})
+                if plan["full"]:
+                    # Same effect as worksheet.clear(): drop the values, keep the formatting
+                    requests.append({"updateCells": {"range": {"sheetId": sheet_id}, "fields": "userEnteredValue"}})
+                elif plan["clear_from"] is not None:
+                    # The table shrank: clear the rows below it
+                    requests.append({"updateCells": {
+                        "range": {"sheetId": sheet_id, "startRowIndex": plan["clear_from"]},
+                        "fields": "userEnteredValue",
+                    }})
+
+            if number_columns and row_count > 1 and plan["grew"]:
+                first, last = number_columns
+                requests.append({"repeatCell": {
+                    "range": {
+                        "sheetId": sheet_id,
+                        "startRowIndex": 1,
+                        "endRowIndex": row_count,
+                        "startColumnIndex": first - 1,
+                        "endColumnIndex": last,
+                    },
+                    "cell": {"userEnteredFormat": {"numberFormat": {"type": "NUMBER", "pattern": number_pattern}}},
+                    "fields": "userEnteredFormat.numberFormat",
+                }})
+        return requests
+
+    def _chunk_value_ranges(self, value_ranges):
+        """Group value ranges into request bodies under the payload limit, splitting large ranges by rows."""
+        # The body around the ranges, and the ", " between two of them
+        envelope = len(json.dumps({"valueInputOption": "RAW", "data": []}))
+        budget = self.max_payload_bytes - envelope
+        chunk, chunk_bytes = [], 0
+        for value_range in self._split_large_ranges(value_ranges, budget):
+            size = len(json.dumps(value_range))
+            if chunk and chunk_bytes + 2 + size > budget:
+                yield chunk
+                chunk, chunk_bytes = [], 0
+            chunk_bytes += size + (2 if chunk else 0)
+            chunk.append(value_range)
+        if chunk:
+            yield chunk
+
+    def _split_large_ranges(self, value_ranges, budget):
+        for value_range in value_ranges:
+            values = value_range["values"]
+            if len(values) < 2 or len(json.dumps(value_range)) <= budget:
+                yield value_range
+                continue
+
+            # Only whole-sheet tables (anchored at A1) are big enough to need splitting
+            sheet, start = value_range["range"].rsplit("!", 1)
+            start_row = int("".join(ch for ch in start if ch.isdigit()) or 1)
+            start_col = "".join(ch for ch in start if ch.isalpha()) or "A"
+            # A part with no rows yet, with room for the longest row number
+            empty = len(json.dumps({"range": f"{sheet}!{start_col}{start_row + len(values)}", "values": []}))
+            first, part_bytes = 0, empty
+            for offset, row in enumerate(values):
+                row_bytes = len(json.dumps(row)) + (2 if offset > first else 0)
+                if offset > first and part_bytes + row_bytes > budget:
+                    yield {"range": f"{sheet}!{start_col}{start_row + first}", "values": values[first:offset]}
+                    first, part_bytes = offset, empty
+                    row_bytes -= 2
+                part_bytes += row_bytes
+            yield {"range": f"{sheet}!{start_col}{start_row + first}", "values": values[first:]}
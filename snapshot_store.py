@@ -0,0 +1,188 @@
+import os
+import uuid
+from datetime import datetime, timezone
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Columns stored in every file; exchange, fiat and date live in the directory names
+SCHEMA = pa.schema([
+    ("scraped_at", pa.timestamp("ms", tz="UTC")),
+    ("rank", pa.int32()),
+    ("advertiser", pa.string()),
+    ("price", pa.float64()),
+    ("amount", pa.float64()),
+    ("payment_methods", pa.list_(pa.dictionary(pa.int32(), pa.string()))),
+])
+
+PARTITIONING = ds.partitioning(
+    pa.schema([("exchange", pa.string()), ("fiat", pa.string()), ("date", pa.string())]),
+    flavor="hive",
+)
+
+
+def _payment_methods_array(ads):
+    """Build a list<dictionary<string>> array straight from the batch's interned method ids.
+
+    The dictionary holds only the methods the batch uses, so every file stays
+    self-contained and does not grow with the process-wide registry.
+    """
+    used, codes = np.unique(np.frombuffer(ads.method_ids, np.int32), return_inverse=True)
+    names = pa.array([ads.registry.names[method_id] for method_id in used], pa.string())
+    methods = pa.DictionaryArray.from_arrays(pa.array(codes.astype(np.int32)), names)
+    return pa.ListArray.from_arrays(pa.array(ads.method_offsets, pa.int32()), methods)
+
+
+def _batch_table(ads, scraped_at, first_rank=1):
+    rows = len(ads)
+    return pa.Table.from_arrays([
+        pa.array([scraped_at] * rows, SCHEMA.field("scraped_at").type),
+        pa.array(range(first_rank, first_rank + rows), pa.int32()),
+        pa.array(ads.advertisers, pa.string()),
+        pa.array(ads.price_array(), pa.float64()),
+        pa.array(ads.amount_array(), pa.float64()),
+        _payment_methods_array(ads),
+    ], schema=SCHEMA)
+
+
+def _scrape_path(root, exchange, fiat, scraped_at):
+    directory = os.path.join(root, f"exchange={exchange}", f"fiat={fiat}", f"date={scraped_at:%Y-%m-%d}")
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"part-{scraped_at:%H%M%S%f}-{uuid.uuid4().hex[:8]}.parquet")
+
+
+def append_batch(root, exchange, fiat, ads, scraped_at=None):
+    """Append one currency's AdBatch to the dataset under root and return the file written.
+
+    Files are laid out as root/exchange=<exchange>/fiat=<fiat>/date=<YYYY-MM-DD>/,
+    one Parquet file per (exchange, fiat, scrape).
+    """
+    scraped_at = scraped_at or datetime.now(timezone.utc)
+    path = _scrape_path(root, exchange, fiat, scraped_at)
+    pq.write_table(_batch_table(ads, scraped_at), path)
+    return path
+
+
+class SnapshotWriter:
+    """Write one scrape to the dataset a page at a time, as one row group per page.
+
+    The file is written under a hidden name that dataset reads skip and only
+    gets its part-*.parquet name on close(), so queries never see half a
+    scrape. abort() drops it.
+    """
+
+    def __init__(self, root, exchange, fiat, scraped_at=None):
+        self.scraped_at = scraped_at or datetime.now(timezone.utc)
+        self.path = _scrape_path(root, exchange, fiat, self.scraped_at)
+        directory, name = os.path.split(self.path)
+        self.partial_path = os.path.join(directory, f".{name}.partial")
+        self.rows = 0
+        self._writer = pq.ParquetWriter(self.partial_path, SCHEMA)
+
+    def write(self, ads):
+        """Append one page's AdBatch; its ads are ranked after those already written."""
+        self._writer.write_table(_batch_table(ads, self.scraped_at, self.rows + 1))
+        self.rows += len(ads)
+
+    def close(self):
+        """Finish the file and return its path."""
+        self._writer.close()
+        os.replace(self.partial_path, self.path)
+        return self.path
+
+    def abort(self):
+        """Drop everything written so far."""
+        self._writer.close()
+        os.remove(self.partial_path)
+
+
+def _as_list(value):
+    if value is None:
+        return None
+    return [value] if isinstance(value, str) else list(value)
+
+
+def query(root, exchanges=None, fiats=None, start=None, end=None, columns=None):
+    """Read ads for the given exchanges, fiats and [start, end) time range as a pyarrow Table.
+
+    Only matching partition directories are opened (the date bounds prune whole
+    days) and only the requested columns are read. start and end are
+    timezone-aware datetimes.
+    """
+    if not os.path.isdir(root):
+        return SCHEMA.empty_table()
+
+    dataset = ds.dataset(root, format="parquet", partitioning=PARTITIONING)
+    if not dataset.files:
+        return SCHEMA.empty_table()
+
+    conditions = []
+    exchanges, fiats = _as_list(exchanges), _as_list(fiats)
+    if exchanges:
+        conditions.append(pc.field("exchange").isin(exchanges))
+    if fiats:
+        conditions.append(pc.field("fiat").isin(fiats))
+    if start is not None:
+        conditions.append(pc.field("date") >= f"{start.astimezone(timezone.utc):%Y-%m-%d}")
+        conditions.append(pc.field("scraped_at") >= pa.scalar(start, SCHEMA.field("scraped_at").type))
+    if end is not None:
+        conditions.append(pc.field("date") <= f"{end.astimezone(timezone.utc):%Y-%m-%d}")
+        conditions.append(pc.field("scraped_at") < pa.scalar(end, SCHEMA.field("scraped_at").type))
+
+    row_filter = None
+    for condition in conditions:
+        row_filter = condition if row_filter is None else row_filter & condition
+
+    return dataset.to_table(columns=columns, filter=row_filter)
+
+
+def _partition_values(root, key):
+    """(value, path) of every key=value directory directly under root."""
+    if not os.path.isdir(root):
+        return []
+    prefix = f"{key}="
+    return [(entry.name[len(prefix):], entry.path) for entry in os.scandir(root)
+            if entry.is_dir() and entry.name.startswith(prefix)]
+
+
+def latest_files(root, exchanges=None, fiats=None):
+    """The newest file of every (exchange, fiat) under root: the last date's last part file."""
+    exchanges, fiats = _as_list(exchanges), _as_list(fiats)
+    files = []
+    for exchange, exchange_dir in _partition_values(root, "exchange"):
+        if exchanges and exchange not in exchanges:
+            continue
+        for fiat, fiat_dir in _partition_values(exchange_dir, "fiat"):
+            if fiats and fiat not in fiats:
+                continue
+            for _, date_dir in sorted(_partition_values(fiat_dir, "date"), reverse=True):
+                # Part files are named after their scrape time, so the last name is the newest
+                parts = sorted(name for name in os.listdir(date_dir) if name.endswith(".parquet"))
+                if parts:
+                    files.append(os.path.join(date_dir, parts[-1]))
+                    break
+    return files
+
+
+def latest(root, exchanges=None, fiats=None, since=None, columns=None):
+    """The most recent scrape of every (exchange, fiat) as one pyarrow Table.
+
+    Only one file per market is opened however long the history is. since
+    (a timezone-aware datetime) drops markets whose last scrape is older.
+    """
+    files = latest_files(root, exchanges, fiats)
+    if not files:
+        return SCHEMA.empty_table()
+    dataset = ds.dataset(files, format="parquet", partitioning=PARTITIONING, partition_base_dir=root)
+    row_filter = None
+    if since is not None:
+        row_filter = pc.field("scraped_at") >= pa.scalar(since, SCHEMA.field("scraped_at").type)
+    return dataset.to_table(columns=columns, filter=row_filter)
+
+
+def query_frame(root, **kwargs):
+    """query() as a pandas DataFrame."""
+    return query(root, **kwargs).to_pandas()
@@ -0,0 +1,191 @@
+"""Compare the latest USDT prices of every fiat across exchanges, per payment method.
+
+The scrapers read the buy-USDT side of each market, so every ad is an offer
+to sell USDT and the best price is the lowest. From the latest scrape of
+every (exchange, fiat) in the snapshot store this computes, per payment
+method and for all ads together ("All"):
+
+- the best price and the total USDT on offer on each exchange,
+- the liquidity-weighted price of buying `depth` USDT, walking the ads from
+  the cheapest up (blank when the exchange has less than that on offer),
+- which exchange is cheapest and the spread between the cheapest and the
+  dearest exchange, at the best price and at depth.
+
+Every fiat is done in one pass of pandas group operations, and only the
+newest file of each market is read (see snapshot_store.latest), so the cost
+does not grow with the history.
+
+Usage: python spread_analytics.py [--store p2p_history] [--depth 1000] [--output spreads.csv]
+                                  [--bank-list banks.json] [--sheet-id ID]
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from bank_filter import BankFilter, normalize_name
+from snapshot_store import latest
+
+ALL_METHODS = "All"
+DEFAULT_DEPTH = 1000.0
+SPREADS_SHEET = "Spreads"
+EXCHANGE_LABELS = {"binance": "Binance", "bybit": "Bybit", "okx": "OKX"}
+
+
+def method_levels(table, bank_filter=None):
+    """DataFrame of (exchange, fiat, method, price, amount), one row per ad and payment method.
+
+    Every ad also appears once under ALL_METHODS. Method names are matched
+    across exchanges by their normalized form, or by bank when bank_filter
+    knows them, and shown with the first spelling seen.
+    """
+    columns = {"exchange": [], "fiat": [], "method": [], "price": [], "amount": []}
+    display = {}
+    for batch in table.to_batches():
+        if not batch.num_rows:
+            continue
+        exchange = batch.column("exchange").to_numpy(zero_copy_only=False)
+        fiat = batch.column("fiat").to_numpy(zero_copy_only=False)
+        price = batch.column("price").to_numpy(zero_copy_only=False)
+        amount = batch.column("amount").to_numpy(zero_copy_only=False)
+        lists = batch.column("payment_methods")
+        methods = lists.flatten()
+        if not pa.types.is_dictionary(methods.type):
+            methods = pc.dictionary_encode(methods)
+        # One key per distinct name of the batch's dictionary
+        keys = np.array([_method_key(name, bank_filter, display) for name in methods.dictionary.to_pylist()]
+                        + [ALL_METHODS], dtype=object)
+        parents = pc.list_parent_indices(lists).to_numpy(zero_copy_only=False)
+        index = np.concatenate([methods.indices.to_numpy(zero_copy_only=False),
+                                np.full(batch.num_rows, len(keys) - 1)])
+        rows = np.concatenate([parents, np.arange(batch.num_rows)])
+        columns["exchange"].append(exchange[rows])
+        columns["fiat"].append(fiat[rows])
+        columns["method"].append(keys[index])
+        columns["price"].append(price[rows])
+        columns["amount"].append(amount[rows])
+    if not columns["price"]:
+        return pd.DataFrame({name: [] for name in columns}), display
+    return pd.DataFrame({name: np.concatenate(parts) for name, parts in columns.items()}), display
+
+
+def _method_key(name, bank_filter, display):
+    bank = bank_filter.bank_name(name) if bank_filter is not None else None
+    key = bank or normalize_name(name) or name
+    display.setdefault(key, bank or name)
+    return key
+
+
+def market_depth(levels, depth=DEFAULT_DEPTH):
+    """Best price, USDT on offer and the price of buying `depth` USDT per (fiat, method, exchange)."""
+    keys = ["fiat", "method", "exchange"]
+    levels = levels.sort_values(keys + ["price"], kind="stable")
+    before = levels.groupby(keys, sort=False)["amount"].cumsum().to_numpy() - levels["amount"].to_numpy()
+    # The part of each ad bought on the way to `depth` USDT
+    taken = np.clip(depth - before, 0.0, levels["amount"].to_numpy())
+    levels = levels.assign(taken=taken, cost=taken * levels["price"].to_numpy())
+    markets = levels.groupby(keys, sort=False).agg(
+        best=("price", "min"), available=("amount", "sum"), taken=("taken", "sum"), cost=("cost", "sum"))
+    filled = markets["taken"] >= depth * (1 - 1e-9)
+    markets["depth_price"] = np.where(filled, markets["cost"] / markets["taken"].where(filled, 1.0), np.nan)
+    return markets[["best", "available", "depth_price"]]
+
+
+def cross_exchange_spreads(markets, depth=DEFAULT_DEPTH, display=None):
+    """One row per (fiat, method) quoted on at least two exchanges: each exchange's best price,
+    the cheapest exchange and the spreads in percent."""
+    best = markets["best"].unstack("exchange")
+    depth_price = markets["depth_price"].unstack("exchange")
+    quoted = best.notna().sum(axis=1) >= 2
+    best, depth_price = best[quoted], depth_price[quoted]
+    exchanges = list(best.columns)
+    if not len(best):
+        return pd.DataFrame(columns=["Fiat", "Payment Method", *[_label(name) for name in exchanges],
+                                     "Cheapest", "Spread %", f"Best @{depth:g}", "Depth Spread %"])
+
+    low, high = best.min(axis=1), best.max(axis=1)
+    depth_low, depth_high = depth_price.min(axis=1), depth_price.max(axis=1)
+    two_deep = depth_price.notna().sum(axis=1) >= 2
+    cheapest = np.array(exchanges, dtype=object)[np.nanargmin(best.to_numpy(), axis=1)]
+    fiats = best.index.get_level_values("fiat")
+    methods = best.index.get_level_values("method")
+    display = display or {}
+    frame = pd.DataFrame({
+        "Fiat": fiats,
+        "Payment Method": [display.get(method, method) for method in methods],
+        **{_label(name): best[name].to_numpy() for name in exchanges},
+        "Cheapest": [_label(name) for name in cheapest],
+        "Spread %": ((high - low) / low * 100).to_numpy(),
+        f"Best @{depth:g}": depth_low.to_numpy(),
+        "Depth Spread %": ((depth_high - depth_low) / depth_low * 100).where(two_deep).to_numpy(),
+    })
+    # All ads first, then the methods with the widest spread
+    frame["_all"] = methods != ALL_METHODS
+    frame = frame.sort_values(["Fiat", "_all", "Spread %"], ascending=[True, True, False], kind="stable")
+    return frame.drop(columns="_all").reset_index(drop=True)
+
+
+def _label(exchange):
+    return EXCHANGE_LABELS.get(exchange, exchange)
+
+
+def compute_spreads(store_dir, depth=DEFAULT_DEPTH, bank_filter=None, exchanges=None, fiats=None, max_age=None):
+    """The spread table (see cross_exchange_spreads) over the latest scrape of every market.
+
+    max_age (a timedelta) leaves out markets not scraped within it.
+    """
+    since = datetime.now(timezone.utc) - max_age if max_age is not None else None
+    table = latest(store_dir, exchanges=exchanges, fiats=fiats, since=since,
+                   columns=["exchange", "fiat", "price", "amount", "payment_methods"])
+    levels, display = method_levels(table, bank_filter)
+    return cross_exchange_spreads(market_depth(levels, depth), depth, display)
+
+
+def spread_values(frame):
+    """The spread table as Sheets rows: a header, then numbers as floats and blanks for missing ones."""
+    rows = frame.astype(object).where(frame.notna(), "").to_numpy().tolist()
+    return [frame.columns.tolist()] + rows
+
+
+def write_spreads(frame, path=None, workbook=None):
+    """Write the spread table to a CSV file and/or the Spreads worksheet of a gspread workbook."""
+    if path:
+        frame.to_csv(path, index=False)
+    if workbook is not None:
+        from sheets_writer import BatchedSheetsWriter
+        writer = BatchedSheetsWriter(workbook, snapshot_dir=None)
+        writer.write_table(SPREADS_SHEET, spread_values(frame), number_columns=(3, len(frame.columns)))
+        writer.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--store", default="p2p_history", help="snapshot store directory")
+    parser.add_argument("--depth", type=float, default=DEFAULT_DEPTH, help="USDT bought for the depth price")
+    parser.add_argument("--exchanges", nargs="+", default=None)
+    parser.add_argument("--fiats", nargs="+", default=None)
+    parser.add_argument("--max-age-minutes", type=float, default=None,
+                        help="leave out markets not scraped this recently")
+    parser.add_argument("--bank-list", default=None, help="JSON bank list used to match methods across exchanges")
+    parser.add_argument("--output", default="spreads.csv", help="CSV file ('' disables it)")
+    parser.add_argument("--sheet-id", default=None, help="workbook to write the Spreads worksheet to")
+    parser.add_argument("--credentials", default="credentials.json")
+    args = parser.parse_args()
+
+    bank_filter = BankFilter.from_file(args.bank_list) if args.bank_list else None
+    max_age = timedelta(minutes=args.max_age_minutes) if args.max_age_minutes else None
+    frame = compute_spreads(args.store, args.depth, bank_filter, args.exchanges, args.fiats, max_age)
+    workbook = None
+    if args.sheet_id:
+        from p2p_engine import authorize
+        workbook = authorize(args.credentials).open_by_key(args.sheet_id)
+    write_spreads(frame, args.output, workbook)
+    print(f"{len(frame)} fiat/payment method pairs quoted on several exchanges"
+          + (f", written to {args.output}" if args.output else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import json
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from ad_batch import AdBatch
+
+
+class SweepJournal:
+    """Append-only JSON-lines checkpoint of one sweep over (exchange, fiat) tasks.
+
+    Every finished currency is journaled with its ads, and every scraped
+    result page as it comes in, so when Firefox or the script dies halfway
+    through, the next run replays the finished currencies, reuses recent
+    pages and only scrapes what is left. A sweep that ran to the end is
+    closed with end(); the next begin() then starts a new one.
+
+    Events, one JSON object per line:
+        {"event": "start", "run_id", "at", "tasks": [[exchange, fiat], ...]}
+        {"event": "page", "run_id", "at", "exchange", "fiat", "page", "rows"}
+        {"event": "done", "run_id", "at", "exchange", "fiat", "rows"}
+        {"event": "failed", "run_id", "at", "exchange", "fiat", "attempt", "error"}
+        {"event": "end", "run_id", "at"}
+    """
+
+    def __init__(self, path, resume_within=timedelta(hours=6), page_max_age=timedelta(minutes=15)):
+        self.path = path
+        self.resume_within = resume_within
+        self.page_max_age = page_max_age
+        self.run_id = None
+        self.started_at = None
+        self.tasks = []
+        self.completed = {}
+        self.pages = {}
+        self.attempts = {}
+        self._lock = threading.Lock()
+
+    def begin(self, tasks):
+        """Start a sweep over tasks, or resume the interrupted one; return the tasks left to scrape.
+
+        An unfinished sweep is resumed with its own task list if it started
+        within resume_within; otherwise the journal is cleared.
+        """
+        self._load()
+        now = datetime.now(timezone.utc)
+        if self.run_id is not None and now - self.started_at <= self.resume_within:
+            remaining = [task for task in self.tasks if task not in self.completed]
+            print(f"Resuming sweep {self.run_id} from {self.started_at:%Y-%m-%d %H:%M:%S} UTC: "
+                  f"{len(self.completed)} of {len(self.tasks)} currencies already done.")
+            return remaining
+
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started_at = now
+        self.tasks = [tuple(task) for task in tasks]
+        self.completed, self.pages, self.attempts = {}, {}, {}
+        with open(self.path, "w", encoding="utf-8"):
+            pass
+        self._append({"event": "start", "tasks": self.tasks}, now)
+        return list(self.tasks)
+
+    @property
+    def active(self):
+        """Whether a sweep is open (between begin() and end())."""
+        return self.run_id is not None
+
+    def completed_batches(self):
+        """(exchange, fiat, ads, scraped_at) for every currency the resumed sweep had finished."""
+        return [(exchange, fiat, ads, scraped_at) for (exchange, fiat), (ads, scraped_at) in self.completed.items()]
+
+    def cached_pages(self, exchange, fiat):
+        """{page number: AdBatch} of the currency's pages scraped within page_max_age."""
+        cutoff = datetime.now(timezone.utc) - self.page_max_age
+        with self._lock:
+            pages = self.pages.get((exchange, fiat), {})
+            return {page: ads for page, (ads, scraped_at) in pages.items() if scraped_at >= cutoff}
+
+    def record_page(self, exchange, fiat, page, ads):
+        """Journal one scraped result page (called from the worker threads)."""
+        scraped_at = self._append({"event": "page", "exchange": exchange, "fiat": fiat, "page": page,
+                                   "rows": ads.rows()})
+        with self._lock:
+            self.pages.setdefault((exchange, fiat), {})[page] = (ads, scraped_at)
+
+    def record_done(self, exchange, fiat, ads, scraped_at):
+        """Journal a finished currency with all its ads."""
+        self._append({"event": "done", "exchange": exchange, "fiat": fiat, "rows": ads.rows()}, scraped_at)
+        with self._lock:
+            self.completed[(exchange, fiat)] = (ads, scraped_at)
+            self.pages.pop((exchange, fiat), None)
+
+    def record_failure(self, exchange, fiat, error):
+        """Journal a failed attempt and return how many attempts the currency has failed."""
+        with self._lock:
+            attempt = self.attempts.get((exchange, fiat), 0) + 1
+            self.attempts[(exchange, fiat)] = attempt
+        self._append({"event": "failed", "exchange": exchange, "fiat": fiat, "attempt": attempt,
+                      "error": str(error)})
+        return attempt
+
+    def end(self):
+        """Mark the sweep as finished so the next begin() starts over."""
+        self._append({"event": "end"})
+        self.run_id = None
+
+    def _append(self, entry, at=None):
+        at = at or datetime.now(timezone.utc)
+        line = json.dumps({**entry, "run_id": self.run_id, "at": at.isoformat()})
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        return at
+
+    def _load(self):
+        """Rebuild the state of the last unfinished sweep in the journal, if any."""
+        self.run_id = None
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # The last line may be cut short by the crash
+                    continue
+                event = entry["event"]
+                at = datetime.fromisoformat(entry["at"])
+                key = (entry.get("exchange"), entry.get("fiat"))
+                if event == "start":
+                    self.run_id = entry["run_id"]
+                    self.started_at = at
+                    self.tasks = [tuple(task) for task in entry["tasks"]]
+                    self.completed, self.pages, self.attempts = {}, {}, {}
+                elif entry["run_id"] != self.run_id:
+                    continue
+                elif event == "page":
+                    self.pages.setdefault(key, {})[entry["page"]] = (AdBatch.from_rows(entry["rows"]), at)
+                elif event == "done":
+                    self.completed[key] = (AdBatch.from_rows(entry["rows"]), at)
+                    self.pages.pop(key, None)
+                elif event == "failed":
+                    self.attempts[key] = entry["attempt"]
+                elif event == "end":
+                    self.run_id = None
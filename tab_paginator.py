@@ -0,0 +1,233 @@
+import time
+from collections import deque
+
+from selenium.common.exceptions import WebDriverException
+
+from ad_batch import AdBatch
+
+# Starts walking the pagination to page arguments[0] and returns straight away;
+# progress is left in window.__p2pGoto for POLL_TAB_JS. Page numbers that are not
+# visible yet are reached by clicking the highest visible number below them,
+# and every click waits for the first row to be replaced.
+GOTO_PAGE_JS = """
+const [target, itemSelector, rowSelector, timeoutMs] = arguments;
+const state = window.__p2pGoto = {page: target, done: false, error: null};
+const deadline = Date.now() + timeoutMs;
+const pageItems = () => Array.from(document.querySelectorAll(itemSelector))
+    .map(el => [parseInt(el.textContent.trim(), 10), el])
+    .filter(([n]) => !isNaN(n));
+const isActive = el => el.getAttribute('aria-current') === 'page' || /active/.test(el.className);
+const rowsReplaced = () => new Promise(resolve => {
+    const first = document.querySelector(rowSelector);
+    const text = first ? first.textContent : null;
+    const replaced = () => {
+        const current = document.querySelector(rowSelector);
+        return current !== null && (current !== first || current.textContent !== text);
+    };
+    const observer = new MutationObserver(() => {
+        if (replaced()) {
+            observer.disconnect();
+            resolve(true);
+        }
+    });
+    observer.observe(document.body, {childList: true, subtree: true, characterData: true});
+    setTimeout(() => { observer.disconnect(); resolve(replaced()); }, Math.max(0, deadline - Date.now()));
+});
+(async () => {
+    for (;;) {
+        if (Date.now() >= deadline) throw new Error(`timed out walking to page ${target}`);
+        const items = pageItems();
+        const exact = items.find(([n]) => n === target);
+        if (exact && isActive(exact[1])) break;
+        const step = exact || items
+            .filter(([n, el]) => n < target && !isActive(el))
+            .reduce((best, item) => (!best || item[0] > best[0] ? item : best), null);
+        if (!step) throw new Error(`page ${target} is not reachable from the pagination`);
+        const replaced = rowsReplaced();
+        step[1].click();
+        if (!(await replaced)) throw new Error(`page ${target} did not render`);
+        if (step === exact) break;
+    }
+    state.done = true;
+})().catch(e => { state.error = String(e && e.message || e); });
+"""
+
+# Whether a tab's page has loaded and how its pagination walk is going
+POLL_TAB_JS = """
+return {
+    ready: !window.__p2pLeaving && document.readyState === 'complete'
+        && document.querySelector(arguments[0]) !== null,
+    goto: window.__p2pGoto || null,
+};
+"""
+
+# Seconds between polling rounds when no tab made progress
+POLL_INTERVAL = 0.05
+
+
+def merge_pages(pages):
+    """Merge {page number: AdBatch} in page order, keeping the first copy of each ad.
+
+    Ads move between pages while the tabs load (an ad above them is taken or
+    a new one is posted), so the same ad can be scraped from two pages.
+    """
+    merged = AdBatch()
+    seen = set()
+    duplicates = 0
+    for page in sorted(pages):
+        batch = pages[page]
+        for index in range(len(batch)):
+            key = batch.row_key(index)
+            if key in seen:
+                duplicates += 1
+                continue
+            seen.add(key)
+            merged.append_from(batch, index)
+    if duplicates:
+        print(f"Dropped {duplicates} ads that shifted between pages while loading.")
+    return merged
+
+
+class TabPaginator:
+    """Scrape pages 2..max_pages of the current results page in several browser tabs at once.
+
+    Every tab loads the URL the driver is on and walks its own pagination to
+    the page it was given, all without blocking the WebDriver session, so the
+    tabs load and re-render in parallel while this loop polls them and
+    scrapes whichever is ready. A tab that finishes moves on to the next
+    unclaimed page from where it is. Pages that fail are retried once.
+    on_page(page, ads), if given, is called with every page scraped. Without
+    keep_pages the ads are only passed to on_page and scrape() returns None.
+    With a DepthTracker (depth) every page is added to it, and once it stops
+    no further page is started, the tabs still walking are closed and pages
+    past depth.stop_page are neither passed to on_page nor returned.
+    """
+
+    def __init__(self, item_selector, row_selector, scrape_page, tabs=4, page_timeout=30, on_page=None,
+                 keep_pages=True, depth=None):
+        self.item_selector = item_selector
+        self.row_selector = row_selector
+        self.scrape_page = scrape_page
+        self.tabs = tabs
+        self.page_timeout = page_timeout
+        self.on_page = on_page
+        self.keep_pages = keep_pages
+        self.depth = depth
+
+    def scrape(self, driver, max_pages, first_page, known_pages=None):
+        """Return every page's ads merged in page order; first_page is page 1, already scraped.
+
+        Pages in known_pages ({page number: AdBatch}, e.g. from a checkpoint)
+        are used as they are instead of being loaded again.
+        """
+        pages = {1: first_page}
+        for page, ads in (known_pages or {}).items():
+            if 1 < page <= max_pages:
+                pages[page] = ads
+        if len(pages) > 1:
+            print(f"Reusing {len(pages) - 1} checkpointed pages.")
+        if self.depth is not None:
+            for page in sorted(pages):
+                self.depth.add(page, pages[page])
+        todo = deque(page for page in range(2, max_pages + 1) if page not in pages)
+        attempts = {}
+        url = driver.current_url
+        main_tab = driver.current_window_handle
+        # handle -> [page being walked to (None while loading the URL), deadline]
+        tabs = {}
+
+        try:
+            for _ in range(min(self.tabs, len(todo))):
+                driver.switch_to.new_window("tab")
+                self._load(driver, url)
+                tabs[driver.current_window_handle] = [None, time.monotonic() + self.page_timeout]
+
+            while tabs:
+                progressed = False
+                for handle in list(tabs):
+                    driver.switch_to.window(handle)
+                    if self._poll(driver, handle, tabs, pages, todo, attempts, url):
+                        progressed = True
+                if not progressed:
+                    time.sleep(POLL_INTERVAL)
+        finally:
+            for handle in driver.window_handles:
+                if handle != main_tab:
+                    driver.switch_to.window(handle)
+                    driver.close()
+            driver.switch_to.window(main_tab)
+
+        if self._stopped():
+            print(f"Stopped after page {self.depth.stop_page} ({self.depth.reason}).")
+            max_pages = self.depth.stop_page
+            pages = {page: ads for page, ads in pages.items() if page <= max_pages}
+        missing = sorted(set(range(1, max_pages + 1)) - set(pages))
+        if missing:
+            print(f"Could not load pages {missing}; their ads are missing from this scrape.")
+        return merge_pages(pages) if self.keep_pages else None
+
+    def _load(self, driver, url):
+        # Assigning location returns at once, unlike driver.get, which waits for the load
+        # (the flag marks the old document so it is not mistaken for the new one)
+        driver.execute_script("window.__p2pLeaving = true; window.location.href = arguments[0];", url)
+
+    def _poll(self, driver, handle, tabs, pages, todo, attempts, url):
+        """Advance one tab; return True if it changed state."""
+        page, deadline = tabs[handle]
+        if self._stopped():
+            del tabs[handle]
+            driver.close()
+            return True
+        try:
+            status = driver.execute_script(POLL_TAB_JS, self.row_selector)
+        except WebDriverException as e:
+            status = {"ready": False, "goto": {"page": page, "done": False, "error": str(e)}}
+
+        if page is None:
+            if status["ready"]:
+                return self._assign(driver, handle, tabs, todo)
+            if time.monotonic() < deadline:
+                return False
+            print("A tab did not load in time; closing it.")
+            del tabs[handle]
+            driver.close()
+            return True
+
+        goto = status["goto"] or {}
+        if goto.get("page") == page and goto.get("done"):
+            ads = self.scrape_page(driver)
+            if self.depth is not None:
+                self.depth.add(page, ads)
+            # Without keep_pages only the page number is kept, to know which pages are done
+            pages[page] = ads if self.keep_pages else None
+            print(f"Scraped page {page} in a background tab.")
+            if self.on_page is not None and (self.depth is None or self.depth.wanted(page)):
+                self.on_page(page, ads)
+            return self._assign(driver, handle, tabs, todo)
+
+        error = goto.get("error") if goto.get("page") == page else None
+        if error is None and time.monotonic() < deadline:
+            return False
+
+        print(f"Failed to load page {page}: {error or 'timed out'}")
+        attempts[page] = attempts.get(page, 0) + 1
+        if attempts[page] < 2:
+            todo.append(page)
+        # Start the tab over from page 1 so its pagination is in a known state
+        self._load(driver, url)
+        tabs[handle] = [None, time.monotonic() + self.page_timeout]
+        return True
+
+    def _stopped(self):
+        return self.depth is not None and self.depth.stopped
+
+    def _assign(self, driver, handle, tabs, todo):
+        if not todo or self._stopped():
+            del tabs[handle]
+            driver.close()
+            return True
+        page = todo.popleft()
+        driver.execute_script(GOTO_PAGE_JS, page, self.item_selector, self.row_selector,
+                              int(self.page_timeout * 1000))
+        tabs[handle] = [page, time.monotonic() + self.page_timeout]
+        return True
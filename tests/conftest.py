@@ -0,0 +1,26 @@
+"""Shared fixtures: the repository modules and the local stand-in servers from benchmarks/."""
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (REPO_ROOT, os.path.join(REPO_ROOT, "benchmarks")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from fake_sheets import FakeSheetsServer, fake_client  # noqa: E402
+
+
+@pytest.fixture
+def sheets():
+    """A running FakeSheetsServer."""
+    with FakeSheetsServer() as server:
+        yield server
+
+
+@pytest.fixture
+def workbook(sheets):
+    """A gspread workbook on the fake server with an empty Main sheet."""
+    sheets.add_spreadsheet("test", {"Main": []})
+    return fake_client(sheets).open_by_key("test")
@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+from async_engine import HOST_LIMITS, snapshot
+from replay_server import ReplayServer, build_recording
+
+FIATS = ["USD", "EUR", "TRY"]
+ADS = 45
+# Loose enough that the test waits on the server, not the token buckets
+FAST_LIMITS = {name: {"concurrency": 4, "rate": 500.0, "burst": 50} for name in HOST_LIMITS}
+
+
+def run_snapshot(server, **kwargs):
+    return asyncio.run(snapshot(
+        base_urls={name: server.url for name in HOST_LIMITS},
+        host_limits=FAST_LIMITS,
+        fiat_lists={name: FIATS for name in HOST_LIMITS},
+        **kwargs,
+    ))
+
+
+@pytest.fixture(scope="module")
+def unthrottled():
+    with ReplayServer(build_recording(FIATS, ADS)) as server:
+        results, stats = run_snapshot(server)
+    return server, results, stats
+
+
+def test_snapshot_fetches_every_row(unthrottled):
+    server, results, stats = unthrottled
+    assert set(results) == {(name, fiat) for name in HOST_LIMITS for fiat in FIATS}
+    assert all(len(ads) == ADS for ads in results.values())
+    assert (stats.markets, stats.failed, stats.rows) == (9, 0, 9 * ADS)
+    # One request per page: 3 pages on binance, 5 on bybit (plus its payment list), 1 on okx
+    assert stats.requests == {"binance": 9, "bybit": 16, "okx": 3}
+    assert server.requests == 28
+
+
+@pytest.mark.parametrize("throttle_every", [3, 7])
+def test_snapshot_retries_throttled_requests(unthrottled, throttle_every):
+    with ReplayServer(build_recording(FIATS, ADS), throttle_every=throttle_every) as server:
+        results, stats = run_snapshot(server)
+
+    throttled = sum(stats.throttled.values())
+    assert throttled == server.requests // throttle_every > 0
+    # Every 429 was sent again and nothing was lost
+    assert sum(stats.requests.values()) == 28 + throttled
+    assert (stats.markets, stats.failed, stats.rows) == (9, 0, 9 * ADS)
+    expected = unthrottled[1]
+    assert all(results[market].advertisers == expected[market].advertisers for market in expected)
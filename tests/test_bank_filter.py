@@ -0,0 +1,91 @@
+import json
+
+import pyarrow as pa
+import pytest
+
+from ad_batch import AdBatch, PaymentMethodRegistry
+from bank_filter import NO_BANK, BankFilter, normalize_name
+
+BANKS = {
+    "Banco Santander": ["Santander", "Santander Rio"],
+    "Tinkoff": ["T-Bank"],
+    "Banco de Bogotá": [],
+}
+
+
+@pytest.fixture
+def bank_filter():
+    return BankFilter(BANKS)
+
+
+def test_normalize_name():
+    assert normalize_name("  Banco de BOGOTÁ (ACH) ") == "banco de bogota ach"
+
+
+@pytest.mark.parametrize("name, bank", [
+    ("Santander", "Banco Santander"),
+    ("SANTANDER RÍO", "Banco Santander"),
+    ("Santander Rio Transfer", "Banco Santander"),
+    ("Pay with T-Bank", "Tinkoff"),
+    ("Banco de Bogota", "Banco de Bogotá"),
+    ("Santandr", "Banco Santander"),
+    ("Tinkof", "Tinkoff"),
+    ("Wise", None),
+    ("", None),
+])
+def test_bank_name(bank_filter, name, bank):
+    assert bank_filter.bank_name(name) == bank
+
+
+def test_longest_alias_wins():
+    bank_filter = BankFilter({"Rio": ["Rio"], "Banco Santander": ["Santander Rio"]})
+    assert bank_filter.bank_name("Santander Rio Online") == "Banco Santander"
+
+
+def test_from_file(tmp_path):
+    path = tmp_path / "banks.json"
+    path.write_text(json.dumps(BANKS), encoding="utf-8")
+    assert BankFilter.from_file(path).names == list(BANKS)
+
+
+def make_ads(registry=None):
+    return AdBatch.from_rows([
+        ("a", 1.0, 10.0, ["Santander Rio"]),
+        ("b", 1.1, 20.0, ["Wise", "Revolut"]),
+        ("c", 1.2, 30.0, []),
+        ("d", 1.3, 40.0, ["Wise", "T-Bank"]),
+    ], registry or PaymentMethodRegistry())
+
+
+def test_filter_batch(bank_filter):
+    ads = make_ads()
+    assert bank_filter.ad_mask(ads).tolist() == [True, False, False, True]
+    assert bank_filter.filter_batch(ads, banks=["Tinkoff"]).advertisers == ["d"]
+    assert bank_filter.bank_ids(["Wise", "T-Bank"]).tolist() == [NO_BANK, 1]
+
+
+def test_registry_lookup_grows_with_the_registry(bank_filter):
+    registry = PaymentMethodRegistry()
+    assert bank_filter.ad_mask(make_ads(registry)).sum() == 2
+    ads = AdBatch.from_rows([("e", 1.4, 50.0, ["Banco de Bogotá"])], registry)
+    assert bank_filter.ad_mask(ads).tolist() == [True]
+
+
+def test_table_mask_matches_the_batch_mask(bank_filter):
+    ads = make_ads()
+    table = pa.table({"payment_methods": pa.array([ads.payment_methods(i) for i in range(len(ads))],
+                                                  type=pa.list_(pa.string()))})
+    assert bank_filter.table_mask(table).tolist() == bank_filter.ad_mask(ads).tolist()
+    assert bank_filter.filter_table(table, banks=["Banco Santander"]).num_rows == 1
+
+
+def test_unknown_bank_is_skipped_with_one_warning(bank_filter, capsys):
+    ads = make_ads()
+    for _ in range(2):
+        mask = bank_filter.ad_mask(ads, banks=["Tinkoff", "Nubank"])
+        assert mask.tolist() == [False, False, False, True]
+    assert capsys.readouterr().out.count("'Nubank' is not in the bank list") == 1
+
+
+def test_method_names_keep_their_order(bank_filter):
+    assert bank_filter.method_names(["Wise", "T-Bank", "Santander"]) == ["T-Bank", "Santander"]
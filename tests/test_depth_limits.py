@@ -0,0 +1,148 @@
+import pytest
+
+from ad_batch import AdBatch
+from depth_limits import STOP_ALL_PAGES, STOP_MAX_AMOUNT, STOP_MAX_PAGES, STOP_PRICE_DISTANCE, DepthLimit
+from page_pipeline import CurrencyPages
+from tab_paginator import POLL_TAB_JS, TabPaginator
+
+
+def page_ads(page, prices=None, amount=10.0, size=2):
+    prices = prices or [100.0 + page] * size
+    return AdBatch.from_rows([(f"p{page}_{index}", price, amount, ["Wise"]) for index, price in enumerate(prices)])
+
+
+def test_pages_are_checked_in_page_order():
+    depth = DepthLimit(max_amount=45).tracker()
+    assert not depth.add(3, page_ads(3))
+    assert not depth.add(2, page_ads(2))
+    assert depth.pages == 0
+    # Page 1 completes the run 1-3, which reaches 60 USDT on page 3
+    assert depth.add(1, page_ads(1))
+    assert (depth.stop_page, depth.reason, depth.amount) == (3, STOP_MAX_AMOUNT, 60.0)
+    assert depth.wanted(3) and not depth.wanted(4)
+
+
+@pytest.mark.parametrize("limit, stop_page, reason", [
+    (DepthLimit(max_pages=2), 2, STOP_MAX_PAGES),
+    (DepthLimit(max_amount=50), 3, STOP_MAX_AMOUNT),
+    (DepthLimit(max_price_distance=2.5), 4, STOP_PRICE_DISTANCE),
+    (DepthLimit(max_pages=10), None, STOP_ALL_PAGES),
+])
+def test_stop_conditions(limit, stop_page, reason):
+    depth = limit.tracker()
+    for page in range(1, 6):
+        if depth.add(page, page_ads(page, prices=[100.0, 100.0 + page - 1], amount=10.0)):
+            break
+    depth.finish()
+    assert (depth.stop_page, depth.reason) == (stop_page, reason)
+
+
+def test_page_limit():
+    assert DepthLimit(max_pages=3).page_limit(10) == 3
+    assert DepthLimit(max_pages=3).page_limit(None) == 3
+    assert DepthLimit().page_limit(10) == 10
+    assert not DepthLimit() and DepthLimit(max_amount=1)
+
+
+def test_currency_pages_drop_pages_past_the_stop_page():
+    depth = DepthLimit(max_amount=45).tracker()
+    pages = CurrencyPages(depth)
+    released = []
+    # A tab delivered page 4 before pages 2 and 3 stopped the scrape on page 3
+    for page in (1, 4, 2, 3):
+        depth.add(page, page_ads(page))
+        released += [number for number, _ in pages.add(page, page_ads(page))]
+    pages.drain()
+    assert depth.stop_page == 3
+    assert released == [1, 2, 3]
+
+
+def test_currency_pages_do_not_release_pages_after_a_missing_one():
+    pages = CurrencyPages()
+    assert [number for number, _ in pages.add(1, page_ads(1))] == [1]
+    assert pages.add(3, page_ads(3)) == []
+    assert pages.drain() == [3]
+    assert pages.rows == 2
+
+
+class FakeTabDriver:
+    """Just enough of a WebDriver for TabPaginator: tabs whose pages take a set number of polls to load."""
+
+    current_url = "http://fixture/p2p"
+
+    def __init__(self, polls_per_page):
+        self.polls_per_page = polls_per_page
+        self.tabs = {"main": {"goto": None, "wait": 0}}
+        self.current_window_handle = "main"
+        self.next_handle = 0
+        self.switch_to = self
+
+    # driver.switch_to
+    def new_window(self, kind):
+        self.next_handle += 1
+        handle = f"tab{self.next_handle}"
+        self.tabs[handle] = {"goto": None, "wait": 0}
+        self.current_window_handle = handle
+
+    def window(self, handle):
+        self.current_window_handle = handle
+
+    @property
+    def window_handles(self):
+        return list(self.tabs)
+
+    def close(self):
+        del self.tabs[self.current_window_handle]
+
+    def execute_script(self, script, *args):
+        tab = self.tabs[self.current_window_handle]
+        if script == POLL_TAB_JS:
+            if tab["goto"] is not None and not tab["goto"]["done"]:
+                tab["wait"] -= 1
+                tab["goto"]["done"] = tab["wait"] <= 0
+            return {"ready": True, "goto": dict(tab["goto"]) if tab["goto"] else None}
+        if "__p2pGoto" in script:
+            page = args[0]
+            tab["goto"] = {"page": page, "done": False, "error": None}
+            tab["wait"] = self.polls_per_page.get(page, 1)
+        return None
+
+    def current_page(self):
+        return self.tabs[self.current_window_handle]["goto"]["page"]
+
+
+def run_tabs(depth, polls_per_page, max_pages=8, keep_pages=True):
+    """Scrape pages 2..max_pages; return the merged ads, the pages a stream would write and the driver."""
+    driver = FakeTabDriver(polls_per_page)
+    # What the engine does with on_page while streaming
+    stream = CurrencyPages(depth)
+    streamed = [number for number, _ in stream.add(1, page_ads(1))]
+    paginator = TabPaginator("li", "tr", lambda driver: page_ads(driver.current_page()), tabs=4,
+                             on_page=lambda page, ads: streamed.extend(number for number, _ in stream.add(page, ads)),
+                             keep_pages=keep_pages, depth=depth)
+    first = page_ads(1)
+    depth.add(1, first)
+    ads = paginator.scrape(driver, max_pages, first)
+    stream.drain()
+    return ads, streamed, driver
+
+
+def test_tab_pages_past_the_stop_page_are_not_kept_or_streamed():
+    depth = DepthLimit(max_amount=55).tracker()
+    # Pages 2 and 3 are slow, so the tabs scrape pages 4 and 5 before the scrape stops on page 3
+    ads, streamed, driver = run_tabs(depth, {2: 6, 3: 6})
+
+    assert depth.stop_page == 3
+    assert sorted({row[0].split("_")[0] for row in ads.rows()}) == ["p1", "p2", "p3"]
+    assert streamed == [1, 2, 3]
+    assert driver.window_handles == ["main"]
+
+
+def test_tab_pages_all_load_without_a_stop():
+    depth = DepthLimit().tracker()
+    ads, streamed, _ = run_tabs(depth, {2: 3})
+    depth.finish()
+
+    assert len(ads) == 16
+    assert streamed == list(range(1, 9))
+    assert depth.reason == STOP_ALL_PAGES
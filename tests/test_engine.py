@@ -0,0 +1,173 @@
+"""P2PEngine sweeps over the api backend, with the ReplayServer and the fake Sheets endpoint."""
+import contextlib
+import functools
+import io
+import os
+import signal
+
+import pytest
+
+from bench_utils import load_adapter
+from depth_limits import DepthLimit
+from fake_sheets import fake_client
+from p2p_engine import P2PEngine
+from page_pipeline import JSONLinesSink
+from replay_server import ReplayServer, build_recording
+from snapshot_store import query_frame
+
+FIATS = ["USD", "EUR", "ARS"]
+
+
+@pytest.fixture
+def replay():
+    with ReplayServer(build_recording(FIATS, ads_per_fiat=45)) as server:
+        yield server
+
+
+def make_adapter(exchange, sheets, replay, fiats=FIATS):
+    adapter = load_adapter(exchange)
+    adapter.fiat_currencies = list(fiats)
+    adapter.sheet_id = f"test-{exchange}"
+    adapter.api_class = functools.partial(adapter.api_class, base_url=replay.url)
+    sheets.add_spreadsheet(adapter.sheet_id, {"Main": [["Fiat"]] + [[fiat] for fiat in fiats]})
+    return adapter
+
+
+def run_engine(adapters, sheets, tmp_path, **kwargs):
+    options = {"backend": "api", "retries": 0, "sheets_client": fake_client(sheets),
+               "sheet_snapshot_dir": str(tmp_path / "snapshots"), "snapshot_store_dir": str(tmp_path / "store"),
+               "run_summary_dir": None, **kwargs}
+    engine = P2PEngine(adapters, **options)
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine.run()
+    return engine
+
+
+def worksheet(sheets, adapter, title):
+    return sheets.spreadsheets[adapter.sheet_id].sheets[title]["values"]
+
+
+def expected_main_cells(rows):
+    """The Main sheet's payment options and amount summary for a currency's worksheet rows."""
+    totals, counts = {}, {}
+    for _, _, amount, methods in rows:
+        for method in methods.split(", ") if methods else []:
+            totals[method] = totals.get(method, 0.0) + amount
+            counts[method] = counts.get(method, 0) + 1
+    methods = sorted(totals, key=lambda method: (-round(totals[method], 6), -counts[method]))
+    return [", ".join(methods),
+            "\n".join(f"{method}: {totals[method]:,.2f} USDT ({counts[method]} ad{'' if counts[method] == 1 else 's'})"
+                      for method in methods)]
+
+
+def test_api_sweep_writes_every_currency(sheets, replay, tmp_path):
+    adapters = [make_adapter(exchange, sheets, replay) for exchange in ("binance", "bybit", "okx")]
+    run_engine(adapters, sheets, tmp_path, workers=2)
+
+    for adapter in adapters:
+        for fiat in FIATS:
+            rows = worksheet(sheets, adapter, fiat)
+            assert rows[0] == ["Advertiser Name", "Price", "Available Amount", "Payment Methods"]
+            assert len(rows) == 46
+        main = worksheet(sheets, adapter, "Main")
+        assert [row[0] for row in main[1:]] == FIATS
+        for fiat, row in zip(FIATS, main[1:]):
+            assert row[1:3] == expected_main_cells(worksheet(sheets, adapter, fiat)[1:])
+        assert "Payment Methods" in sheets.spreadsheets[adapter.sheet_id].sheets
+
+    frame = query_frame(str(tmp_path / "store"), columns=["exchange", "fiat"])
+    assert len(frame) == 3 * 3 * 45
+
+
+@pytest.mark.parametrize("stream_pages", [False, True])
+def test_depth_limits_stop_each_currency_and_record_why(sheets, replay, tmp_path, stream_pages):
+    adapter = make_adapter("bybit", sheets, replay)
+    adapter.depth_limit = DepthLimit(max_pages=2)
+    engine = run_engine([adapter], sheets, tmp_path, stream_pages=stream_pages)
+
+    for fiat in FIATS:
+        assert len(worksheet(sheets, adapter, fiat)) == 21
+        stopped = engine.stop_reasons["bybit"][fiat]
+        assert (stopped["reason"], stopped["pages"]) == ("max_pages", 2)
+    frame = query_frame(str(tmp_path / "store"), columns=["fiat"])
+    assert len(frame) == 3 * 20
+
+
+def test_streaming_sends_the_same_sheets_requests(sheets, replay, tmp_path):
+    calls = {}
+    for stream_pages in (False, True):
+        adapter = make_adapter("binance", sheets, replay)
+        sheets.calls.clear()
+        run_engine([adapter], sheets, tmp_path / str(stream_pages), stream_pages=stream_pages)
+        calls[stream_pages] = dict(sheets.calls)
+        assert all(len(worksheet(sheets, adapter, fiat)) == 46 for fiat in FIATS)
+    assert calls[True] == calls[False]
+
+
+class FailingAPI:
+    """Wrap an exchange API so one (fiat, page) request fails."""
+
+    def __init__(self, api, fiat, page):
+        self.api = api
+        self.failing = (fiat, page)
+
+    def __getattr__(self, name):
+        return getattr(self.api, name)
+
+    def request(self, fiat, page):
+        if (fiat, page) == self.failing:
+            raise ConnectionError("connection dropped")
+        return self.api.request(fiat, page)
+
+
+def test_streamed_currency_that_fails_keeps_its_previous_sheet(sheets, replay, tmp_path):
+    adapter = make_adapter("binance", sheets, replay)
+    previous = [["Advertiser Name", "Price", "Available Amount", "Payment Methods"], ["old", 1, 2, "Bank"]]
+    sheets.spreadsheets[adapter.sheet_id].add_sheet("EUR", values=[list(row) for row in previous])
+    api_class = adapter.api_class
+    adapter.api_class = lambda: FailingAPI(api_class(), "EUR", 2)
+    run_engine([adapter], sheets, tmp_path, stream_pages=True)
+
+    assert worksheet(sheets, adapter, "EUR") == previous
+    assert len(worksheet(sheets, adapter, "USD")) == 46
+    main = {row[0]: row for row in worksheet(sheets, adapter, "Main")[1:]}
+    assert main["USD"][3] and len(main["EUR"]) < 4
+    # The pages before the failure never reach the store either
+    assert set(query_frame(str(tmp_path / "store"), columns=["fiat"])["fiat"]) == {"USD", "ARS"}
+
+
+def test_daemon_sweeps_every_currency_without_a_scheduler(sheets, replay, tmp_path, monkeypatch):
+    adapter = make_adapter("okx", sheets, replay)
+    engine = P2PEngine([adapter], backend="api", retries=0, sheets_client=fake_client(sheets),
+                       sheet_snapshot_dir=str(tmp_path / "snapshots"), snapshot_store_dir=str(tmp_path / "store"))
+    write_status = engine.write_status
+    statuses = []
+
+    def stop_after_first_cycle(path, started_at, cycles):
+        write_status(path, started_at, cycles)
+        statuses.append((cycles, engine.staleness(started_at)))
+        os.kill(os.getpid(), signal.SIGTERM)
+
+    monkeypatch.setattr(engine, "write_status", stop_after_first_cycle)
+    handlers = {signum: signal.getsignal(signum) for signum in (signal.SIGTERM, signal.SIGINT)}
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine.serve(pause_seconds=0, status_file=None)
+    finally:
+        for signum, handler in handlers.items():
+            signal.signal(signum, handler)
+
+    assert engine.scheduler is None
+    assert set(engine.last_scraped) == {("okx", fiat) for fiat in FIATS}
+    cycles, report = statuses[0]
+    assert cycles == 1 and report["okx"]["over_slo"] == 0
+    assert all(len(worksheet(sheets, adapter, fiat)) == 46 for fiat in FIATS)
+
+
+def test_streamed_jsonl_file_is_closed_after_the_run(sheets, replay, tmp_path):
+    adapter = make_adapter("okx", sheets, replay)
+    jsonl = JSONLinesSink.from_path(str(tmp_path / "ads.jsonl"))
+    run_engine([adapter], sheets, tmp_path, stream_pages=True, page_sinks=[jsonl])
+
+    assert jsonl.stream.closed
+    assert len((tmp_path / "ads.jsonl").read_text(encoding="utf-8").splitlines()) == 45 * len(FIATS)
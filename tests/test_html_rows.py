@@ -0,0 +1,87 @@
+import pytest
+
+from bench_utils import load_adapter
+from fixture_pages import generate_rows, render_page
+from html_rows import TABLE_HTML_JS, RowParser, has_class
+
+EXCHANGES = ["binance", "bybit", "okx"]
+
+
+class PageDriver:
+    """Answers the one round trip of scrape_page_html() from fixed markup."""
+
+    def __init__(self, page_source, table_html=None):
+        self.page_source = page_source
+        self.table_html = table_html
+        self.scripts = []
+
+    def execute_script(self, script, *args):
+        self.scripts.append((script, args))
+        return self.table_html
+
+
+@pytest.mark.parametrize("exchange", EXCHANGES)
+def test_row_parser_reads_the_rendered_rows(exchange):
+    adapter = load_adapter(exchange)
+    rows = generate_rows(25, seed=3)
+    parsed = adapter.row_parser.parse(render_page(exchange, rows))
+
+    # The header row is not an ad
+    assert [row["advertiser"] for row in parsed] == [advertiser for advertiser, _, _, _ in rows]
+    assert adapter.ads_from_rows(parsed).rows() == rows
+
+
+@pytest.mark.parametrize("exchange", EXCHANGES)
+def test_row_without_payment_methods(exchange):
+    adapter = load_adapter(exchange)
+    rows = [("merchant_a", 1012.5, 300.0, []), ("merchant_b", 1013.0, 25000.75, ["Wise"])]
+    assert adapter.ads_from_rows(adapter.row_parser.parse(render_page(exchange, rows))).rows() == rows
+
+
+@pytest.mark.parametrize("exchange", EXCHANGES)
+def test_table_html_falls_back_to_the_page_source(exchange):
+    adapter = load_adapter(exchange)
+    rows = generate_rows(5)
+    page = render_page(exchange, rows)
+
+    driver = PageDriver(page)
+    assert adapter.scrape_page_html(driver).rows() == rows
+    assert driver.scripts == [(TABLE_HTML_JS, (adapter.table_selector,))]
+
+    table = page[page.index("<table>"):page.index("</table>") + len("</table>")]
+    assert adapter.scrape_page_html(PageDriver("<html></html>", table)).rows() == rows
+
+
+TABLE = """
+<table>
+  <tr><th>Name</th><th>Price</th><th>Tags</th></tr>
+  <tr><td class="name"> Alice
+      Smith </td><td class="price">1.5</td><td><i class="tag">A</i><i class="tag">B</i></td></tr>
+  <tr><td class="name"></td><td class="price">2.0</td><td></td></tr>
+  <tr><td class="name">Carol</td><td></td><td><i class="tag">C</i></td></tr>
+</table>
+"""
+
+
+def table_parser(**kwargs):
+    return RowParser(".//tr", {"name": f".//*[{has_class('name')}]", "price": f".//*[{has_class('price')}]"},
+                     {"tags": f".//*[{has_class('tag')}]"}, **kwargs)
+
+
+def test_skip_header_drops_the_first_row():
+    assert len(table_parser().parse(TABLE)) == 4
+    assert [row["name"] for row in table_parser(skip_header=True).parse(TABLE)] == ["Alice Smith", "", "Carol"]
+
+
+def test_empty_and_missing_cells():
+    rows = table_parser(skip_header=True).parse(TABLE)
+    assert rows[0] == {"name": "Alice Smith", "price": "1.5", "tags": ["A", "B"]}
+    # Whitespace is collapsed, an empty cell is an empty string and a missing one None
+    assert rows[1] == {"name": "", "price": "2.0", "tags": []}
+    assert rows[2] == {"name": "Carol", "price": None, "tags": ["C"]}
+
+
+def test_rows_missing_a_required_field_are_left_out():
+    rows = table_parser(required=("name", "price")).parse(TABLE)
+    assert [row["name"] for row in rows] == ["Alice Smith", ""]
+
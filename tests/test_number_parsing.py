@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+import number_parsing
+from bench_utils import load_adapter
+from number_parsing import NumberParser, decimal_vote, parse_number
+
+
+@pytest.mark.parametrize("token, mark", [
+    ("1,234.56", "."),
+    ("1.234,56", ","),
+    ("1.234.567", ","),
+    ("1,234,567", "."),
+    ("0,123", ","),
+    ("12.5", "."),
+    ("1234,567", ","),
+    ("1,234", None),
+    ("1.234", None),
+    ("1234", None),
+])
+def test_decimal_vote(token, mark):
+    assert decimal_vote(token) == mark
+
+
+@pytest.mark.parametrize("texts, expected", [
+    (["1,234.56 USDT", "12.5 USDT", "0.93 USDT"], [1234.56, 12.5, 0.93]),
+    (["1.234,56 EUR", "12,5 EUR"], [1234.56, 12.5]),
+    (["12 345,6", "1 234,50 RUB"], [12345.6, 1234.5]),
+    (["1'234.56 CHF", "99.1 CHF"], [1234.56, 99.1]),
+    (["≈ 0.92 EUR", "Price 1,050.00"], [0.92, 1050.0]),
+    (["1234.56", "7"], [1234.56, 7.0]),
+])
+def test_parse_column(texts, expected):
+    assert NumberParser().parse_column(texts).tolist() == expected
+
+
+def test_missing_numbers_are_nan():
+    values = NumberParser().parse_column(["12.5 USDT", "", None, "n/a", "inf"])
+    assert values[0] == 12.5
+    assert np.isnan(values[1:]).all()
+
+
+def test_units_that_differ_take_the_pattern_path():
+    values = NumberParser().parse_column(["1,234.56 USDT", "1,234.56 USD", "5 USDT extra 6"])
+    assert values.tolist() == [1234.56, 1234.56, 5.0]
+
+
+def test_ambiguous_column_uses_the_fiats_last_mark():
+    parser = NumberParser()
+    parser.parse_column(["1.234,56 EUR"], "EUR")
+    assert parser.parse_column(["1.234 EUR", "5.678 EUR"], "EUR").tolist() == [1234.0, 5678.0]
+    assert parser.parse_column(["1.234", "5.678"], "USD").tolist() == [1.234, 5.678]
+    assert parser.decimal_marks == {(None, "EUR"): ","}
+
+
+def test_one_exchanges_mark_does_not_decide_anothers():
+    parser = NumberParser()
+    parser.parse_column(["1.234,56 EUR"], "EUR", "bybit")
+    assert parser.parse_column(["1,234 EUR"], "EUR", "binance").tolist() == [1234.0]
+    assert parser.parse_column(["1,234 EUR"], "EUR", "bybit").tolist() == [1.234]
+    assert parser.decimal_marks == {("bybit", "EUR"): ","}
+
+
+def test_adapters_learn_their_own_marks(monkeypatch):
+    monkeypatch.setattr(number_parsing, "NUMBERS", NumberParser())
+    okx, binance = load_adapter("okx"), load_adapter("binance")
+    okx._scraping.fiat = binance._scraping.fiat = "EUR"
+
+    def row(price, amount):
+        return {"advertiser": "a", "price": price, "amount": amount, "payment_methods": []}
+
+    okx.ads_from_rows([row("1.234,56 EUR", "500,5 USDT")])
+    assert binance.ads_from_rows([row("1,234", "2,000 USDT")]).rows() == [("a", 1234.0, 2000.0, [])]
+    assert okx.ads_from_rows([row("1,234", "2,000 USDT")]).rows() == [("a", 1.234, 2.0, [])]
+
+
+def test_parse_number_raises_without_a_number():
+    assert parse_number("1,234.56 USDT") == 1234.56
+    with pytest.raises(ValueError):
+        parse_number("no price")
@@ -0,0 +1,57 @@
+import pytest
+
+from fixture_pages import generate_rows
+from p2p_api import EXCHANGE_APIS, APIFetcher, page_count
+from replay_server import ReplayServer, build_recording
+
+
+@pytest.fixture(scope="module")
+def replay():
+    with ReplayServer(build_recording(["USD", "EUR"], ads_per_fiat=45)) as server:
+        yield server
+
+
+@pytest.mark.parametrize("exchange", ["binance", "bybit", "okx"])
+def test_fetch_currency_returns_every_recorded_ad(replay, exchange):
+    fetcher = APIFetcher(EXCHANGE_APIS[exchange](base_url=replay.url))
+    try:
+        ads = fetcher.fetch_currency("EUR")
+    finally:
+        fetcher.quit()
+
+    expected = generate_rows(45, seed=1)
+    assert len(ads) == 45
+    for (advertiser, price, amount, methods), (want_advertiser, want_price, want_amount, want_methods) in zip(
+            ads.rows(), expected):
+        assert advertiser == want_advertiser
+        assert price == pytest.approx(want_price, abs=0.005)
+        assert amount == pytest.approx(want_amount, abs=0.005)
+        assert methods == list(want_methods)
+
+
+def test_pages_go_to_on_page_in_order_without_keeping_them(replay):
+    fetcher = APIFetcher(EXCHANGE_APIS["bybit"](base_url=replay.url))
+    pages = []
+    try:
+        result = fetcher.fetch_currency("USD", on_page=lambda page, ads: pages.append((page, len(ads))),
+                                        keep_ads=False)
+    finally:
+        fetcher.quit()
+
+    assert result is None
+    assert pages == [(1, 10), (2, 10), (3, 10), (4, 10), (5, 5)]
+
+
+def test_unknown_currency_is_empty(replay):
+    fetcher = APIFetcher(EXCHANGE_APIS["binance"](base_url=replay.url))
+    try:
+        assert len(fetcher.fetch_currency("XYZ")) == 0
+    finally:
+        fetcher.quit()
+
+
+def test_page_count():
+    assert page_count(45, 20) == 3
+    assert page_count(40, 20) == 2
+    assert page_count(None, 20) == 1
+    assert page_count(45, None) == 1
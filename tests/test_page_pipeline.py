@@ -0,0 +1,54 @@
+import io
+import json
+import types
+
+from ad_batch import AdBatch
+from page_pipeline import JSONLinesSink, PageFanout, PageSink
+
+ADAPTER = types.SimpleNamespace(name="binance")
+
+
+def page(*advertisers):
+    return AdBatch.from_rows([(advertiser, 1.0, 10.0, ["Wise"]) for advertiser in advertisers])
+
+
+def test_jsonl_file_is_closed_with_every_line_written(tmp_path):
+    path = tmp_path / "ads.jsonl"
+    with JSONLinesSink.from_path(str(path)) as sink:
+        sink.write_page(ADAPTER, "EUR", 1, page("a", "b"))
+        sink.write_page(ADAPTER, "EUR", 2, page())
+        sink.write_page(ADAPTER, "EUR", 3, page("c"))
+    assert sink.stream.closed
+
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [(line["page"], line["advertiser"]) for line in lines] == [(1, "a"), (1, "b"), (3, "c")]
+    assert lines[0] == {"exchange": "binance", "fiat": "EUR", "page": 1, "advertiser": "a", "price": 1.0,
+                        "amount": 10.0, "payment_methods": ["Wise"]}
+
+
+def test_jsonl_sink_leaves_streams_it_did_not_open_open():
+    stream = io.StringIO()
+    sink = JSONLinesSink(stream)
+    sink.write_page(ADAPTER, "EUR", 1, page("a"))
+    sink.close()
+    assert not stream.closed
+    assert not JSONLinesSink.from_path("-").owns_stream
+
+
+class ClosingSink(PageSink):
+    def __init__(self, fail=False):
+        self.closed = False
+        self.fail = fail
+
+    def close(self):
+        self.closed = True
+        if self.fail:
+            raise OSError("disk full")
+
+
+def test_fanout_closes_every_sink_even_if_one_fails(capsys):
+    first, second = ClosingSink(fail=True), ClosingSink()
+    # Sinks without a close() are skipped
+    PageFanout([first, object(), second]).close()
+    assert first.closed and second.closed
+    assert "Error in ClosingSink.close: disk full" in capsys.readouterr().out
@@ -0,0 +1,53 @@
+from ad_batch import AdBatch, PaymentMethodRegistry
+from bank_filter import BankFilter
+from payment_summary import amount_summary, payment_options, summarize_payment_methods, summary_rows
+
+
+def make_ads():
+    return AdBatch.from_rows([
+        ("a", 100.0, 100.0, ["Wise", "SEPA"]),
+        ("b", 99.0, 50.0, ["SEPA"]),
+        ("c", 102.0, 1234.5, ["Revolut"]),
+        ("d", 98.0, 25.0, ["Wise"]),
+        ("e", 101.0, 150.0, ["Zelle"]),
+        # No payment methods: counted under none
+        ("f", 97.0, 5000.0, []),
+    ], PaymentMethodRegistry())
+
+
+def test_summary_counts_every_ad_once_per_method():
+    summary = summarize_payment_methods(make_ads())
+    # Most USDT first; SEPA and Zelle tie on USDT, so more ads goes first
+    assert summary_rows("EUR", summary) == [
+        ["EUR", "Revolut", 1, 1234.5, 102.0, 102.0, 102.0],
+        ["EUR", "SEPA", 2, 150.0, 99.0, 99.5, 100.0],
+        ["EUR", "Zelle", 1, 150.0, 101.0, 101.0, 101.0],
+        ["EUR", "Wise", 2, 125.0, 98.0, 99.0, 100.0],
+    ]
+
+
+def test_best_price_is_the_methods_first_ranked_ad():
+    ads = AdBatch.from_rows([("a", 5.0, 10.0, ["Wise"]), ("b", 4.0, 10.0, ["Wise"])], PaymentMethodRegistry())
+    [row] = summary_rows("USD", summarize_payment_methods(ads))
+    assert row == ["USD", "Wise", 2, 20.0, 4.0, 4.5, 5.0]
+
+
+def test_main_sheet_cells():
+    summary = summarize_payment_methods(make_ads())
+    assert payment_options(summary) == "Revolut, SEPA, Zelle, Wise"
+    assert amount_summary(summary) == ("Revolut: 1,234.50 USDT (1 ad)\n"
+                                       "SEPA: 150.00 USDT (2 ads)\n"
+                                       "Zelle: 150.00 USDT (1 ad)\n"
+                                       "Wise: 125.00 USDT (2 ads)")
+
+
+def test_payment_options_keep_only_the_bank_list():
+    bank_filter = BankFilter({"Wise": [], "Revolut Bank": ["Revolut"]})
+    assert payment_options(summarize_payment_methods(make_ads()), bank_filter) == "Revolut, Wise"
+
+
+def test_currency_without_ads():
+    summary = summarize_payment_methods(AdBatch(PaymentMethodRegistry()))
+    assert summary_rows("EUR", summary) == []
+    assert payment_options(summary) == ""
+    assert amount_summary(summary) == ""
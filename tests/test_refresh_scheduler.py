@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from ad_batch import AdBatch
+from refresh_scheduler import SECONDS_PER_CURRENCY, SECONDS_PER_PAGE, RefreshScheduler
+from snapshot_store import append_batch
+
+NOW = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def hours_ago(hours):
+    return NOW - timedelta(hours=hours)
+
+
+def record_prices(scheduler, exchange, fiat, prices, last_hours_ago=0.5):
+    """One scrape an hour with the given best prices, the last one last_hours_ago."""
+    for index, price in enumerate(prices):
+        scheduler.record(exchange, fiat, hours_ago(last_hours_ago + len(prices) - 1 - index), price, 10, 1000.0)
+
+
+@pytest.fixture
+def scheduler():
+    return RefreshScheduler()
+
+
+def test_staler_market_goes_first(scheduler):
+    record_prices(scheduler, "binance", "EUR", [1.0], last_hours_ago=1)
+    record_prices(scheduler, "binance", "USD", [1.0], last_hours_ago=5)
+    assert scheduler.stale_probability("binance", "USD", NOW) > scheduler.stale_probability("binance", "EUR", NOW)
+    assert scheduler.plan([("binance", "EUR"), ("binance", "USD")], now=NOW) == [("binance", "USD"),
+                                                                                  ("binance", "EUR")]
+
+
+def test_volatile_market_goes_before_a_quiet_one_scraped_at_the_same_time(scheduler):
+    record_prices(scheduler, "bybit", "ARS", [1000.0, 1010.0, 1020.0, 1030.0])
+    record_prices(scheduler, "bybit", "CHF", [0.9, 0.9, 0.9, 0.9])
+    assert scheduler.change_rate("bybit", "ARS") > scheduler.change_rate("bybit", "CHF")
+    assert scheduler.interval("bybit", "ARS") < scheduler.interval("bybit", "CHF")
+    assert scheduler.plan([("bybit", "CHF"), ("bybit", "ARS")], now=NOW) == [("bybit", "ARS"), ("bybit", "CHF")]
+
+
+def test_never_scraped_market_goes_first_with_default_cost(scheduler):
+    record_prices(scheduler, "okx", "ARS", [1000.0, 1010.0, 1020.0])
+    assert scheduler.stale_probability("okx", "PGK", NOW) == 1.0
+    assert scheduler.change_rate("okx", "PGK") == 1.0
+    assert scheduler.cost("okx", "PGK") == SECONDS_PER_CURRENCY + SECONDS_PER_PAGE
+    assert scheduler.plan([("okx", "ARS"), ("okx", "PGK")], now=NOW) == [("okx", "PGK"), ("okx", "ARS")]
+
+
+def test_overdue_quiet_market_goes_before_a_volatile_one(scheduler):
+    scheduler.max_intervals["okx"] = timedelta(hours=2)
+    record_prices(scheduler, "okx", "BIF", [2900.0, 2900.0], last_hours_ago=3)
+    record_prices(scheduler, "binance", "ARS", [1000.0, 1010.0, 1020.0])
+    assert scheduler.plan([("binance", "ARS"), ("okx", "BIF")], now=NOW) == [("okx", "BIF"), ("binance", "ARS")]
+
+
+def test_recently_scraped_market_is_skipped(scheduler):
+    scheduler.record("binance", "EUR", NOW - timedelta(minutes=5), 1.0, 10, 1000.0)
+    assert scheduler.plan([("binance", "EUR"), ("binance", "USD")], now=NOW) == [("binance", "USD")]
+
+
+def test_budget_keeps_the_most_urgent_markets(scheduler):
+    record_prices(scheduler, "binance", "EUR", [1.0], last_hours_ago=1)
+    record_prices(scheduler, "binance", "USD", [1.0], last_hours_ago=5)
+    # Ten ads are one page: each market costs SECONDS_PER_CURRENCY + SECONDS_PER_PAGE
+    budget_minutes = (SECONDS_PER_CURRENCY + SECONDS_PER_PAGE) * 1.5 / 60
+    tasks = [("binance", "EUR"), ("binance", "USD"), ("binance", "GBP")]
+    assert scheduler.plan(tasks, budget_minutes=budget_minutes, now=NOW) == [("binance", "GBP")]
+    assert scheduler.plan(tasks[:2], budget_minutes=budget_minutes, now=NOW) == [("binance", "USD")]
+
+
+def test_load_history_replays_the_snapshot_store(tmp_path, scheduler):
+    root = str(tmp_path)
+    for hours, price in ((3, 1.0), (2, 1.1), (1, 1.2)):
+        ads = AdBatch.from_rows([("a", price, 50.0, ["Wise"]), ("b", price + 0.1, 25.0, ["Wise"])])
+        append_batch(root, "binance", "EUR", ads, hours_ago(hours))
+
+    assert scheduler.load_history(root, now=NOW) == 3
+    stats = scheduler.markets[("binance", "EUR")]
+    assert (stats.last_scraped, stats.best_price, stats.ad_count, stats.total_amount) == (hours_ago(1), 1.2, 2, 75.0)
+    assert stats.observations == 3
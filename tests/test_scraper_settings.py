@@ -0,0 +1,50 @@
+import pytest
+
+import scraper_settings
+from bybit_adapter import BybitAdapter
+from scraper_settings import run_scraper, settings
+
+
+class RecordingEngine:
+    def __init__(self, adapters, **kwargs):
+        self.adapters = adapters
+        self.kwargs = kwargs
+        self.calls = []
+        RecordingEngine.last = self
+
+    def run(self):
+        self.calls.append(("run",))
+
+    def serve(self, **kwargs):
+        self.calls.append(("serve", kwargs))
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    monkeypatch.setattr(scraper_settings, "P2PEngine", RecordingEngine)
+    return RecordingEngine
+
+
+def test_settings_apply_overrides():
+    values = settings(TAB_COUNT=2)
+    assert values["TAB_COUNT"] == 2
+    assert values["WORKER_COUNT"] == scraper_settings.WORKER_COUNT
+
+
+def test_unknown_setting_is_named():
+    with pytest.raises(ValueError, match="TAB_COUNTS"):
+        settings(TAB_COUNTS=2)
+
+
+def test_run_scraper_builds_the_exchange_engine(engine):
+    run_scraper(BybitAdapter, "sheet", TAB_COUNT=2, MAX_PAGES=3)
+    adapter, = engine.last.adapters
+    assert (adapter.sheet_id, adapter.tab_count, adapter.depth_limit.max_pages) == ("sheet", 2, 3)
+    assert engine.last.kwargs["checkpoint_file"] == "bybit_checkpoint.jsonl"
+    assert engine.last.calls == [("run",)]
+
+
+def test_daemon_mode_writes_the_exchange_status_file(engine):
+    run_scraper(BybitAdapter, "sheet", DAEMON_MODE=True, CHECKPOINT_FILE=None)
+    assert engine.last.kwargs["checkpoint_file"] is None
+    assert engine.last.calls == [("serve", {"pause_seconds": 30, "status_file": "bybit_status.json"})]
@@ -0,0 +1,126 @@
+import json
+
+import pandas as pd
+
+from sheets_writer import BatchedSheetsWriter, dataframe_to_values
+
+
+def table(rows, seed=0):
+    return [["Advertiser Name", "Price", "Available Amount", "Payment Methods"]] + [
+        [f"merchant_{seed}_{index}", 100.0 + index, 1000.0 + index, "Wise, SEPA"] for index in range(rows)]
+
+
+def stored(sheets, title):
+    return sheets.spreadsheets["test"].sheets[title]["values"]
+
+
+def test_flush_writes_every_table_and_range_in_three_requests(sheets, workbook):
+    writer = BatchedSheetsWriter(workbook)
+    for seed, fiat in enumerate(["USD", "EUR", "ARS"]):
+        writer.write_table(fiat, table(30, seed), number_columns=(2, 3))
+    writer.write_range("Main", "D2:D3", [["now"], ["now"]])
+    sheets.reset_counts()
+
+    # Metadata read, one spreadsheets.batchUpdate and one values.batchUpdate
+    assert writer.flush() == 3
+    assert dict(sheets.calls) == {"spreadsheets.get": 1, "spreadsheets.batchUpdate": 1, "values.batchUpdate": 1}
+    for seed, fiat in enumerate(["USD", "EUR", "ARS"]):
+        assert stored(sheets, fiat) == table(30, seed)
+    assert stored(sheets, "Main")[1:3] == [["", "", "", "now"], ["", "", "", "now"]]
+    assert writer.flush() == 0
+
+
+def test_values_are_split_under_the_payload_limit(sheets, workbook):
+    limit = 4000
+    writer = BatchedSheetsWriter(workbook, max_payload_bytes=limit)
+    writer.write_table("USD", table(200))
+    writer.write_table("EUR", table(10, 1))
+    sent = []
+    batch_update = workbook.values_batch_update
+
+    def record(body):
+        sent.append(body)
+        return batch_update(body)
+
+    workbook.values_batch_update = record
+    writer.flush()
+
+    assert len(sent) > 1
+    assert all(len(json.dumps(body)) <= limit for body in sent)
+    assert stored(sheets, "USD") == table(200)
+    assert stored(sheets, "EUR") == table(10, 1)
+
+
+def test_rewrite_without_snapshots_clears_the_old_rows(sheets, workbook):
+    writer = BatchedSheetsWriter(workbook)
+    writer.write_table("USD", table(20))
+    writer.flush()
+    writer.write_table("USD", table(5, 1))
+    writer.flush()
+
+    rows = [row for row in stored(sheets, "USD") if any(cell != "" for cell in row)]
+    assert rows == table(5, 1)
+
+
+def test_dataframe_to_values_writes_numbers_as_floats_and_bad_numbers_as_zero():
+    frame = pd.DataFrame({"Advertiser Name": ["a", "b"], "Price": ["1.5", "oops"],
+                          "Available Amount": [2.0, float("inf")], "Payment Methods": ["Wise", ""]})
+    assert dataframe_to_values(frame) == [
+        ["Advertiser Name", "Price", "Available Amount", "Payment Methods"],
+        ["a", 1.5, 2.0, "Wise"],
+        ["b", 0.0, 0.0, ""],
+    ]
+
+
+HEADER = ["Advertiser Name", "Price", "Available Amount", "Payment Methods"]
+
+
+def test_diff_writes_keep_the_scraped_order(sheets, workbook, tmp_path):
+    writer = BatchedSheetsWriter(workbook, snapshot_dir=str(tmp_path))
+    writer.write_table("USD", [HEADER, ["A", 1.0, 5.0, "Wise"], ["B", 1.1, 5.0, "Wise"], ["C", 1.2, 5.0, "Wise"]])
+    writer.flush()
+    new = [HEADER, ["C", 0.9, 5.0, "Wise"], ["D", 1.0, 5.0, "Wise"], ["A", 1.05, 5.0, "Wise"]]
+    writer.write_table("USD", new)
+    writer.flush()
+
+    assert stored(sheets, "USD") == new
+
+
+def test_diff_writes_send_only_the_changed_cells(sheets, workbook, tmp_path):
+    writer = BatchedSheetsWriter(workbook, snapshot_dir=str(tmp_path))
+    old = table(50)
+    writer.write_table("USD", old)
+    writer.flush()
+
+    new = [list(row) for row in old]
+    new[10][1] = 555.0
+    new[11][1] = 556.0
+    new[40][2] = 9.0
+    sent = []
+    batch_update = workbook.values_batch_update
+    workbook.values_batch_update = lambda body: (sent.append(body), batch_update(body))[1]
+    writer.write_table("USD", new)
+    writer.flush()
+
+    assert [(data["range"], data["values"]) for data in sent[0]["data"]] == [
+        ("'USD'!B11", [[555.0], [556.0]]),
+        ("'USD'!C41", [[9.0]]),
+    ]
+    assert stored(sheets, "USD") == new
+
+    # Nothing changed: no values are sent at all
+    sheets.reset_counts()
+    writer.write_table("USD", new)
+    writer.flush()
+    assert "values.batchUpdate" not in sheets.calls
+
+
+def test_diff_writes_clear_the_rows_a_shorter_table_no_longer_has(sheets, workbook, tmp_path):
+    writer = BatchedSheetsWriter(workbook, snapshot_dir=str(tmp_path))
+    writer.write_table("USD", table(20))
+    writer.flush()
+    writer.write_table("USD", table(5, 1))
+    writer.flush()
+
+    rows = [row for row in stored(sheets, "USD") if any(cell != "" for cell in row)]
+    assert rows == table(5, 1)
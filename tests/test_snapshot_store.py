@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta, timezone
+
+import pyarrow.parquet as pq
+import pytest
+
+from ad_batch import AdBatch, PaymentMethodRegistry
+from snapshot_store import SnapshotWriter, append_batch, latest, latest_files, query
+
+DAY_ONE = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+DAY_TWO = DAY_ONE + timedelta(days=1)
+
+
+def ads(*advertisers, methods=("Wise",), registry=None):
+    return AdBatch.from_rows([(advertiser, 1.0, 10.0, list(methods)) for advertiser in advertisers],
+                             registry or PaymentMethodRegistry())
+
+
+@pytest.fixture
+def store(tmp_path):
+    root = str(tmp_path / "store")
+    append_batch(root, "binance", "EUR", ads("a", "b"), DAY_ONE)
+    append_batch(root, "binance", "EUR", ads("c"), DAY_TWO)
+    append_batch(root, "binance", "USD", ads("d"), DAY_ONE)
+    append_batch(root, "okx", "EUR", ads("e"), DAY_TWO + timedelta(hours=1))
+    return root
+
+
+def advertisers(table):
+    return sorted(table.column("advertiser").to_pylist())
+
+
+def test_file_dictionary_holds_only_the_methods_it_uses(tmp_path):
+    registry = PaymentMethodRegistry()
+    for name in ("Revolut", "SEPA", "Zelle"):
+        registry.intern(name)
+    batch = AdBatch.from_rows([("a", 1.0, 10.0, ["Wise", "SEPA"]), ("b", 1.0, 10.0, []),
+                               ("c", 1.0, 10.0, ["Wise"])], registry)
+    path = append_batch(str(tmp_path), "binance", "EUR", batch, DAY_ONE)
+
+    column = pq.read_table(path).column("payment_methods")
+    assert sorted(column.chunk(0).values.dictionary.to_pylist()) == ["SEPA", "Wise"]
+    assert column.to_pylist() == [["Wise", "SEPA"], [], ["Wise"]]
+
+
+def test_query_filters_exchanges_fiats_and_time(store):
+    assert advertisers(query(store)) == ["a", "b", "c", "d", "e"]
+    assert advertisers(query(store, exchanges="binance", fiats=["EUR"])) == ["a", "b", "c"]
+    assert advertisers(query(store, start=DAY_TWO)) == ["c", "e"]
+    assert advertisers(query(store, end=DAY_TWO)) == ["a", "b", "d"]
+    assert advertisers(query(store, fiats="EUR", start=DAY_ONE, end=DAY_TWO + timedelta(minutes=30))) == ["a", "b", "c"]
+
+
+def test_query_reads_only_the_requested_columns(store):
+    table = query(store, exchanges="okx", columns=["advertiser", "rank"])
+    assert table.column_names == ["advertiser", "rank"]
+    assert table.to_pylist() == [{"advertiser": "e", "rank": 1}]
+
+
+def test_query_on_a_missing_store_is_empty(tmp_path):
+    assert query(str(tmp_path / "nothing")).num_rows == 0
+
+
+def test_latest_returns_each_markets_last_scrape(store):
+    table = latest(store)
+    assert advertisers(table) == ["c", "d", "e"]
+    assert len(latest_files(store)) == 3
+    assert advertisers(latest(store, exchanges="binance", fiats="EUR")) == ["c"]
+    assert set(table.column("exchange").to_pylist()) == {"binance", "okx"}
+
+
+def test_latest_since_drops_markets_not_scraped_recently(store):
+    assert advertisers(latest(store, since=DAY_TWO)) == ["c", "e"]
+    assert latest(str(store) + "-missing").num_rows == 0
+
+
+def test_snapshot_writer_ranks_pages_and_publishes_on_close(tmp_path):
+    root = str(tmp_path)
+    writer = SnapshotWriter(root, "bybit", "EUR", DAY_ONE)
+    writer.write(ads("a", "b", methods=["Wise"]))
+    writer.write(ads("c", methods=["SEPA"]))
+    assert query(root).num_rows == 0
+    writer.close()
+
+    table = query(root)
+    assert table.column("rank").to_pylist() == [1, 2, 3]
+    assert table.column("payment_methods").to_pylist() == [["Wise"], ["Wise"], ["SEPA"]]
@@ -0,0 +1,121 @@
+import math
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from ad_batch import AdBatch
+from bank_filter import BankFilter
+from snapshot_store import append_batch
+from spread_analytics import ALL_METHODS, compute_spreads, cross_exchange_spreads, market_depth, method_levels
+
+
+def levels(*ads):
+    """A method_levels() frame from (exchange, fiat, method, price, amount) tuples."""
+    return pd.DataFrame(ads, columns=["exchange", "fiat", "method", "price", "amount"])
+
+
+def test_method_levels_lists_every_method_and_all_ads():
+    table = pa.table({
+        "exchange": ["binance", "binance", "okx"],
+        "fiat": ["EUR", "EUR", "EUR"],
+        "price": [1.0, 1.1, 1.2],
+        "amount": [10.0, 20.0, 30.0],
+        "payment_methods": pa.array([["Bank Transfer", "Wise"], [], ["BANK TRANSFER"]],
+                                    pa.list_(pa.string())),
+    })
+    frame, display = method_levels(table)
+
+    rows = sorted(frame.itertuples(index=False, name=None))
+    assert rows == [
+        ("binance", "EUR", "All", 1.0, 10.0),
+        ("binance", "EUR", "All", 1.1, 20.0),
+        ("binance", "EUR", "bank transfer", 1.0, 10.0),
+        ("binance", "EUR", "wise", 1.0, 10.0),
+        ("okx", "EUR", "All", 1.2, 30.0),
+        ("okx", "EUR", "bank transfer", 1.2, 30.0),
+    ]
+    # Spellings are matched across exchanges and shown as first seen
+    assert display["bank transfer"] == "Bank Transfer"
+
+
+def test_method_levels_match_methods_by_bank():
+    table = pa.table({"exchange": ["binance", "bybit"], "fiat": ["RUB", "RUB"], "price": [90.0, 91.0],
+                      "amount": [5.0, 5.0], "payment_methods": [["Tinkoff"], ["T-Bank"]]})
+    frame, display = method_levels(table, BankFilter({"Tinkoff": ["T-Bank"]}))
+    assert sorted(frame[frame["method"] != ALL_METHODS]["exchange"]) == ["binance", "bybit"]
+    assert set(frame["method"]) == {ALL_METHODS, "Tinkoff"}
+    assert display["Tinkoff"] == "Tinkoff"
+
+
+def test_depth_price_walks_the_cheapest_ads_first():
+    markets = market_depth(levels(
+        ("binance", "EUR", ALL_METHODS, 1.00, 600.0),
+        ("binance", "EUR", ALL_METHODS, 1.02, 600.0),
+        ("binance", "EUR", ALL_METHODS, 0.99, 200.0),
+    ), depth=1000)
+    market = markets.loc[("EUR", ALL_METHODS, "binance")]
+    assert market["best"] == 0.99
+    assert market["available"] == 1400.0
+    # 200 at 0.99, 600 at 1.00 and the first 200 at 1.02
+    assert market["depth_price"] == pytest.approx((200 * 0.99 + 600 * 1.00 + 200 * 1.02) / 1000)
+
+
+def test_partial_fill_has_no_depth_price():
+    markets = market_depth(levels(
+        ("okx", "EUR", ALL_METHODS, 1.01, 400.0),
+        ("okx", "EUR", ALL_METHODS, 1.03, 599.0),
+        ("bybit", "EUR", ALL_METHODS, 1.00, 1000.0),
+    ), depth=1000)
+    assert math.isnan(markets.loc[("EUR", ALL_METHODS, "okx"), "depth_price"])
+    assert markets.loc[("EUR", ALL_METHODS, "okx"), "available"] == 999.0
+    assert markets.loc[("EUR", ALL_METHODS, "bybit"), "depth_price"] == 1.00
+
+
+def test_cross_exchange_spreads():
+    markets = market_depth(levels(
+        ("binance", "EUR", ALL_METHODS, 0.99, 200.0),
+        ("binance", "EUR", ALL_METHODS, 1.00, 800.0),
+        ("bybit", "EUR", ALL_METHODS, 1.00, 1000.0),
+        ("okx", "EUR", ALL_METHODS, 1.01, 500.0),
+        # Only quoted on Binance, so not compared
+        ("binance", "EUR", "wise", 0.98, 5000.0),
+        ("binance", "USD", "zelle", 1.02, 50.0),
+        ("bybit", "USD", "zelle", 1.00, 50.0),
+    ), depth=1000)
+    frame = cross_exchange_spreads(markets, depth=1000, display={"zelle": "Zelle"})
+
+    assert list(frame.columns) == ["Fiat", "Payment Method", "Binance", "Bybit", "OKX", "Cheapest", "Spread %",
+                                   "Best @1000", "Depth Spread %"]
+    assert list(zip(frame["Fiat"], frame["Payment Method"])) == [("EUR", ALL_METHODS), ("USD", "Zelle")]
+
+    eur, usd = frame.iloc[0], frame.iloc[1]
+    assert (eur["Binance"], eur["Bybit"], eur["OKX"]) == (0.99, 1.00, 1.01)
+    assert eur["Cheapest"] == "Binance"
+    assert eur["Spread %"] == pytest.approx((1.01 - 0.99) / 0.99 * 100)
+    # OKX cannot fill 1000 USDT, so the depth spread is Binance's 0.998 against Bybit's 1.00
+    assert eur["Best @1000"] == pytest.approx(0.998)
+    assert eur["Depth Spread %"] == pytest.approx((1.00 - 0.998) / 0.998 * 100)
+
+    assert usd["Cheapest"] == "Bybit"
+    assert math.isnan(usd["OKX"])
+    assert usd["Spread %"] == pytest.approx(2.0)
+    assert math.isnan(usd["Best @1000"]) and math.isnan(usd["Depth Spread %"])
+
+
+def test_no_pair_quoted_twice_gives_an_empty_table():
+    markets = market_depth(levels(("binance", "EUR", ALL_METHODS, 1.0, 10.0)))
+    frame = cross_exchange_spreads(markets)
+    assert frame.empty
+    assert "Cheapest" in frame.columns
+
+
+def test_compute_spreads_reads_the_latest_scrapes(tmp_path):
+    root = str(tmp_path)
+    append_batch(root, "binance", "EUR", AdBatch.from_rows([("a", 1.10, 2000.0, ["Wise"])]))
+    append_batch(root, "okx", "EUR", AdBatch.from_rows([("b", 1.00, 2000.0, ["Wise"])]))
+
+    frame = compute_spreads(root)
+    assert list(frame["Payment Method"]) == [ALL_METHODS, "Wise"]
+    assert list(frame["Cheapest"]) == ["OKX", "OKX"]
+    assert frame["Spread %"].tolist() == pytest.approx([10.0, 10.0])
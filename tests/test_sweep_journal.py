@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from ad_batch import AdBatch
+from sweep_journal import SweepJournal
+
+TASKS = [("binance", "EUR"), ("binance", "USD"), ("bybit", "EUR")]
+
+
+def ads(*advertisers):
+    return AdBatch.from_rows([(advertiser, 1.0, 10.0, ["Wise"]) for advertiser in advertisers])
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / "checkpoint.jsonl"
+
+
+def test_new_sweep_returns_every_task(path):
+    journal = SweepJournal(path)
+    assert journal.begin(TASKS) == TASKS
+    assert journal.active
+    assert journal.completed_batches() == []
+
+
+def test_interrupted_sweep_resumes_where_it_stopped(path):
+    journal = SweepJournal(path)
+    journal.begin(TASKS)
+    scraped_at = datetime.now(timezone.utc)
+    journal.record_done("binance", "EUR", ads("a", "b"), scraped_at)
+    journal.record_page("binance", "USD", 1, ads("c"))
+
+    resumed = SweepJournal(path)
+    # The task list of the interrupted sweep wins over the one passed in
+    assert resumed.begin(TASKS[:1]) == TASKS[1:]
+    assert resumed.run_id == journal.run_id
+    [(exchange, fiat, batch, at)] = resumed.completed_batches()
+    assert (exchange, fiat, batch.advertisers, at) == ("binance", "EUR", ["a", "b"], scraped_at)
+    assert {page: batch.advertisers for page, batch in resumed.cached_pages("binance", "USD").items()} == {1: ["c"]}
+
+
+def test_done_currency_drops_its_pages(path):
+    journal = SweepJournal(path)
+    journal.begin(TASKS)
+    journal.record_page("binance", "EUR", 1, ads("a"))
+    journal.record_done("binance", "EUR", ads("a"), datetime.now(timezone.utc))
+    assert journal.cached_pages("binance", "EUR") == {}
+
+    resumed = SweepJournal(path)
+    resumed.begin(TASKS)
+    assert resumed.cached_pages("binance", "EUR") == {}
+
+
+def test_old_pages_are_not_reused(path):
+    journal = SweepJournal(path, page_max_age=timedelta(0))
+    journal.begin(TASKS)
+    journal.record_page("binance", "EUR", 1, ads("a"))
+    resumed = SweepJournal(path, page_max_age=timedelta(0))
+    resumed.begin(TASKS)
+    assert resumed.pages[("binance", "EUR")]
+    assert resumed.cached_pages("binance", "EUR") == {}
+
+
+def test_failed_attempts_are_counted_across_restarts(path):
+    journal = SweepJournal(path)
+    journal.begin(TASKS)
+    assert journal.record_failure("bybit", "EUR", RuntimeError("timeout")) == 1
+    assert journal.record_failure("bybit", "EUR", RuntimeError("timeout")) == 2
+    assert journal.record_failure("binance", "USD", RuntimeError("timeout")) == 1
+
+    resumed = SweepJournal(path)
+    assert resumed.begin(TASKS) == TASKS
+    assert resumed.record_failure("bybit", "EUR", RuntimeError("timeout")) == 3
+
+
+def test_retried_currency_that_succeeds_is_not_scraped_again(path):
+    journal = SweepJournal(path)
+    journal.begin(TASKS)
+    journal.record_failure("bybit", "EUR", RuntimeError("timeout"))
+    journal.record_done("bybit", "EUR", ads("a"), datetime.now(timezone.utc))
+    assert SweepJournal(path).begin(TASKS) == TASKS[:2]
+
+
+def test_finished_sweep_starts_over(path):
+    journal = SweepJournal(path)
+    journal.begin(TASKS)
+    journal.record_done("binance", "EUR", ads("a"), datetime.now(timezone.utc))
+    journal.end()
+    assert not journal.active
+
+    fresh = SweepJournal(path)
+    assert fresh.begin(TASKS[:1]) == TASKS[:1]
+    assert fresh.run_id != journal.run_id
+    assert fresh.completed_batches() == []
+
+
+def test_stale_sweep_is_not_resumed(path):
+    journal = SweepJournal(path)
+    journal.begin(TASKS)
+    journal.record_done("binance", "EUR", ads("a"), datetime.now(timezone.utc))
+    stale = SweepJournal(path, resume_within=timedelta(0))
+    assert stale.begin(TASKS) == TASKS
+    assert stale.completed_batches() == []
+
+
+def test_line_cut_short_by_a_crash_is_ignored(path):
+    journal = SweepJournal(path)
+    journal.begin(TASKS)
+    journal.record_done("binance", "EUR", ads("a"), datetime.now(timezone.utc))
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"event": "done", "exchange": "binance", "fi')
+    assert SweepJournal(path).begin(TASKS) == TASKS[1:]
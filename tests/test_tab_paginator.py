@@ -0,0 +1,27 @@
+from ad_batch import AdBatch
+from tab_paginator import merge_pages
+
+
+def ads(*advertisers, price=1.0):
+    return AdBatch.from_rows([(advertiser, price, 10.0, ["Wise"]) for advertiser in advertisers])
+
+
+def test_pages_are_merged_in_page_order():
+    merged = merge_pages({3: ads("e"), 1: ads("a", "b"), 2: ads("c", "d")})
+    assert merged.advertisers == ["a", "b", "c", "d", "e"]
+
+
+def test_ads_that_shifted_pages_are_kept_once(capsys):
+    merged = merge_pages({2: ads("b", "c", "d"), 1: ads("a", "b"), 3: ads("d", "e")})
+    assert merged.advertisers == ["a", "b", "c", "d", "e"]
+    assert "Dropped 2 ads that shifted between pages" in capsys.readouterr().out
+
+
+def test_same_advertiser_with_another_price_is_a_different_ad(capsys):
+    merged = merge_pages({1: ads("a"), 2: ads("a", price=1.1)})
+    assert merged.rows() == [("a", 1.0, 10.0, ["Wise"]), ("a", 1.1, 10.0, ["Wise"])]
+    assert capsys.readouterr().out == ""
+
+
+def test_no_pages():
+    assert len(merge_pages({})) == 0
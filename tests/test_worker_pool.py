@@ -0,0 +1,116 @@
+import threading
+import time
+
+from worker_pool import PoolCancelled, WorkerPool
+
+
+class FakeDriver:
+    def __init__(self, created):
+        self.id = len(created)
+        self.quit_called = False
+        created.append(self)
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_results_come_in_task_order_whatever_order_they_finish_in():
+    created = []
+    # Later tasks finish first
+    delays = {task: (10 - task) * 0.005 for task in range(10)}
+
+    def scrape(driver, task):
+        time.sleep(delays[task])
+        return task * 2
+
+    pool = WorkerPool(lambda: FakeDriver(created), scrape, workers=4)
+    results = list(pool.run(list(range(10))))
+
+    assert [task for task, _, _ in results] == list(range(10))
+    assert [result for _, result, _ in results] == [task * 2 for task in range(10)]
+    assert all(error is None for _, _, error in results)
+    assert len(created) <= 4
+    assert all(driver.quit_called for driver in created)
+
+
+def test_errors_are_yielded_and_the_failed_driver_is_replaced():
+    created = []
+
+    def scrape(driver, task):
+        if task == "bad":
+            raise RuntimeError("page never loaded")
+        return driver.id
+
+    pool = WorkerPool(lambda: FakeDriver(created), scrape, workers=1)
+    results = list(pool.run(["a", "bad", "b"]))
+
+    assert isinstance(results[1][2], RuntimeError)
+    assert results[0][1] == 0
+    # The driver that failed was quit, so "b" ran on a new one
+    assert results[2][1] == 1
+    assert pool.stats[0].completed == 2 and pool.stats[0].failed == 1
+
+
+def test_drivers_are_recycled_after_recycle_after_tasks():
+    created = []
+    pool = WorkerPool(lambda: FakeDriver(created), lambda driver, task: driver.id, workers=1, recycle_after=2)
+    results = [result for _, result, _ in pool.run(list(range(5)))]
+
+    assert results == [0, 0, 1, 1, 2]
+    assert pool.stats[0].recycles == 2
+
+
+def test_cancel_drops_tasks_no_worker_started():
+    started = threading.Event()
+    release = threading.Event()
+
+    def scrape(driver, task):
+        started.set()
+        release.wait(5)
+        return task
+
+    pool = WorkerPool(lambda: FakeDriver([]), scrape, workers=1)
+    runner = pool.run(["first", "second", "third"])
+    thread = threading.Thread(target=lambda: (started.wait(5), pool.cancel(), release.set()))
+    thread.start()
+    results = list(runner)
+    thread.join()
+
+    assert results[0] == ("first", "first", None)
+    assert [task for task, _, _ in results[1:]] == ["second", "third"]
+    assert all(isinstance(error, PoolCancelled) for _, _, error in results[1:])
+
+
+def test_keep_drivers_reuses_warm_drivers_across_runs():
+    created = []
+    pool = WorkerPool(lambda: FakeDriver(created), lambda driver, task: driver.id, workers=1, keep_drivers=True)
+    first = [result for _, result, _ in pool.run(["a"])]
+    second = [result for _, result, _ in pool.run(["b"])]
+
+    assert first == second == [0]
+    assert not created[0].quit_called
+    pool.close()
+    assert created[0].quit_called
+
+
+def test_recycle_when_raising_recycles_the_driver_and_the_pool_finishes():
+    created = []
+    checks = []
+
+    def recycle_when(driver):
+        checks.append(driver.id)
+        if len(checks) == 1:
+            raise RuntimeError("session is gone")
+        return False
+
+    pool = WorkerPool(lambda: FakeDriver(created), lambda driver, task: driver.id, workers=1,
+                      recycle_when=recycle_when)
+    results = []
+    runner = threading.Thread(target=lambda: results.extend(pool.run(["a", "b", "c"])), daemon=True)
+    runner.start()
+    runner.join(5)
+
+    assert not runner.is_alive()
+    assert results == [("a", 0, None), ("b", 1, None), ("c", 1, None)]
+    assert created[0].quit_called
+    assert pool.stats[0].completed == 3 and pool.stats[0].recycles == 1
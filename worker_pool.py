@@ -0,0 +1,187 @@
+import queue
+import threading
+import time
+
+
+class PoolCancelled(Exception):
+    """Error yielded for a currency that cancel() dropped before any worker started it."""
+
+
+class WorkerStats:
+    """Throughput counters for one worker and its WebDriver sessions."""
+
+    def __init__(self, worker_id):
+        self.worker_id = worker_id
+        self.completed = 0
+        self.failed = 0
+        self.recycles = 0
+        self.busy_seconds = 0.0
+
+    def per_minute(self):
+        """Currencies finished per minute of scraping time."""
+        if not self.busy_seconds:
+            return 0.0
+        return (self.completed + self.failed) * 60 / self.busy_seconds
+
+
+class WorkerPool:
+    """Scrape currencies on several WebDriver sessions pulling from a shared queue.
+
+    create_driver() starts a new driver and scrape_currency(driver, currency)
+    returns the scraped data for one currency. Each driver is quit and replaced
+    after recycle_after currencies, or after any error since the session may
+    be dead. recycle_when(driver), if given, is asked after every currency and
+    can recycle the driver earlier (e.g. after a number of pages); a driver
+    it raises for is recycled too.
+
+    With keep_drivers, drivers left at the end of run() are kept warm for the
+    next run() instead of being quit; close() quits them.
+    """
+
+    def __init__(self, create_driver, scrape_currency, workers=1, recycle_after=25, recycle_when=None,
+                 keep_drivers=False):
+        self.create_driver = create_driver
+        self.scrape_currency = scrape_currency
+        self.workers = max(1, workers)
+        self.recycle_after = recycle_after
+        self.recycle_when = recycle_when
+        self.keep_drivers = keep_drivers
+        self.stats = []
+        # (driver, currencies scraped on it) waiting for the next run
+        self.idle_drivers = []
+        self._idle_lock = threading.Lock()
+        self._running = None
+
+    def run(self, currencies):
+        """Yield (currency, result, error) in the order of currencies as results become available."""
+        tasks = queue.Queue()
+        for currency in currencies:
+            tasks.put(currency)
+
+        results = {}
+        done = threading.Condition()
+        self._running = (tasks, results, done)
+        self.stats = [WorkerStats(worker_id) for worker_id in range(1, min(self.workers, len(currencies)) + 1)]
+        threads = [
+            threading.Thread(target=self._work, args=(stats, tasks, results, done), daemon=True)
+            for stats in self.stats
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            for currency in currencies:
+                with done:
+                    done.wait_for(lambda: currency in results)
+                    result, error = results.pop(currency)
+                yield currency, result, error
+        finally:
+            # Drain the queue so workers stop early if the consumer bails out
+            while True:
+                try:
+                    tasks.get_nowait()
+                except queue.Empty:
+                    break
+            for thread in threads:
+                thread.join()
+            self._running = None
+
+    def cancel(self):
+        """Drop the currencies no worker has started; run() yields them with a PoolCancelled error.
+
+        Currencies already being scraped finish normally.
+        """
+        running = self._running
+        if running is None:
+            return
+        tasks, results, done = running
+        while True:
+            try:
+                currency = tasks.get_nowait()
+            except queue.Empty:
+                break
+            with done:
+                results[currency] = (None, PoolCancelled("the pool was cancelled"))
+                done.notify_all()
+
+    def close(self):
+        """Quit the drivers kept warm between runs."""
+        with self._idle_lock:
+            idle, self.idle_drivers = self.idle_drivers, []
+        for driver, _ in idle:
+            _quit_driver(driver)
+
+    def _work(self, stats, tasks, results, done):
+        driver = None
+        scraped_on_driver = 0
+        with self._idle_lock:
+            if self.idle_drivers:
+                driver, scraped_on_driver = self.idle_drivers.pop()
+        try:
+            while True:
+                try:
+                    currency = tasks.get_nowait()
+                except queue.Empty:
+                    return
+
+                start = time.perf_counter()
+                result, error, published = None, None, False
+                try:
+                    try:
+                        if driver is None:
+                            driver = self.create_driver()
+                            scraped_on_driver = 0
+                        result = self.scrape_currency(driver, currency)
+                        stats.completed += 1
+                    except Exception as e:
+                        error = e
+                        stats.failed += 1
+                    stats.busy_seconds += time.perf_counter() - start
+                    scraped_on_driver += 1
+
+                    with done:
+                        results[currency] = (result, error)
+                        done.notify_all()
+                    published = True
+
+                    if driver is not None and (error is not None or scraped_on_driver >= self.recycle_after
+                                               or (self.recycle_when is not None and self.recycle_when(driver))):
+                        _quit_driver(driver)
+                        driver = None
+                        stats.recycles += 1
+                except Exception as e:
+                    # Anything failing outside scrape_currency (e.g. recycle_when) must not end the worker
+                    # with the currency unanswered, or run() would wait for it forever
+                    print(f"Worker {stats.worker_id}: error while finishing {currency}: {e}")
+                    if not published:
+                        stats.failed += 1
+                        with done:
+                            results[currency] = (None, e)
+                            done.notify_all()
+                    if driver is not None:
+                        _quit_driver(driver)
+                        driver = None
+                        stats.recycles += 1
+        finally:
+            if driver is not None:
+                if self.keep_drivers:
+                    with self._idle_lock:
+                        self.idle_drivers.append((driver, scraped_on_driver))
+                else:
+                    _quit_driver(driver)
+
+    def report(self):
+        """Print currencies scraped, failures and throughput for each worker."""
+        for stats in self.stats:
+            print(f"Worker {stats.worker_id}: {stats.completed} scraped, {stats.failed} failed, "
+                  f"{stats.recycles} driver recycles, {stats.busy_seconds:.1f}s busy, "
+                  f"{stats.per_minute():.2f} currencies/min")
+        total = sum(stats.completed for stats in self.stats)
+        print(f"Worker pool finished: {total} currencies scraped by {len(self.stats)} workers.")
+
+
+def _quit_driver(driver):
+    try:
+        driver.quit()
+    except Exception as e:
+        print(f"Error occurred while closing the WebDriver: {e}")